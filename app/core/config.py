@@ -1,7 +1,7 @@
 import os
 from dotenv import load_dotenv
 from dataclasses import dataclass
-from typing import Dict
+from typing import Dict, Tuple
 
 load_dotenv()
 
@@ -18,11 +18,84 @@ class Config:
     # Settings
     AUTO_ASSISTANT_REPLY: bool
     WS_URL: str
-    STATIC_CONTEXT_ID: str
+    ASSEMBLYAI_API_HOST: str
+    TTS_IDLE_TIMEOUT: float
+    TTS_CACHE_ENABLED: bool
+    TTS_CACHE_MAX_BYTES: int
+
+    # Outbound HTTP (skills)
+    HTTP_CONNECT_TIMEOUT: float
+    HTTP_READ_TIMEOUT: float
+    HTTP_MAX_CONNECTIONS_PER_HOST: int
+    HTTP_KEEPALIVE_EXPIRY: float
+    SKILL_ENDPOINTS: Dict[str, str]
+    SKILL_CACHE_TTLS: Dict[str, float]
+    SKILL_CACHE_MAX_ENTRIES: int
+    SKILL_SINGLE_FLIGHT: bool
+    SKILL_RATE_LIMITS: Dict[str, Tuple[float, int]]
+    SKILL_RATE_LIMIT_MAX_WAIT: float
+
+    # Gemini streaming
+    LLM_STREAM_WORKERS: int
+    LLM_STREAM_QUEUE_SIZE: int
+    PROMPT_TOKEN_BUDGET: int
+    PROMPT_SUMMARY_ENABLED: bool
+    PROMPT_SUMMARY_TOKENS: int
+    PROMPT_SUMMARY_KEEP_TURNS: int
+    PROMPT_SUMMARY_WORDS: int
+    GEMINI_MODEL_CACHE_SIZE: int
+    GEMINI_CLIENT_CACHE_SIZE: int
+    GEMINI_API_ENDPOINT: str
+    GEMINI_TRANSPORT: str
+
+    # Audio ingest (16-bit mono PCM from the browser)
+    AUDIO_SAMPLE_RATE: int
+    AUDIO_FRAME_MS: int
+    AUDIO_INGEST_BUFFER_MS: int
+    AUDIO_INGEST_POLICY: str
+    VAD_ENABLED: bool
+    VAD_THRESHOLD_DB: float
+    VAD_HANGOVER_MS: int
+    VAD_PREROLL_MS: int
+    VAD_KEEPALIVE_MS: int
+
+    # Audio uploads
+    UPLOAD_MAX_BYTES: int
+    UPLOAD_CHUNK_BYTES: int
+
+    # Batch transcription of uploads
+    TRANSCRIBE_WORKERS: int
+    TRANSCRIBE_QUEUE_MAX: int
+    TRANSCRIBE_JOBS_KEPT: int
+    TRANSCRIBE_REALTIME_FACTOR: float
+
+    # Sessions
+    SESSION_MAX: int
+    SESSION_IDLE_TTL: float
+    SESSION_STORE: str
+    SESSION_DB_PATH: str
+    SESSION_FLUSH_MS: int
+
+    # Turn handling: barge-in, coalescing and duplicate final transcripts
+    BARGE_IN_ENABLED: bool
+    BARGE_IN_MIN_WORDS: int
+    BARGE_IN_EXPECTED_REPLY_TOKENS: int
+    TURN_COALESCE_MS: int
+    TURN_DEDUP_WINDOW: float
+
+    # Speculative skill lookups on partial transcripts
+    SPECULATION_ENABLED: bool
+    SPECULATION_STABLE_PARTIALS: int
+    SPECULATION_STABLE_MS: int
     
     # Personas
     PERSONAS: Dict[str, str]
 
+def _rate_limit(name: str, default: str) -> Tuple[float, int]:
+    """Parse a "<requests per second>,<burst>" rate limit setting"""
+    rate, burst = os.getenv(name, default).split(",")
+    return float(rate), int(burst)
+
 def get_config() -> Config:
     """Get application configuration"""
     
@@ -58,6 +131,14 @@ Begin responses with phrases like "Well, my dear student" or "From an academic p
 Provide educational context and deeper insights.""",
     }
     
+    skill_endpoints = {
+        "weather": os.getenv("WEATHER_API_URL", "http://api.weatherapi.com/v1/current.json"),
+        "news": os.getenv("NEWS_API_URL", "https://newsapi.org/v2/top-headlines"),
+        "movies": os.getenv("TMDB_API_URL", "https://api.themoviedb.org/3/search/movie"),
+        "anime": os.getenv("JIKAN_API_URL", "https://api.jikan.moe/v4/anime"),
+        "quote": os.getenv("ZENQUOTES_API_URL", "https://zenquotes.io/api"),
+    }
+    
     return Config(
         MURF_API_KEY=os.getenv("MURF_API_KEY", ""),
         ASSEMBLYAI_API_KEY=os.getenv("ASSEMBLYAI_API_KEY", ""),
@@ -66,7 +147,77 @@ Provide educational context and deeper insights.""",
         NEWS_API_KEY=os.getenv("NEWS_API_KEY", ""),
         TMDB_API_KEY=os.getenv("TMDB_API_KEY", ""),
         AUTO_ASSISTANT_REPLY=os.getenv("AUTO_ASSISTANT_REPLY", "true").lower() in ("1", "true", "yes"),
-        WS_URL="wss://api.murf.ai/v1/speech/stream-input",
-        STATIC_CONTEXT_ID="lumeai-context-123",
+        WS_URL=os.getenv("MURF_WS_URL", "wss://api.murf.ai/v1/speech/stream-input"),
+        ASSEMBLYAI_API_HOST=os.getenv("ASSEMBLYAI_API_HOST", "streaming.assemblyai.com"),
+        TTS_CACHE_ENABLED=os.getenv("TTS_CACHE_ENABLED", "true").lower() in ("1", "true", "yes"),
+        TTS_CACHE_MAX_BYTES=int(os.getenv("TTS_CACHE_MAX_BYTES", str(256 * 1024 * 1024))),
+        TTS_IDLE_TIMEOUT=float(os.getenv("TTS_IDLE_TIMEOUT", "120")),
+        HTTP_CONNECT_TIMEOUT=float(os.getenv("HTTP_CONNECT_TIMEOUT", "5")),
+        HTTP_READ_TIMEOUT=float(os.getenv("HTTP_READ_TIMEOUT", "10")),
+        HTTP_MAX_CONNECTIONS_PER_HOST=int(os.getenv("HTTP_MAX_CONNECTIONS_PER_HOST", "20")),
+        HTTP_KEEPALIVE_EXPIRY=float(os.getenv("HTTP_KEEPALIVE_EXPIRY", "30")),
+        SKILL_ENDPOINTS=skill_endpoints,
+        SKILL_CACHE_TTLS={
+            "weather": float(os.getenv("WEATHER_CACHE_TTL", "600")),
+            "news": float(os.getenv("NEWS_CACHE_TTL", "600")),
+            "movies": float(os.getenv("MOVIES_CACHE_TTL", "21600")),
+            "anime": float(os.getenv("ANIME_CACHE_TTL", "21600")),
+        },
+        SKILL_CACHE_MAX_ENTRIES=int(os.getenv("SKILL_CACHE_MAX_ENTRIES", "2048")),
+        SKILL_SINGLE_FLIGHT=os.getenv("SKILL_SINGLE_FLIGHT", "true").lower() in ("1", "true", "yes"),
+        # "<requests per second>,<burst>" per provider
+        SKILL_RATE_LIMITS={
+            "weather": _rate_limit("WEATHER_RATE_LIMIT", "10,20"),
+            "news": _rate_limit("NEWS_RATE_LIMIT", "2,5"),
+            "movies": _rate_limit("TMDB_RATE_LIMIT", "20,40"),
+            "anime": _rate_limit("JIKAN_RATE_LIMIT", "1,3"),
+            "quote": _rate_limit("ZENQUOTES_RATE_LIMIT", "0.16,5"),
+        },
+        SKILL_RATE_LIMIT_MAX_WAIT=float(os.getenv("SKILL_RATE_LIMIT_MAX_WAIT", "1.0")),
+        LLM_STREAM_WORKERS=int(os.getenv("LLM_STREAM_WORKERS", "16")),
+        LLM_STREAM_QUEUE_SIZE=int(os.getenv("LLM_STREAM_QUEUE_SIZE", "32")),
+        PROMPT_TOKEN_BUDGET=int(os.getenv("PROMPT_TOKEN_BUDGET", "4000")),
+        # Past PROMPT_SUMMARY_TOKENS, all but the newest turns are folded into a summary
+        PROMPT_SUMMARY_ENABLED=os.getenv("PROMPT_SUMMARY_ENABLED", "true").lower() in ("1", "true", "yes"),
+        PROMPT_SUMMARY_TOKENS=int(os.getenv("PROMPT_SUMMARY_TOKENS", "1500")),
+        PROMPT_SUMMARY_KEEP_TURNS=int(os.getenv("PROMPT_SUMMARY_KEEP_TURNS", "6")),
+        PROMPT_SUMMARY_WORDS=int(os.getenv("PROMPT_SUMMARY_WORDS", "150")),
+        GEMINI_MODEL_CACHE_SIZE=int(os.getenv("GEMINI_MODEL_CACHE_SIZE", "256")),
+        GEMINI_CLIENT_CACHE_SIZE=int(os.getenv("GEMINI_CLIENT_CACHE_SIZE", "64")),
+        GEMINI_API_ENDPOINT=os.getenv("GEMINI_API_ENDPOINT", ""),
+        GEMINI_TRANSPORT=os.getenv("GEMINI_TRANSPORT", ""),
+        AUDIO_SAMPLE_RATE=int(os.getenv("AUDIO_SAMPLE_RATE", "16000")),
+        AUDIO_FRAME_MS=int(os.getenv("AUDIO_FRAME_MS", "50")),
+        AUDIO_INGEST_BUFFER_MS=int(os.getenv("AUDIO_INGEST_BUFFER_MS", "2000")),
+        AUDIO_INGEST_POLICY=os.getenv("AUDIO_INGEST_POLICY", "drop_oldest"),
+        VAD_ENABLED=os.getenv("VAD_ENABLED", "true").lower() in ("1", "true", "yes"),
+        VAD_THRESHOLD_DB=float(os.getenv("VAD_THRESHOLD_DB", "-50")),
+        # Must stay above the STT max_turn_silence (2400 ms) so turns still end on silence
+        VAD_HANGOVER_MS=int(os.getenv("VAD_HANGOVER_MS", "3000")),
+        VAD_PREROLL_MS=int(os.getenv("VAD_PREROLL_MS", "300")),
+        VAD_KEEPALIVE_MS=int(os.getenv("VAD_KEEPALIVE_MS", "1000")),
+        UPLOAD_MAX_BYTES=int(os.getenv("UPLOAD_MAX_BYTES", str(25 * 1024 * 1024))),
+        UPLOAD_CHUNK_BYTES=int(os.getenv("UPLOAD_CHUNK_BYTES", str(256 * 1024))),
+        TRANSCRIBE_WORKERS=int(os.getenv("TRANSCRIBE_WORKERS", "2")),
+        TRANSCRIBE_QUEUE_MAX=int(os.getenv("TRANSCRIBE_QUEUE_MAX", "32")),
+        TRANSCRIBE_JOBS_KEPT=int(os.getenv("TRANSCRIBE_JOBS_KEPT", "256")),
+        # AssemblyAI streaming expects roughly real-time audio; 0 sends as fast as possible
+        TRANSCRIBE_REALTIME_FACTOR=float(os.getenv("TRANSCRIBE_REALTIME_FACTOR", "1.0")),
+        SESSION_MAX=int(os.getenv("SESSION_MAX", "10000")),
+        SESSION_IDLE_TTL=float(os.getenv("SESSION_IDLE_TTL", "1800")),
+        # "memory" keeps sessions per process; "sqlite" shares them between workers
+        SESSION_STORE=os.getenv("SESSION_STORE", "memory"),
+        SESSION_DB_PATH=os.getenv("SESSION_DB_PATH", ""),
+        SESSION_FLUSH_MS=int(os.getenv("SESSION_FLUSH_MS", "50")),
+        BARGE_IN_ENABLED=os.getenv("BARGE_IN_ENABLED", "true").lower() in ("1", "true", "yes"),
+        BARGE_IN_MIN_WORDS=int(os.getenv("BARGE_IN_MIN_WORDS", "1")),
+        # Reply length assumed for "tokens saved" until a reply of this worker has completed
+        BARGE_IN_EXPECTED_REPLY_TOKENS=int(os.getenv("BARGE_IN_EXPECTED_REPLY_TOKENS", "150")),
+        # A transcript this soon after the previous reply started restarts it as one reply to both
+        TURN_COALESCE_MS=int(os.getenv("TURN_COALESCE_MS", "200")),
+        TURN_DEDUP_WINDOW=float(os.getenv("TURN_DEDUP_WINDOW", "10")),
+        SPECULATION_ENABLED=os.getenv("SPECULATION_ENABLED", "true").lower() in ("1", "true", "yes"),
+        SPECULATION_STABLE_PARTIALS=int(os.getenv("SPECULATION_STABLE_PARTIALS", "2")),
+        SPECULATION_STABLE_MS=int(os.getenv("SPECULATION_STABLE_MS", "0")),
         PERSONAS=personas
     )
@@ -4,6 +4,8 @@ ROOT_DIR = Path(__file__).resolve().parents[2]
 TEMPLATES_DIR = ROOT_DIR / "templates"
 STATIC_DIR = ROOT_DIR / "static"
 UPLOADS_DIR = ROOT_DIR / "uploads"
+TTS_CACHE_DIR = ROOT_DIR / "cache" / "tts"
+SESSION_DB_PATH = ROOT_DIR / "cache" / "sessions.db"
 
 FALLBACK_TEXT = "I'm having trouble connecting right now."
 FALLBACK_AUDIO_PATH = STATIC_DIR / "fallback.mp3"
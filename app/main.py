@@ -1,29 +1,32 @@
 import os
 import time
 import json
-import logging
-import threading
-import queue
 import asyncio
 import websockets
 from pathlib import Path
+from contextlib import asynccontextmanager
 
-from fastapi import FastAPI, WebSocket, WebSocketDisconnect, Query
+from fastapi import FastAPI, WebSocket, WebSocketDisconnect, Query, Depends
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import HTMLResponse
+from fastapi.responses import HTMLResponse, PlainTextResponse
 from dotenv import load_dotenv
 load_dotenv()
 
 # Import refactored services
-from app.services.llm_service import LLMService
-from app.services.tts_service import TTSService
-from app.services.skills_service import SkillsService
-from app.services.intent_service import IntentService
+from app.services.registry import ServiceRegistry, get_services
+from app.services.segmenter import SentenceSegmenter
+from app.services.audio_ingest import AudioIngest, stream_sink
+from app.services.audio_channel import BinaryAudioChannel
+from app.services.vad import VoiceActivityGate
+from app.services.metrics import TurnTimeline
+from app.services.prompt_builder import MODEL, USER, estimate_tokens
+from app.services.turns import RecentTranscripts, TurnController
+from app.services.speculation import Speculator
 from app.core.config import get_config
 from app.core.logger import get_logger
 from app.core.constants import STATIC_DIR, TEMPLATES_DIR
-from app.routes import agent, core, files
+from app.routes import agent, core, files, transcriptions
 
 # Import AssemblyAI streaming
 from assemblyai.streaming.v3 import (
@@ -35,7 +38,17 @@ from assemblyai.streaming.v3 import (
 config = get_config()
 log = get_logger("lumeai")
 
-app = FastAPI(title="LumeAI")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    services = ServiceRegistry(config)
+    await services.startup()
+    app.state.services = services
+    try:
+        yield
+    finally:
+        await services.shutdown()
+
+app = FastAPI(title="LumeAI", lifespan=lifespan)
 app.add_middleware(
     CORSMiddleware, 
     allow_origins=["*"], 
@@ -51,11 +64,7 @@ if STATIC_DIR.exists():
 app.include_router(core.router)
 app.include_router(agent.router, prefix="/api")
 app.include_router(files.router, prefix="/api")
-
-# Global session storage
-CHAT_HISTORY: dict[str, list[dict[str, str]]] = {}
-SESSION_PERSONA: dict[str, str] = {}
-SESSION_API_KEYS: dict[str, dict[str, str]] = {}
+app.include_router(transcriptions.router, prefix="/api")
 
 @app.get("/health")
 async def health_check():
@@ -68,48 +77,10 @@ async def health_check():
         }
     }
 
-# Queue-based audio streamer (kept as-is, working well)
-class QueueAudioStreamer:
-    def __init__(self, client: StreamingClient, max_queue_bytes: int = 10 * 1024 * 1024):
-        self.client = client
-        self.q: "queue.Queue[bytes | None]" = queue.Queue()
-        self.stop_evt = threading.Event()
-        self.thread: threading.Thread | None = None
-        self._budget = max_queue_bytes
-        self._inflight = 0
-
-    def _gen(self):
-        while not self.stop_evt.is_set():
-            chunk = self.q.get()
-            if chunk is None:
-                break
-            self._inflight -= len(chunk)
-            yield chunk
-
-    def start(self):
-        def _run():
-            try:
-                self.client.stream(self._gen())
-            except Exception as e:
-                logging.exception("client.stream failed: %s", e)
-        self.thread = threading.Thread(target=_run, daemon=True)
-        self.thread.start()
-
-    def send(self, chunk: bytes):
-        sz = len(chunk)
-        if self._inflight + sz > self._budget:
-            return
-        self._inflight += sz
-        self.q.put(chunk)
-
-    def stop(self):
-        self.stop_evt.set()
-        try:
-            self.q.put(None)
-        except Exception:
-            pass
-        if self.thread and self.thread.is_alive():
-            self.thread.join(timeout=2)
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics_endpoint(services: ServiceRegistry = Depends(get_services)):
+    """Prometheus scrape endpoint: turn stage latencies, upstream calls and errors, queue depths"""
+    return PlainTextResponse(services.metrics.render(), media_type="text/plain; version=0.0.4")
 
 def get_api_key(user_keys: dict, key_name: str, fallback_env: str = None) -> str:
     """Get API key from user input or environment variables"""
@@ -126,36 +97,76 @@ def get_api_key(user_keys: dict, key_name: str, fallback_env: str = None) -> str
     
     return ""
 
-async def process_transcript_with_skills(session_id: str, text: str, ws_callback=None, api_keys=None):
+def session_skills(services: ServiceRegistry, api_keys=None):
+    """The shared skills service with the session's API keys overlaid"""
+    if not api_keys:
+        return services.skills
+    return services.skills.with_keys(
+        weather_key=get_api_key(api_keys, 'weather_key', 'WEATHER_API_KEY'),
+        news_key=get_api_key(api_keys, 'news_key', 'NEWS_API_KEY'),
+        tmdb_key=get_api_key(api_keys, 'tmdb_key', 'TMDB_API_KEY'),
+    )
+
+async def process_transcript_with_skills(
+    services: ServiceRegistry, session_id: str, text: str, ws_callback=None, api_keys=None,
+    timeline: TurnTimeline = None, speculation: Speculator = None, turns: TurnController = None,
+):
     """Process user transcript using skills and LLM"""
+    timeline = timeline or TurnTimeline(services.metrics)
+    path, outcome = "llm", "ok"
+    session, gemini_key = None, None
+    client_callback = ws_callback
+    collected_chunks = []
+    audio_context = None
+
+    async def timed_callback(payload: dict):
+        # Murf audio reaches the client through here; stamp first and last chunk
+        nonlocal audio_context
+        kind = payload.get("type")
+        is_audio = kind == "audio_chunk"
+        if kind == "audio_start":
+            audio_context = payload.get("context_id")
+        elif is_audio:
+            timeline.mark("tts_first_chunk")
+        await client_callback(payload)
+        if is_audio:
+            timeline.mark("audio_last_sent", repeat=True)
+
+    if ws_callback:
+        ws_callback = timed_callback
+
     try:
-        # Initialize services with proper API keys
-        llm_service = LLMService()
-        tts_service = TTSService()
-        skills_service = SkillsService()
-        intent_service = IntentService()
+        llm_service = services.llm
+        tts_service = services.tts
+        intent_service = services.intents
         
-        # Update skills service with API keys from user or environment
-        if api_keys:
-            skills_service.weather_api_key = get_api_key(api_keys, 'weather_key', 'WEATHER_API_KEY')
-            skills_service.news_api_key = get_api_key(api_keys, 'news_key', 'NEWS_API_KEY')
-            skills_service.tmdb_api_key = get_api_key(api_keys, 'tmdb_key', 'TMDB_API_KEY')
+        # Overlay the session's API keys on the shared skills service
+        skills_service = session_skills(services, api_keys)
 
         # Add user message to chat history
-        history = CHAT_HISTORY.setdefault(session_id, [])
-        history.append({"role": "user", "content": text})
+        session = await services.sessions.get_or_create(session_id)
+        history = session.history
+        history.append(USER, text)
 
         # Get persona for this session
-        persona_prompt = SESSION_PERSONA.get(session_id, config.PERSONAS["default"])
+        persona_prompt = session.persona
+
+        # Get Gemini API key from user or fallback to environment
+        gemini_key = get_api_key(api_keys, 'gemini_key', 'GEMINI_API_KEY') if api_keys else config.GEMINI_API_KEY
 
         # Try skills first
         intent_data = intent_service.detect_intent(text)
+        timeline.mark("intent_detected")
+        # A lookup already started on the partial transcripts, if it guessed this intent
+        prefetched = speculation.take(intent_data) if speculation else None
         if intent_data and intent_data.get("intent"):
             log.info(f"Detected intent: {intent_data}")
-            skill_response = await skills_service.execute_skill(intent_data)
+            path = "skill"
+            skill_response = await (prefetched or skills_service.execute_skill(intent_data))
+            timeline.mark("skill_fetched")
             
             # Save skill response to history
-            history.append({"role": "assistant", "content": skill_response})
+            history.append(MODEL, skill_response)
             
             # Send complete text to client FIRST
             if ws_callback:
@@ -171,51 +182,95 @@ async def process_transcript_with_skills(session_id: str, text: str, ws_callback
         # Fallback to LLM if no skill matched
         log.info("No skill matched, using LLM...")
         
-        # Build conversation with persona context
-        conversation_prompt = f"System: {persona_prompt}\n\n"
-        for turn in history:
-            speaker = "Human" if turn["role"] == "user" else "Assistant"
-            conversation_prompt += f"{speaker}: {turn['content']}\n"
-        conversation_prompt += "\nAssistant: "
+        # Summary of older turns plus the recent ones; the persona goes in as the system instruction
+        contents = history.contents()
+        services.metrics.prompt_tokens.observe(history.prompt_tokens)
 
-        # Get Gemini API key from user or fallback to environment
-        gemini_key = get_api_key(api_keys, 'gemini_key', 'GEMINI_API_KEY') if api_keys else config.GEMINI_API_KEY
         if not gemini_key:
             raise ValueError("No Gemini API key available")
 
-        # Stream LLM response
-        collected_text = ""
-        async for chunk in llm_service.stream_response(conversation_prompt, api_key=gemini_key):
-            if chunk:
-                collected_text += chunk
-                # Send individual chunks for real-time display
+        # Stream LLM response, handing complete sentences to TTS while the
+        # rest of the reply is still being generated
+        segmenter = SentenceSegmenter()
+
+        async def reply_segments():
+            async for chunk in llm_service.stream_response(
+                contents, api_key=gemini_key, system_instruction=persona_prompt
+            ):
+                if chunk:
+                    timeline.mark("llm_first_chunk")
+                    collected_chunks.append(chunk)
+                    # Send individual chunks for real-time display
+                    if ws_callback:
+                        await ws_callback({"type": "llm_chunk", "text": chunk})
+                    for segment in segmenter.feed(chunk):
+                        yield segment
+
+            timeline.mark("llm_last_chunk")
+
+            # Send complete response
+            collected_text = "".join(collected_chunks)
+            if collected_text:
+                services.metrics.reply_tokens.observe(estimate_tokens(collected_text))
+                history.append(MODEL, collected_text)
                 if ws_callback:
-                    await ws_callback({"type": "llm_chunk", "text": chunk})
+                    await ws_callback({"type": "llm_response", "text": collected_text, "source": "llm"})
 
-        # Send complete response
-        if collected_text:
-            history.append({"role": "assistant", "content": collected_text})
-            if ws_callback:
-                await ws_callback({"type": "llm_response", "text": collected_text, "source": "llm"})
+            tail = segmenter.flush()
+            if tail:
+                yield tail
 
-        # Generate audio
+        # Generate audio alongside generation
         murf_key = get_api_key(api_keys, 'murf_key', 'MURF_API_KEY') if api_keys else ""
-        if murf_key and collected_text:
-            await tts_service.stream_tts(collected_text, ws_callback, murf_key)
-
+        if murf_key:
+            await tts_service.stream_tts_segments(reply_segments(), ws_callback, murf_key)
+        else:
+            async for _ in reply_segments():
+                pass
+
+    except asyncio.CancelledError:
+        if turns is not None and turns.restarting:
+            # Coalesce restart: the same turn is answered again right away, so
+            # nothing was saved; only audio already sent needs dropping
+            outcome = "restarted"
+            if client_callback and audio_context:
+                await client_callback({"type": "playback_flush", "context_id": audio_context})
+            raise
+        # Barge-in: Gemini and Murf were stopped on the way out; drop what
+        # the client still has queued for playback
+        outcome = "cancelled"
+        if path == "llm":
+            services.metrics.cancelled_reply(
+                estimate_tokens("".join(collected_chunks)), "llm_last_chunk" in timeline.marks,
+                config.BARGE_IN_EXPECTED_REPLY_TOKENS,
+            )
+        if client_callback:
+            await client_callback({"type": "playback_flush", "context_id": audio_context})
+        raise
     except Exception as e:
+        outcome = "error"
         log.exception(f"Processing error: {e}")
         error_message = f"Sorry, there was an issue: {str(e)}"
         if ws_callback:
-            await ws_callback({"type": "error", "message": error_message})
+            # The context lets the binary audio channel drop this reply's turn
+            await ws_callback({"type": "error", "message": error_message, "context_id": audio_context})
         # Add error to history
-        history = CHAT_HISTORY.setdefault(session_id, [])
-        history.append({"role": "assistant", "content": error_message})
+        session = await services.sessions.get(session_id)
+        if session is not None:
+            session.history.append(MODEL, error_message)
+    finally:
+        if session is not None and outcome == "ok":
+            # Fold older turns into the summary in the background, ahead of the next turn
+            services.summarizer.maybe_compact(session.history, gemini_key)
+        timeline.finish(path, outcome)
+        log.debug(f"Turn timeline ({path}, {outcome}): {timeline.offsets()}")
 
 @app.websocket("/ws/stream")
 async def ws_stream(websocket: WebSocket):
     await websocket.accept()
-    session_id = websocket.query_params.get("session", f"anon-{int(time.time())}")
+    services = get_services(websocket)
+    anonymous = not websocket.query_params.get("session")
+    session_id = websocket.query_params.get("session") or f"anon-{int(time.time())}"
     persona_key = (websocket.query_params.get("persona") or "default").lower().strip()
     
     # Extract user API keys from query parameters
@@ -228,9 +283,6 @@ async def ws_stream(websocket: WebSocket):
         'tmdb_key': websocket.query_params.get("tmdb_key", "").strip(),
     }
     
-    # Store API keys for this session
-    SESSION_API_KEYS[session_id] = user_api_keys
-    
     # Use user's AssemblyAI key or fallback to environment
     assembly_key = get_api_key(user_api_keys, 'assembly_key', 'ASSEMBLYAI_API_KEY')
     
@@ -239,7 +291,10 @@ async def ws_stream(websocket: WebSocket):
         log.warning(f"Unknown persona '{persona_key}', using default")
         persona_key = "default"
     
-    SESSION_PERSONA[session_id] = config.PERSONAS[persona_key]
+    # Store persona and API keys for this session
+    session = await services.sessions.get_or_create(session_id)
+    session.persona = config.PERSONAS[persona_key]
+    session.api_keys = user_api_keys
     
     if not assembly_key:
         await websocket.send_text(json.dumps({
@@ -260,21 +315,56 @@ async def ws_stream(websocket: WebSocket):
         return
 
     loop = asyncio.get_running_loop()
+
+    # Clients that ask for it get TTS audio as binary frames instead of base64 JSON
+    audio_channel = BinaryAudioChannel() if websocket.query_params.get("audio") == "binary" else None
     
     async def ws_send(payload: dict):
         try:
             if websocket.client_state.name != "DISCONNECTED":
-                await websocket.send_text(json.dumps(payload))
+                frame = audio_channel.encode(payload) if audio_channel else None
+                if frame is not None:
+                    await websocket.send_bytes(frame)
+                else:
+                    await websocket.send_text(json.dumps(payload))
         except Exception as e:
             log.warning(f"Failed to send WebSocket message: {e}")
 
     def sync_ws_send(payload: dict):
         asyncio.run_coroutine_threadsafe(ws_send(payload), loop)
 
-    seen_texts = set()
+    async def respond(text: str, timeline: TurnTimeline):
+        history = (await services.sessions.get_or_create(session_id)).history
+        mark = history.turns
+        try:
+            await process_transcript_with_skills(
+                services, session_id, text, ws_send, user_api_keys, timeline, speculator, turns
+            )
+        except asyncio.CancelledError:
+            if turns.restarting:
+                # Restarted with the next transcript merged in; that reply records the turn
+                history.retract(mark)
+            raise
+
+    # Replies run one at a time in turn order; duplicate finals are dropped
+    turns = TurnController(respond, services.metrics)
+    session.turns = turns
+
+    # Skill lookups and the Murf socket are started on partial transcripts
+    speculator = None
+    if config.SPECULATION_ENABLED and config.AUTO_ASSISTANT_REPLY:
+        murf_key = get_api_key(user_api_keys, 'murf_key', 'MURF_API_KEY')
+        speculator = Speculator(
+            services.intents, session_skills(services, user_api_keys), services.metrics,
+            warm_tts=(lambda: services.tts_connections.warm(murf_key, services.tts.voice_config)) if murf_key else None,
+        )
+    session.speculation = speculator
+    recent_transcripts = RecentTranscripts()
+    # Arrival of the first audio chunk of the turn in progress, for the turn timeline
+    turn_audio = {"received": None}
     
     try:
-        client = StreamingClient(StreamingClientOptions(api_key=assembly_key))
+        client = StreamingClient(StreamingClientOptions(api_key=assembly_key, api_host=config.ASSEMBLYAI_API_HOST))
     except Exception as e:
         log.error(f"Failed to create AssemblyAI client: {e}")
         await ws_send({"type": "error", "message": "Invalid AssemblyAI API key"})
@@ -286,22 +376,40 @@ async def ws_stream(websocket: WebSocket):
         sync_ws_send({"type": "info", "message": f"Connected with {persona_key} persona"})
 
     def on_turn(client, event):
-        if not event.end_of_turn or not getattr(event, "turn_is_formatted", False):
+        if not event.end_of_turn:
+            # Words of the next turn while a reply is in flight: the user is talking over it
+            if (
+                config.BARGE_IN_ENABLED and turns.active
+                and len(event.transcript.split()) >= config.BARGE_IN_MIN_WORDS
+            ):
+                asyncio.run_coroutine_threadsafe(turns.barge_in(event.turn_order, reason="speech"), loop)
+            if speculator and event.transcript.strip():
+                loop.call_soon_threadsafe(speculator.on_partial, event.transcript, event.turn_order)
+            return
+        if not getattr(event, "turn_is_formatted", False):
+            # Final words, not yet formatted: nothing left to wait for before speculating
+            if speculator and event.transcript.strip():
+                loop.call_soon_threadsafe(speculator.on_partial, event.transcript, event.turn_order, True)
             return
         
         text = event.transcript.strip()
-        if not text or text in seen_texts:
+        if not text:
+            return
+        if recent_transcripts.seen(text, event.turn_order):
+            services.metrics.transcripts_deduplicated.inc()
             return
-        seen_texts.add(text)
+
+        timeline = TurnTimeline(services.metrics, turn_audio["received"])
+        turn_audio["received"] = None
 
         log.info(f"Transcript: {text}")
         sync_ws_send({"type": "transcript", "text": text, "end_of_turn": True})
 
         if config.AUTO_ASSISTANT_REPLY:
             try:
-                asyncio.run_coroutine_threadsafe(
-                    process_transcript_with_skills(session_id, text, ws_send, user_api_keys), loop
-                )
+                if speculator:
+                    loop.call_soon_threadsafe(speculator.end_turn, event.turn_order)
+                loop.call_soon_threadsafe(turns.submit, text, event.turn_order, timeline)
             except Exception as e:
                 log.error(f"Error processing transcript: {e}")
 
@@ -309,6 +417,7 @@ async def ws_stream(websocket: WebSocket):
         sync_ws_send({"type": "info", "message": "Session terminated"})
 
     def on_error(client, error):
+        services.metrics.upstream_errors.inc(provider="assemblyai")
         log.error(f"AssemblyAI error: {error}")
         sync_ws_send({"type": "error", "message": f"Speech recognition error: {str(error)}"})
 
@@ -320,39 +429,43 @@ async def ws_stream(websocket: WebSocket):
     # Connect to AssemblyAI
     try:
         params = StreamingParameters(
-            sample_rate=16000,
+            sample_rate=config.AUDIO_SAMPLE_RATE,
             format_turns=True,
             end_of_turn_confidence_threshold=0.75,
             min_end_of_turn_silence_when_confident=160,
             max_turn_silence=2400,
         )
-        client.connect(params)
+        # The SDK handshake blocks; keep it off the event loop
+        connect_started = time.monotonic()
+        await asyncio.to_thread(client.connect, params)
+        services.metrics.upstream("assemblyai", time.monotonic() - connect_started)
         log.info(f"Connected to AssemblyAI with persona: {persona_key}")
         await ws_send({"type": "info", "message": "Ready to process audio"})
     except Exception as e:
+        services.metrics.upstream("assemblyai", error=True)
         log.error(f"AAI connection failed: {e}")
         await ws_send({"type": "error", "message": f"Speech recognition connection failed: {str(e)}"})
         await websocket.close(code=4003, reason="AssemblyAI connection failed")
         return
 
-    # Audio forwarding setup
-    send_fn = getattr(client, "send_audio", None) or getattr(client, "send_bytes", None)
-    streamer: QueueAudioStreamer | None = None
-    if not callable(send_fn):
-        streamer = QueueAudioStreamer(client)
-        streamer.start()
+    # Audio forwarding setup: browser chunks are coalesced into fixed frames,
+    # silence is gated out, and the rest is sent upstream from one forwarding
+    # thread, whichever API the SDK has
+    ingest = AudioIngest()
+    ingest.forward(stream_sink(client), VoiceActivityGate() if config.VAD_ENABLED else None)
+    session.audio = ingest
 
     # WebSocket message loop
+    session.connections += 1
     try:
         while True:
             msg = await websocket.receive()
 
             if "bytes" in msg and msg["bytes"]:
+                if turn_audio["received"] is None:
+                    turn_audio["received"] = time.monotonic()
                 try:
-                    if streamer:
-                        streamer.send(msg["bytes"])
-                    else:
-                        send_fn(msg["bytes"])
+                    await ingest.push(msg["bytes"])
                 except Exception as e:
                     log.warning(f"Audio send error: {e}")
                     break
@@ -360,11 +473,8 @@ async def ws_stream(websocket: WebSocket):
             elif "text" in msg and msg["text"]:
                 text = msg["text"]
                 if text == "__stop":
+                    # Buffered audio is flushed and the STT session terminated below
                     log.info("Received stop signal")
-                    try:
-                        client.disconnect(terminate=True)
-                    except Exception:
-                        pass
                     break
                 else:
                     await ws_send({"type": "echo", "text": text})
@@ -377,54 +487,97 @@ async def ws_stream(websocket: WebSocket):
     except Exception as e:
         log.error(f"WebSocket error: {e}")
     finally:
-        if streamer:
-            streamer.stop()
+        # Nobody is listening any more; stop generating for this connection
+        await turns.aclose()
+        if speculator:
+            await speculator.aclose()
+            log.info(f"Speculation for {session_id}: {speculator.stats()}")
+        await asyncio.to_thread(ingest.close)
+        log.info(f"Audio ingest for {session_id}: {ingest.stats()}")
         try:
-            client.disconnect(terminate=True)
+            # Waits up to the SDK's terminate timeout for the final Termination event
+            await asyncio.to_thread(client.disconnect, terminate=True)
         except Exception:
             pass
-        # Clean up session data
-        if session_id in SESSION_API_KEYS:
-            del SESSION_API_KEYS[session_id]
+        # Clean up session data; anonymous ids are never reused
+        session.connections -= 1
+        if not session.connections:
+            session.api_keys = {}
+            if anonymous:
+                services.sessions.discard(session_id)
         log.info(f"Cleaned up session: {session_id}")
 
 # Debug endpoints
 @app.get("/debug/personas/{session_id}")
-async def debug_persona(session_id: str):
+async def debug_persona(session_id: str, services: ServiceRegistry = Depends(get_services)):
+    session = await services.sessions.get(session_id)
     return {
         "session_id": session_id,
-        "current_persona": SESSION_PERSONA.get(session_id, "None set"),
+        "current_persona": session.persona if session else "None set",
         "available_personas": list(config.PERSONAS.keys()),
-        "chat_history_length": len(CHAT_HISTORY.get(session_id, [])),
-        "has_api_keys": bool(SESSION_API_KEYS.get(session_id))
+        "chat_history_length": len(session.history) if session else 0,
+        "prompt_window": session.history.stats() if session else None,
+        "approx_bytes": session.approx_bytes() if session else 0,
+        "audio": session.audio.stats() if session and session.audio else None,
+        "turns": session.turns.stats() if session and session.turns else None,
+        "speculation": session.speculation.stats() if session and session.speculation else None,
+        "has_api_keys": bool(session and session.api_keys)
     }
 
+@app.get("/debug/llm-clients")
+async def debug_llm_clients(services: ServiceRegistry = Depends(get_services)):
+    """Cached Gemini models and per-key clients"""
+    return services.llm_models.stats()
+
+@app.get("/debug/sessions")
+async def debug_sessions(services: ServiceRegistry = Depends(get_services)):
+    """Live session counts, evictions and approximate memory"""
+    return await services.sessions.stats()
+
+@app.get("/debug/tts-cache")
+async def debug_tts_cache(services: ServiceRegistry = Depends(get_services)):
+    """TTS audio cache hit rate, bytes saved and disk usage"""
+    return services.tts_cache.stats() if services.tts_cache else {"enabled": False}
+
+@app.get("/debug/transcriptions")
+async def debug_transcriptions(services: ServiceRegistry = Depends(get_services)):
+    """Batch transcription worker pool and queue"""
+    return services.transcriptions.stats()
+
+@app.get("/debug/skills-cache")
+async def debug_skills_cache(services: ServiceRegistry = Depends(get_services)):
+    """Skill result cache counters for sizing"""
+    return services.skill_cache.stats()
+
+@app.get("/debug/rate-limits")
+async def debug_rate_limits(services: ServiceRegistry = Depends(get_services)):
+    """Per-provider skill rate limits: current (learned) rate, queue wait and 429s"""
+    return services.rate_limits.stats()
+
 @app.post("/reset/{session_id}")
-async def reset_session(session_id: str):
+async def reset_session(session_id: str, services: ServiceRegistry = Depends(get_services)):
     """Reset chat history and API keys for a session"""
-    if session_id in CHAT_HISTORY:
-        del CHAT_HISTORY[session_id]
-    if session_id in SESSION_PERSONA:
-        del SESSION_PERSONA[session_id]
-    if session_id in SESSION_API_KEYS:
-        del SESSION_API_KEYS[session_id]
+    session = await services.sessions.get(session_id)
+    if session is not None and session.connections:
+        # Keep the live connection's persona and keys, forget the conversation
+        session.history.clear()
+    else:
+        services.sessions.discard(session_id)
+    await services.sessions.flush()
     return {"message": f"Session {session_id} reset successfully"}
 
 # Skill API endpoints
 @app.get("/api/weather")
-async def weather(city: str = Query(..., description="City name")):
-    skills_service = SkillsService()
-    return await skills_service.get_weather(city)
+async def weather(city: str = Query(..., description="City name"), services: ServiceRegistry = Depends(get_services)):
+    return await services.skills.get_weather(city)
 
 @app.get("/api/news")
-async def news(query: str = Query(..., description="News search query")):
-    skills_service = SkillsService()
-    return await skills_service.get_news(query)
+async def news(query: str = Query(..., description="News search query"), services: ServiceRegistry = Depends(get_services)):
+    return await services.skills.get_news(query)
 
 @app.get("/api/movies")
-async def movies(query: str = Query(..., description="Movie search query")):
-    skills_service = SkillsService()
-    return await skills_service.search_movies(query)
+async def movies(query: str = Query(..., description="Movie search query"), services: ServiceRegistry = Depends(get_services)):
+    return await services.skills.search_movies(query)
 
 if __name__ == "__main__":
     import uvicorn
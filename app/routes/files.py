@@ -1,8 +1,10 @@
 import os
-from fastapi import APIRouter, UploadFile, File
+from fastapi import APIRouter, Request
 from fastapi.responses import JSONResponse
+from app.core.config import get_config
 from app.core.constants import UPLOADS_DIR
 from app.core.logger import get_logger
+from app.services.uploads import UploadError, store_audio_upload
 
 router = APIRouter()
 log = get_logger("lumeai.routes.files")
@@ -10,17 +12,50 @@ log = get_logger("lumeai.routes.files")
 # Ensure uploads directory exists
 os.makedirs(UPLOADS_DIR, exist_ok=True)
 
-@router.post("/upload-audio")
-async def upload_audio(file: UploadFile = File(...)):
-    """Upload audio file for processing"""
-    file_location = UPLOADS_DIR / file.filename
-    with open(file_location, "wb") as f:
-        f.write(await file.read())
-    
-    log.info("Saved upload: %s", file_location)
+# The body is streamed by hand, so describe the form for the API docs
+UPLOAD_REQUEST_BODY = {
+    "required": True,
+    "content": {
+        "multipart/form-data": {
+            "schema": {
+                "type": "object",
+                "required": ["file"],
+                "properties": {"file": {"type": "string", "format": "binary"}},
+            }
+        }
+    },
+}
+
+@router.post("/upload-audio", openapi_extra={"requestBody": UPLOAD_REQUEST_BODY})
+async def upload_audio(request: Request):
+    """Upload audio file for processing.
+
+    The `file` field is streamed to disk (never held in memory), capped at
+    UPLOAD_MAX_BYTES and stored under its SHA-256; identical re-uploads
+    reuse the existing file.
+    """
+    config = get_config()
+    length = request.headers.get("content-length", "")
+    try:
+        stored = await store_audio_upload(
+            request.stream(),
+            request.headers.get("content-type", ""),
+            UPLOADS_DIR,
+            max_bytes=config.UPLOAD_MAX_BYTES,
+            chunk_bytes=config.UPLOAD_CHUNK_BYTES,
+            content_length=int(length) if length.isdigit() else None,
+        )
+    except UploadError as e:
+        log.warning("Rejected upload: %s", e)
+        return JSONResponse(status_code=e.status_code, content={"error": str(e)})
+
+    log.info("%s upload: %s (%d bytes)", "Deduplicated" if stored.deduplicated else "Saved", stored.path, stored.size)
     return JSONResponse(content={
-        "filename": file.filename,
-        "content_type": file.content_type,
-        "size": file_location.stat().st_size,
-        "path": str(file_location)
+        "filename": stored.filename,
+        "original_filename": stored.original_filename,
+        "content_type": stored.content_type,
+        "size": stored.size,
+        "sha256": stored.sha256,
+        "deduplicated": stored.deduplicated,
+        "path": str(stored.path)
     })
@@ -0,0 +1,48 @@
+from fastapi import APIRouter, Depends
+from fastapi.responses import JSONResponse
+from app.core.logger import get_logger
+from app.schemas.transcriptions import TranscriptionRequest
+from app.services.registry import ServiceRegistry, get_services
+from app.services.transcriptions import DONE, FAILED, JobError
+
+router = APIRouter()
+log = get_logger("lumeai.routes.transcriptions")
+
+API_KEY_FIELDS = ("assembly_key", "gemini_key", "weather_key", "news_key", "tmdb_key")
+
+def _error(e: JobError) -> JSONResponse:
+    return JSONResponse(status_code=e.status_code, content={"error": str(e)})
+
+@router.post("/transcriptions", status_code=202)
+async def submit_transcription(req: TranscriptionRequest, services: ServiceRegistry = Depends(get_services)):
+    """Queue an uploaded WAV or raw PCM file for transcription and replies"""
+    try:
+        job = await services.transcriptions.submit(
+            req.filename,
+            persona=req.persona,
+            sample_rate=req.sample_rate,
+            api_keys={name: getattr(req, name).strip() for name in API_KEY_FIELDS},
+        )
+    except JobError as e:
+        log.warning("Rejected transcription job: %s", e)
+        return _error(e)
+    return JSONResponse(status_code=202, content=job.summary())
+
+@router.get("/transcriptions/{job_id}")
+async def transcription_status(job_id: str, services: ServiceRegistry = Depends(get_services)):
+    """Status of a transcription job"""
+    try:
+        return services.transcriptions.get(job_id).summary()
+    except JobError as e:
+        return _error(e)
+
+@router.get("/transcriptions/{job_id}/result")
+async def transcription_result(job_id: str, services: ServiceRegistry = Depends(get_services)):
+    """Transcripts and replies of a finished job; 409 while it is still running"""
+    try:
+        job = services.transcriptions.get(job_id)
+    except JobError as e:
+        return _error(e)
+    if job.status not in (DONE, FAILED):
+        return JSONResponse(status_code=409, content={"error": f"Job is {job.status}", **job.summary()})
+    return job.result()
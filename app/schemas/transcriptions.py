@@ -0,0 +1,11 @@
+from pydantic import BaseModel
+
+class TranscriptionRequest(BaseModel):
+    filename: str  # as returned by /api/upload-audio
+    persona: str = "default"
+    sample_rate: int | None = None  # raw PCM uploads only
+    assembly_key: str = ""
+    gemini_key: str = ""
+    weather_key: str = ""
+    news_key: str = ""
+    tmdb_key: str = ""
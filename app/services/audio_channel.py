@@ -0,0 +1,69 @@
+import base64
+import struct
+from typing import Any, Dict, Optional, Tuple
+
+# Binary TTS audio frame sent to the browser:
+#   version u8 | flags u8 | reserved u16 | turn id u32 | sequence u32 | audio bytes
+# All integers big-endian; flags bit 0 marks the final chunk of the turn.
+AUDIO_FRAME_HEADER = struct.Struct("!BBHII")
+AUDIO_FRAME_VERSION = 1
+FLAG_FINAL = 0x01
+
+def encode_audio_frame(turn_id: int, sequence: int, final: bool, audio: bytes) -> bytes:
+    header = AUDIO_FRAME_HEADER.pack(AUDIO_FRAME_VERSION, FLAG_FINAL if final else 0, 0, turn_id, sequence)
+    return header + audio
+
+def decode_audio_frame(frame: bytes) -> Tuple[int, int, bool, bytes]:
+    """(turn id, sequence, final, audio) from a binary audio frame"""
+    version, flags, _, turn_id, sequence = AUDIO_FRAME_HEADER.unpack_from(frame)
+    if version != AUDIO_FRAME_VERSION:
+        raise ValueError(f"Unsupported audio frame version {version}")
+    return turn_id, sequence, bool(flags & FLAG_FINAL), frame[AUDIO_FRAME_HEADER.size:]
+
+class BinaryAudioChannel:
+    """Per-connection encoder for clients that negotiated `?audio=binary`.
+
+    TTS audio chunks become binary frames, decoded from Murf's base64 once
+    here, and every other message stays JSON. Each utterance's Murf context
+    id is mapped to a small numeric turn id, announced in `audio_start` and
+    `audio_complete` so the client can match frames to turns. The mapping is
+    dropped by whichever message ends the utterance: `audio_complete`,
+    `playback_flush` (cancelled) or an error.
+    """
+
+    def __init__(self):
+        self.frames_sent = 0
+        self.bytes_sent = 0
+        self._next_turn = 1
+        self._turns: Dict[str, int] = {}
+
+    def encode(self, payload: Dict[str, Any]) -> Optional[bytes]:
+        """Binary frame for an audio chunk; None for messages that stay JSON.
+
+        `audio_start`, `audio_complete`, `playback_flush` and errors of an
+        utterance are annotated with the turn id in place.
+        """
+        kind = payload.get("type")
+        context_id = payload.get("context_id")
+        if kind == "audio_chunk":
+            turn_id = self._turns.get(context_id, 0)
+            frame = encode_audio_frame(
+                turn_id,
+                payload.get("chunk_number", 0),
+                payload.get("is_final", False),
+                base64.b64decode(payload["audio"]),
+            )
+            self.frames_sent += 1
+            self.bytes_sent += len(frame)
+            return frame
+        if kind == "audio_start" and context_id:
+            self._turns[context_id] = self._next_turn
+            payload["turn_id"] = self._next_turn
+            payload["audio_format"] = "binary"
+            self._next_turn = self._next_turn % 0xFFFFFFFF + 1
+        elif kind in ("audio_complete", "playback_flush", "audio_error", "error") and context_id:
+            payload["turn_id"] = self._turns.pop(context_id, 0)
+        return None
+
+    def stats(self) -> Dict[str, int]:
+        return {"frames_sent": self.frames_sent, "bytes_sent": self.bytes_sent, "open_turns": len(self._turns)}
@@ -0,0 +1,253 @@
+import asyncio
+import logging
+import threading
+from typing import Any, Callable, Dict, Iterable, Iterator, Optional
+
+from app.core.config import get_config
+from app.services.vad import VoiceActivityGate
+
+log = logging.getLogger("lumeai.audio_ingest")
+
+DROP_OLDEST = "drop_oldest"
+BLOCK = "block"
+
+class AudioIngest:
+    """Preallocated ring buffer between the browser socket and the STT upstream.
+
+    Single producer (the event loop, `push`) and single consumer (the
+    forwarding thread, `frames`). Each side only advances its own absolute
+    byte counter; a lock held just for the copy in and out of the buffer
+    keeps the consumer from reading a frame the producer is overwriting.
+    Incoming chunks of any size are coalesced into fixed-duration PCM frames
+    before they go upstream.
+
+    When the buffer is full the policy decides: `drop_oldest` keeps writing
+    and the consumer skips the overwritten audio; `block` makes `push` wait
+    for room, pushing backpressure onto the browser socket, and drops the new
+    chunk only if no room frees up within `block_timeout`.
+    """
+
+    def __init__(
+        self,
+        sample_rate: Optional[int] = None,
+        frame_ms: Optional[int] = None,
+        buffer_ms: Optional[int] = None,
+        policy: Optional[str] = None,
+        block_timeout: float = 1.0,
+    ):
+        config = get_config()
+        sample_rate = sample_rate or config.AUDIO_SAMPLE_RATE
+        frame_ms = frame_ms or config.AUDIO_FRAME_MS
+        buffer_ms = buffer_ms or config.AUDIO_INGEST_BUFFER_MS
+        self.policy = policy or config.AUDIO_INGEST_POLICY
+        if self.policy not in (DROP_OLDEST, BLOCK):
+            raise ValueError(f"Unknown audio ingest policy: {self.policy}")
+
+        # 16-bit mono PCM
+        self.frame_bytes = sample_rate * 2 * frame_ms // 1000
+        frames = max(2, buffer_ms // frame_ms)
+        self.capacity = self.frame_bytes * frames
+        self.block_timeout = block_timeout
+        self._buf = bytearray(self.capacity)
+
+        # Absolute byte positions: only push() advances _written, only the
+        # consumer advances _read
+        self._written = 0
+        self._read = 0
+        # Held only around buffer copies and the lap check, never across a wait
+        self._lock = threading.Lock()
+        self._closed = False
+        self._data_ready = threading.Event()
+        self._space: Optional[asyncio.Event] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self.gate: Optional[VoiceActivityGate] = None
+
+        # Counters are likewise owned by one side each
+        self.bytes_received = 0
+        self.bytes_rejected = 0  # producer: chunks refused or truncated
+        self.bytes_overwritten = 0  # consumer: audio lapped under drop_oldest
+        self.bytes_forwarded = 0
+        self.frames_forwarded = 0
+        self.overruns = 0
+        self._waiting_for_space = False
+
+    @property
+    def bytes_queued(self) -> int:
+        return min(self._written - self._read, self.capacity)
+
+    @property
+    def buffer_bytes(self) -> int:
+        return len(self._buf)
+
+    @property
+    def bytes_dropped(self) -> int:
+        return self.bytes_rejected + self.bytes_overwritten
+
+    # Producer side (event loop)
+
+    async def push(self, chunk: bytes):
+        """Queue audio from the client, applying the buffer policy"""
+        if self._closed or not chunk:
+            return
+        size = len(chunk)
+        self.bytes_received += size
+        if size > self.capacity:
+            # Only the newest audio can fit
+            self.bytes_rejected += size - self.capacity
+            chunk = chunk[-self.capacity:]
+            size = self.capacity
+
+        if self.policy == BLOCK and self._written + size - self._read > self.capacity:
+            if not await self._wait_for_space(size):
+                self.bytes_rejected += size
+                return
+
+        self._write(chunk)
+        self._data_ready.set()
+
+    def _write(self, chunk: bytes):
+        start = self._written % self.capacity
+        end = start + len(chunk)
+        with self._lock:
+            if end <= self.capacity:
+                self._buf[start:end] = chunk
+            else:
+                split = self.capacity - start
+                self._buf[start:] = chunk[:split]
+                self._buf[:end - self.capacity] = chunk[split:]
+            self._written += len(chunk)
+
+    async def _wait_for_space(self, size: int) -> bool:
+        if self._space is None:
+            self._loop = asyncio.get_running_loop()
+            self._space = asyncio.Event()
+        deadline = self._loop.time() + self.block_timeout
+        self._waiting_for_space = True
+        try:
+            while self._written + size - self._read > self.capacity:
+                remaining = deadline - self._loop.time()
+                if remaining <= 0 or self._closed:
+                    return False
+                self._space.clear()
+                try:
+                    await asyncio.wait_for(self._space.wait(), timeout=remaining)
+                except asyncio.TimeoutError:
+                    return False
+            return True
+        finally:
+            self._waiting_for_space = False
+
+    # Consumer side (forwarding thread)
+
+    def frames(self) -> Iterator[bytes]:
+        """Yield fixed-size frames until closed, then the final partial frame"""
+        frame = self.frame_bytes
+        while True:
+            with self._lock:
+                # No write is half done in here, so what is copied is whole
+                available = self._written - self._read
+                if available > self.capacity:
+                    # Producer lapped us (drop_oldest): skip whole frames of lost audio
+                    lost = available - self.capacity
+                    lost += -lost % frame
+                    self._read += lost
+                    self.bytes_overwritten += lost
+                    self.overruns += 1
+                    continue
+                closed = self._closed
+                if available >= frame:
+                    data = self._copy(self._read, frame)
+                elif closed and available:
+                    data = self._copy(self._read, available)
+                else:
+                    data = b""
+
+            if available >= frame:
+                self._read += frame
+                self._notify_space()
+                yield data
+                continue
+
+            if closed:
+                if data:
+                    self._read += len(data)
+                    yield data
+                return
+
+            self._data_ready.clear()
+            if self._written - self._read < frame and not self._closed:
+                self._data_ready.wait(0.1)
+
+    def _copy(self, position: int, size: int) -> bytes:
+        start = position % self.capacity
+        end = start + size
+        if end <= self.capacity:
+            return bytes(self._buf[start:end])
+        return bytes(self._buf[start:]) + bytes(self._buf[:end - self.capacity])
+
+    def _notify_space(self):
+        if self._waiting_for_space and self._loop is not None:
+            self._loop.call_soon_threadsafe(self._space.set)
+
+    def forward(self, sink: Callable[[Iterable[bytes]], Any], gate: Optional[VoiceActivityGate] = None):
+        """Run `sink(frames)` on a background thread, counting what went upstream.
+
+        With a `gate`, frames pass through voice activity detection first and
+        silence is mostly held back.
+        """
+        self.gate = gate
+
+        def counted() -> Iterator[bytes]:
+            for data in self.frames():
+                for out in gate.process(data) if gate else (data,):
+                    self.bytes_forwarded += len(out)
+                    self.frames_forwarded += 1
+                    yield out
+
+        def run():
+            try:
+                sink(counted())
+            except Exception as e:
+                log.exception(f"Audio forwarding failed: {e}")
+
+        self._thread = threading.Thread(target=run, name="audio-ingest", daemon=True)
+        self._thread.start()
+
+    def close(self, timeout: float = 2.0):
+        """Stop accepting audio, flush what is buffered and stop the forwarder"""
+        self._closed = True
+        self._data_ready.set()
+        if self._space is not None and self._loop is not None and not self._loop.is_closed():
+            self._loop.call_soon_threadsafe(self._space.set)
+        if self._thread and self._thread.is_alive() and self._thread is not threading.current_thread():
+            self._thread.join(timeout=timeout)
+        if self._thread is None or not self._thread.is_alive():
+            # Keep the counters for stats, release the buffer
+            self._buf = bytearray()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "policy": self.policy,
+            "frame_bytes": self.frame_bytes,
+            "capacity_bytes": self.capacity,
+            "bytes_received": self.bytes_received,
+            "bytes_queued": self.bytes_queued,
+            "bytes_forwarded": self.bytes_forwarded,
+            "bytes_dropped": self.bytes_dropped,
+            "bytes_overwritten": self.bytes_overwritten,
+            "bytes_rejected": self.bytes_rejected,
+            "frames_forwarded": self.frames_forwarded,
+            "overruns": self.overruns,
+            "vad": self.gate.stats() if self.gate else None,
+        }
+
+def stream_sink(client) -> Callable[[Iterable[bytes]], Any]:
+    """Upstream writer for an AssemblyAI client, whichever send API it has"""
+    send_fn = getattr(client, "send_audio", None) or getattr(client, "send_bytes", None)
+    if callable(send_fn):
+        def send_all(frames: Iterable[bytes]):
+            for frame in frames:
+                send_fn(frame)
+        return send_all
+    return client.stream
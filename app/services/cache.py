@@ -0,0 +1,181 @@
+import time
+import asyncio
+import logging
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+
+log = logging.getLogger("lumeai.cache")
+
+@dataclass
+class _Entry:
+    value: Any
+    fetched_at: float
+    ttl: float
+    stale_ttl: float
+
+class TTLCache:
+    """Bounded LRU cache with per-entry TTLs and stale-while-revalidate.
+
+    Fresh entries are returned as-is. Entries past their TTL but inside the
+    stale window are returned immediately while one background refresh runs.
+    Anything older is fetched inline; the expired entry stays available to
+    `peek` as a last resort. Results rejected by `cacheable` are returned
+    but never stored.
+
+    Inline fetches are single-flight: a miss for a key that is already being
+    fetched waits for that fetch instead of starting another, so a burst of
+    identical lookups costs one upstream call. The fetch runs in its own
+    task, so a caller that gives up (barge-in) does not cancel it for the
+    others. `scope` identifies what else the result may depend on, such as
+    the API key: a shared result that is not cacheable (an error) is only
+    reused by callers of the same scope, the others fetch for themselves.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 1024,
+        cacheable: Optional[Callable[[Any], bool]] = None,
+        single_flight: bool = True,
+    ):
+        self.max_entries = max_entries
+        self.cacheable = cacheable or (lambda value: value is not None)
+        self.single_flight = single_flight
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.refreshes = 0
+        self.refresh_failures = 0
+        # Per namespace (first element of tuple keys): upstream fetches, and
+        # misses that joined one already in flight
+        self.fetches: Dict[str, int] = {}
+        self.coalesced: Dict[str, int] = {}
+        self.coalesced_refetches = 0
+        self._entries: "OrderedDict[Hashable, _Entry]" = OrderedDict()
+        self._refreshing: Dict[Hashable, asyncio.Task] = {}
+        self._inflight: Dict[Hashable, Tuple[asyncio.Task, Hashable]] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _store(self, key: Hashable, value: Any, ttl: float, stale_ttl: float):
+        if not self.cacheable(value):
+            return
+        self._entries[key] = _Entry(value, time.monotonic(), ttl, stale_ttl)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    async def _refresh(self, key: Hashable, fetch: Callable[[], Awaitable[Any]], ttl: float, stale_ttl: float):
+        try:
+            self.refreshes += 1
+            self._count(self.fetches, key)
+            self._store(key, await fetch(), ttl, stale_ttl)
+        except Exception as e:
+            self.refresh_failures += 1
+            log.warning(f"Background refresh failed for {key}: {e}")
+        finally:
+            self._refreshing.pop(key, None)
+
+    async def get_or_fetch(
+        self,
+        key: Hashable,
+        fetch: Callable[[], Awaitable[Any]],
+        ttl: float,
+        stale_ttl: Optional[float] = None,
+        scope: Hashable = None,
+    ) -> Any:
+        """Return the cached value for key, fetching or refreshing as needed"""
+        stale_ttl = ttl if stale_ttl is None else stale_ttl
+        entry = self._entries.get(key)
+        if entry is not None:
+            age = time.monotonic() - entry.fetched_at
+            if age < entry.ttl:
+                self.hits += 1
+                self._entries.move_to_end(key)
+                return entry.value
+            if age < entry.ttl + entry.stale_ttl:
+                self.stale_hits += 1
+                self._entries.move_to_end(key)
+                if key not in self._refreshing:
+                    self._refreshing[key] = asyncio.create_task(self._refresh(key, fetch, ttl, stale_ttl))
+                return entry.value
+            # Too old to serve, but kept for `peek` until replaced or evicted
+
+        self.misses += 1
+        return await self._fetch_once(key, fetch, ttl, stale_ttl, scope)
+
+    @staticmethod
+    def _namespace(key: Hashable) -> str:
+        return str(key[0]) if isinstance(key, tuple) and key else "default"
+
+    def _count(self, counts: Dict[str, int], key: Hashable):
+        namespace = self._namespace(key)
+        counts[namespace] = counts.get(namespace, 0) + 1
+
+    async def _fetch_and_store(self, key: Hashable, fetch: Callable[[], Awaitable[Any]], ttl: float, stale_ttl: float):
+        value = await fetch()
+        self._store(key, value, ttl, stale_ttl)
+        return value
+
+    async def _fetch_once(
+        self, key: Hashable, fetch: Callable[[], Awaitable[Any]], ttl: float, stale_ttl: float, scope: Hashable,
+        retry: bool = False,
+    ) -> Any:
+        if not self.single_flight:
+            self._count(self.fetches, key)
+            return await self._fetch_and_store(key, fetch, ttl, stale_ttl)
+
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            task, owner = inflight
+            if not retry:
+                self._count(self.coalesced, key)
+            value = await asyncio.shield(task)
+            if owner == scope or self.cacheable(value):
+                return value
+            # The failure may be down to the other caller's credentials; try
+            # again as (or behind) a caller with ours
+            self.coalesced_refetches += 1
+            return await self._fetch_once(key, fetch, ttl, stale_ttl, scope, retry=True)
+
+        self._count(self.fetches, key)
+        task = asyncio.create_task(self._fetch_and_store(key, fetch, ttl, stale_ttl))
+        self._inflight[key] = (task, scope)
+        task.add_done_callback(lambda done: self._landed(key, done))
+        return await asyncio.shield(task)
+
+    def _landed(self, key: Hashable, task: asyncio.Task):
+        if self._inflight.get(key, (None,))[0] is task:
+            del self._inflight[key]
+        if not task.cancelled() and task.exception() is not None:
+            # Retrieved here too, in case every waiter gave up first
+            log.debug(f"Fetch for {key} failed: {task.exception()}")
+
+    def peek(self, key: Hashable) -> Any:
+        """Cached value regardless of age, without touching counters or LRU order"""
+        entry = self._entries.get(key)
+        return entry.value if entry is not None else None
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.stale_hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "refreshes": self.refreshes,
+            "refresh_failures": self.refresh_failures,
+            "in_flight": len(self._inflight),
+            "fetches": dict(self.fetches),
+            "coalesced": dict(self.coalesced),
+            "coalesced_refetches": self.coalesced_refetches,
+            "hit_rate": round((self.hits + self.stale_hits) / lookups, 4) if lookups else 0.0,
+        }
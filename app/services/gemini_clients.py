@@ -0,0 +1,121 @@
+import json
+import logging
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+from app.core.config import get_config
+
+try:
+    import google.generativeai as genai
+    from google.ai import generativelanguage as glm
+    from google.api_core import client_options as client_options_lib, gapic_v1
+    from google.generativeai.client import USER_AGENT
+except ImportError:
+    genai = None
+
+log = logging.getLogger("lumeai.gemini_clients")
+
+class GeminiModelCache:
+    """Bounded LRU of Gemini models, each bound to a per-API-key client.
+
+    `genai.configure` mutates process-wide state, so concurrent sessions with
+    different keys would race on it. Instead every key gets its own
+    GenerativeServiceClient, and models are keyed by (API key, model name,
+    system instruction, generation config) so a session's turns reuse the
+    same model object.
+    """
+
+    def __init__(
+        self,
+        max_models: Optional[int] = None,
+        max_clients: Optional[int] = None,
+        endpoint: Optional[str] = None,
+        transport: Optional[str] = None,
+    ):
+        config = get_config()
+        self.max_models = max_models or config.GEMINI_MODEL_CACHE_SIZE
+        self.max_clients = max_clients or config.GEMINI_CLIENT_CACHE_SIZE
+        self.endpoint = endpoint or config.GEMINI_API_ENDPOINT
+        self.transport = transport or config.GEMINI_TRANSPORT
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.clients_created = 0
+        self._clients: "OrderedDict[str, Any]" = OrderedDict()
+        self._models: "OrderedDict[Hashable, Any]" = OrderedDict()
+
+    def _client_for(self, api_key: str):
+        client = self._clients.get(api_key)
+        if client is not None:
+            self._clients.move_to_end(api_key)
+            return client
+        options = client_options_lib.ClientOptions(api_key=api_key)
+        if self.endpoint:
+            options.api_endpoint = self.endpoint
+        kwargs = {
+            "client_options": options,
+            "client_info": gapic_v1.client_info.ClientInfo(user_agent=f"{USER_AGENT}/{genai.__version__}"),
+        }
+        if self.transport:
+            kwargs["transport"] = self.transport
+        client = glm.GenerativeServiceClient(**kwargs)
+        log.debug(f"Created Gemini client #{self.clients_created + 1}")
+        self.clients_created += 1
+        self._clients[api_key] = client
+        while len(self._clients) > self.max_clients:
+            # Models already holding the evicted client keep working until they go too
+            self._clients.popitem(last=False)
+        return client
+
+    def get(
+        self,
+        api_key: str,
+        model: str,
+        system_instruction: Optional[str] = None,
+        generation_config: Optional[Dict[str, Any]] = None,
+    ):
+        """Cached GenerativeModel for this key and configuration"""
+        if genai is None:
+            raise RuntimeError("google-generativeai library not available. Install with: pip install google-generativeai")
+        key: Tuple = (
+            api_key,
+            model,
+            system_instruction,
+            json.dumps(generation_config, sort_keys=True) if generation_config else None,
+        )
+        model_instance = self._models.get(key)
+        if model_instance is not None:
+            self.hits += 1
+            self._models.move_to_end(key)
+            return model_instance
+
+        self.misses += 1
+        model_instance = genai.GenerativeModel(
+            model_name=model,
+            system_instruction=system_instruction,
+            generation_config=generation_config,
+        )
+        # Bind the model to this key's client instead of the global default
+        model_instance._client = self._client_for(api_key)
+        self._models[key] = model_instance
+        while len(self._models) > self.max_models:
+            self._models.popitem(last=False)
+            self.evictions += 1
+        return model_instance
+
+    def clear(self):
+        self._models.clear()
+        self._clients.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "models": len(self._models),
+            "max_models": self.max_models,
+            "clients": len(self._clients),
+            "clients_created": self.clients_created,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
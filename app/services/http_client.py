@@ -0,0 +1,106 @@
+import logging
+import ssl
+import time
+from typing import Any, Dict, Iterable, Optional
+from urllib.parse import urlsplit
+
+import httpx
+
+from app.core.config import get_config
+from app.services.metrics import Metrics
+
+log = logging.getLogger("lumeai.http_client")
+
+class HTTPClientPool:
+    """Shared async HTTP clients with one keep-alive pool per provider host"""
+
+    def __init__(
+        self,
+        max_connections_per_host: Optional[int] = None,
+        connect_timeout: Optional[float] = None,
+        read_timeout: Optional[float] = None,
+        keepalive_expiry: Optional[float] = None,
+        metrics: Optional[Metrics] = None,
+    ):
+        config = get_config()
+        self.max_connections_per_host = max_connections_per_host or config.HTTP_MAX_CONNECTIONS_PER_HOST
+        self.connect_timeout = connect_timeout or config.HTTP_CONNECT_TIMEOUT
+        self.read_timeout = read_timeout or config.HTTP_READ_TIMEOUT
+        self.keepalive_expiry = keepalive_expiry or config.HTTP_KEEPALIVE_EXPIRY
+        self.metrics = metrics or Metrics()
+        # Building an SSL context loads the CA bundle (tens of ms); do it once
+        # here instead of on the event loop for every new host
+        self._ssl_context = ssl.create_default_context()
+        self._clients: Dict[str, httpx.AsyncClient] = {}
+
+    def _timeout(self, read_timeout: Optional[float] = None) -> httpx.Timeout:
+        return httpx.Timeout(read_timeout or self.read_timeout, connect=self.connect_timeout)
+
+    def client_for(self, url: str) -> httpx.AsyncClient:
+        """Get (or lazily create) the pooled client for the URL's host"""
+        parts = urlsplit(url)
+        origin = f"{parts.scheme}://{parts.netloc}"
+
+        client = self._clients.get(origin)
+        if client is None or client.is_closed:
+            limits = httpx.Limits(
+                max_connections=self.max_connections_per_host,
+                max_keepalive_connections=self.max_connections_per_host,
+                keepalive_expiry=self.keepalive_expiry,
+            )
+            client = httpx.AsyncClient(
+                limits=limits,
+                timeout=self._timeout(),
+                verify=self._ssl_context,
+                follow_redirects=True,
+            )
+            self._clients[origin] = client
+            log.info(f"Opened HTTP pool for {origin}")
+        return client
+
+    def warm(self, urls: Iterable[str]):
+        """Create pools for known provider hosts up front (first creation imports lazily)"""
+        for url in urls:
+            self.client_for(url)
+
+    async def get(
+        self,
+        url: str,
+        params: Optional[Dict[str, Any]] = None,
+        timeout: Optional[float] = None,
+        **kwargs
+    ) -> httpx.Response:
+        """Issue a GET through the host's pooled client.
+
+        Each call is recorded under the host name as the provider; HTTP
+        error statuses count as upstream errors.
+        """
+        client = self.client_for(url)
+        if timeout is not None:
+            kwargs["timeout"] = self._timeout(timeout)
+        provider = urlsplit(url).hostname or "unknown"
+        start = time.monotonic()
+        try:
+            response = await client.get(url, params=params, **kwargs)
+        except Exception:
+            self.metrics.upstream(provider, error=True)
+            raise
+        self.metrics.upstream(provider, time.monotonic() - start, error=response.status_code >= 400)
+        return response
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "hosts": sorted(self._clients),
+            "max_connections_per_host": self.max_connections_per_host,
+            "connect_timeout": self.connect_timeout,
+            "read_timeout": self.read_timeout,
+        }
+
+    async def aclose(self):
+        """Close every pooled client"""
+        clients, self._clients = list(self._clients.values()), {}
+        for client in clients:
+            try:
+                await client.aclose()
+            except Exception as e:
+                log.warning(f"Error closing HTTP client: {e}")
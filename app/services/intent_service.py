@@ -1,5 +1,5 @@
 import re
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Iterable, List, Pattern, Set, Tuple
 from dataclasses import dataclass
 
 @dataclass
@@ -8,64 +8,92 @@ class Intent:
     arg: Optional[str] = None
     extra: Optional[str] = None
 
+# Trigger keywords per intent, in priority order
+_WEATHER_KEYWORDS = ("weather", "temperature", "forecast", "climate")
+_NEWS_KEYWORDS = ("news", "headlines", "happening", "current events")
+_MOVIE_KEYWORDS = ("movie", "film", "cinema")
+_ANIME_KEYWORDS = ("anime",)
+_QUOTE_KEYWORDS = ("quote", "inspire", "motivate", "wisdom")
+
+# Location extractors, tried in order; each only runs if its anchor keyword is present
+_WEATHER_EXTRACTORS: Tuple[Tuple[str, Pattern], ...] = tuple(
+    (anchor, re.compile(pattern)) for anchor, pattern in (
+        ("weather", r"weather in ([\w\s]+)"),
+        ("temperature", r"temperature in (\w+)"),
+        ("weather", r"how.*weather.*(\w+)"),
+        ("weather", r"what.*weather.*like in (\w+)"),
+        ("weather", r"weather.*(\w+)"),
+        ("temperature", r"temperature.*(\w+)"),
+    )
+)
+_NEWS_TOPIC = re.compile(r"news.*?about\s+(\w+)|(\w+)\s+news")
+_MOVIE_QUERY = re.compile(r"movies?.*?about\s+([\w\s]+)|find.*?movie\s+([\w\s]+)|search.*?movie\s+([\w\s]+)")
+_ANIME_QUERY = re.compile(r"anime.*?about\s+([\w\s]+)|search.*?anime\s+([\w\s]+)")
+_QUOTE_CATEGORY = re.compile(r"quote.*?about\s+([\w\s]+)")
+
 class IntentService:
-    """Service for detecting user intents"""
-    
+    """Service for detecting user intents.
+
+    A single prefilter pass over one compiled keyword alternation finds every
+    trigger keyword in the utterance; only the compiled extractors of the
+    candidate intents run afterwards.
+    """
+
     def __init__(self):
-        self.weather_pattern = re.compile(r"\b(weather|temperature|forecast)\b.*\b(in|at)\b\s+(?P<city>[\w\s,.-]+)\??", re.I)
-        self.news_pattern = re.compile(r"\b(news|headlines|latest)\b(\s+on\s+(?P<topic>[\w\s-]+))?", re.I)
-        self.movie_pattern = re.compile(r"\b(movie|film|cinema)\b.*(?P<query>[\w\s-]+)", re.I)
-        self.anime_pattern = re.compile(r"\banime\b.*(?P<query>[\w\s-]+)", re.I)
-        self.quote_pattern = re.compile(r"\b(quote|inspire|motivate|wisdom)\b.*(?P<category>[\w\s-]+)?", re.I)
-    
+        keywords = _WEATHER_KEYWORDS + _NEWS_KEYWORDS + _MOVIE_KEYWORDS + _ANIME_KEYWORDS + _QUOTE_KEYWORDS
+        self.keyword_scan = re.compile("|".join(re.escape(k) for k in sorted(keywords, key=len, reverse=True)))
+
+    def _keywords(self, text_lower: str) -> Set[str]:
+        # Restart one character past each hit so overlapping keywords
+        # ("quotemperature") are still all found
+        found = set()
+        search = self.keyword_scan.search
+        match = search(text_lower)
+        while match:
+            found.add(match.group())
+            match = search(text_lower, match.start() + 1)
+        return found
+
     def detect_intent(self, text: str) -> Optional[Dict[str, Any]]:
         """Detect user intent from text"""
         if not text or not text.strip():
             return None
-        
+
         text_lower = text.lower().strip()
-        
-        # Weather patterns
-        weather_patterns = [
-            r"weather in ([\w\s]+)",
-            r"temperature in (\w+)",
-            r"how.*weather.*(\w+)",
-            r"what.*weather.*like in (\w+)",
-            r"weather.*(\w+)",
-            r"temperature.*(\w+)"
-        ]
-        
-        for pattern in weather_patterns:
-            match = re.search(pattern, text_lower)
-            if match:
-                return {"intent": "weather", "location": match.group(1).strip()}
-        
-        # Generic weather check
-        if any(keyword in text_lower for keyword in ["weather", "temperature", "forecast", "climate"]):
+        found = self._keywords(text_lower)
+        if not found:
+            return None
+
+        # Weather: specific location patterns first, then default location
+        if not found.isdisjoint(_WEATHER_KEYWORDS):
+            for anchor, pattern in _WEATHER_EXTRACTORS:
+                if anchor in found:
+                    match = pattern.search(text_lower)
+                    if match:
+                        return {"intent": "weather", "location": match.group(1).strip()}
             return {"intent": "weather", "location": "London"}  # Default location
-        
-        # News patterns
-        if any(w in text_lower for w in ["news", "headlines", "happening", "current events"]):
-            match = re.search(r"news.*?about\s+(\w+)|(\w+)\s+news", text_lower)
+
+        if not found.isdisjoint(_NEWS_KEYWORDS):
+            match = _NEWS_TOPIC.search(text_lower)
             topic = (match.group(1) or match.group(2)) if match else "general"
             return {"intent": "news", "topic": topic}
-        
-        # Movie patterns
-        if any(w in text_lower for w in ["movie", "film", "cinema"]):
-            match = re.search(r"movies?.*?about\s+([\w\s]+)|find.*?movie\s+([\w\s]+)|search.*?movie\s+([\w\s]+)", text_lower)
-            query = match.group(1) or match.group(2) or match.group(3) if match else "popular"
+
+        if not found.isdisjoint(_MOVIE_KEYWORDS):
+            match = _MOVIE_QUERY.search(text_lower)
+            query = (match.group(1) or match.group(2) or match.group(3)) if match else "popular"
             return {"intent": "movies", "query": query.strip()}
-        
-        # Anime patterns
-        if "anime" in text_lower:
-            match = re.search(r"anime.*?about\s+([\w\s]+)|search.*?anime\s+([\w\s]+)", text_lower)
+
+        if "anime" in found:
+            match = _ANIME_QUERY.search(text_lower)
             query = (match.group(1) or match.group(2)) if match else "naruto"
             return {"intent": "anime", "query": query.strip()}
-        
-        # Quote patterns
-        if any(w in text_lower for w in ["quote", "inspire", "motivate", "wisdom"]):
-            match = re.search(r"quote.*?about\s+([\w\s]+)", text_lower)
-            category = match.group(1).strip() if match else "motivational"
-            return {"intent": "quote", "category": category}
-        
-        return None
+
+        # Only quote keywords are left at this point
+        match = _QUOTE_CATEGORY.search(text_lower)
+        category = match.group(1).strip() if match else "motivational"
+        return {"intent": "quote", "category": category}
+
+    def detect_intents(self, texts: Iterable[str]) -> List[Optional[Dict[str, Any]]]:
+        """Classify a batch of utterances"""
+        detect = self.detect_intent
+        return [detect(text) for text in texts]
@@ -1,33 +1,99 @@
 import os
 import asyncio
 import logging
-from typing import AsyncGenerator, Optional
+import threading
+import time
+import concurrent.futures
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Any, AsyncGenerator, Callable, Dict, List, Optional, Union
 
-try:
-    import google.generativeai as genai
-except ImportError:
-    genai = None
+from app.core.config import get_config
+from app.services.gemini_clients import GeminiModelCache
+from app.services.metrics import Metrics
 
 log = logging.getLogger("lumeai.llm_service")
 
+# Sentinel pushed by the stream worker once the upstream iterator is exhausted
+_STREAM_DONE = object()
+
+DEFAULT_GENERATION_CONFIG = {
+    "temperature": 0.7,
+    "top_p": 0.8,
+    "top_k": 40,
+    "max_output_tokens": 2048,
+}
+
+def new_llm_executor() -> ThreadPoolExecutor:
+    """Thread pool that runs blocking Gemini SDK calls"""
+    return ThreadPoolExecutor(
+        max_workers=get_config().LLM_STREAM_WORKERS,
+        thread_name_prefix="gemini",
+    )
+
+def _abort_stream(response):
+    """Best-effort cancel of the SDK's underlying streaming call"""
+    iterator = getattr(response, "_iterator", None)
+    cancel = getattr(iterator, "cancel", None)
+    if callable(cancel):
+        try:
+            cancel()
+        except Exception as e:
+            log.debug(f"Error cancelling Gemini stream: {e}")
+
 class LLMService:
     """Service for handling LLM interactions"""
     
-    def __init__(self):
-        self.client = None
+    def __init__(
+        self,
+        executor: Optional[ThreadPoolExecutor] = None,
+        models: Optional[GeminiModelCache] = None,
+        metrics: Optional[Metrics] = None,
+    ):
+        self.executor = executor or new_llm_executor()
+        self.models = models or GeminiModelCache()
+        self.metrics = metrics or Metrics()
+        self.queue_size = get_config().LLM_STREAM_QUEUE_SIZE
+        # Gemini calls handed to the pool: waiting for a thread, and on one
+        self.calls_waiting = 0
+        self.calls_running = 0
+        self._calls_lock = threading.Lock()
+
+    def _run_in_executor(self, fn: Callable[[], Any]) -> asyncio.Future:
+        """Run blocking `fn` on the Gemini pool, counted while it waits and while it runs"""
+        def call():
+            with self._calls_lock:
+                self.calls_waiting -= 1
+                self.calls_running += 1
+            try:
+                return fn()
+            finally:
+                with self._calls_lock:
+                    self.calls_running -= 1
+
+        def done(future: concurrent.futures.Future):
+            # Cancelled before a thread picked it up, so `call` never ran
+            if future.cancelled():
+                with self._calls_lock:
+                    self.calls_waiting -= 1
+
+        with self._calls_lock:
+            self.calls_waiting += 1
+        try:
+            future = self.executor.submit(call)
+        except Exception:
+            with self._calls_lock:
+                self.calls_waiting -= 1
+            raise
+        future.add_done_callback(done)
+        return asyncio.wrap_future(future)
     
-    def _make_client(self, api_key: str = None):
-        """Create GenAI client with API key"""
-        if genai is None:
-            raise RuntimeError("google-generativeai library not available. Install with: pip install google-generativeai")
-        
+    def _get_model(self, api_key: str, model: str, system_instruction: str = None, generation_config: dict = None):
+        """Cached model bound to an isolated client for this API key"""
         key = api_key or os.getenv("GEMINI_API_KEY")
         if not key:
             raise ValueError("No Gemini API key provided")
-        
-        # Configure the API key
-        genai.configure(api_key=key)
-        return genai
+        return self.models.get(key, model, system_instruction, generation_config)
     
     def _extract_text_from_response(self, response) -> str:
         """Extract text from Gemini response"""
@@ -77,65 +143,103 @@ class LLMService:
     
     async def stream_response(
         self, 
-        prompt: str, 
+        prompt: Union[str, List[Dict[str, Any]]], 
         model: str = "gemini-1.5-flash",
         api_key: str = None,
         system_instruction: str = None,
         generation_config: dict = None
     ) -> AsyncGenerator[str, None]:
-        """Stream LLM response"""
-        client = self._make_client(api_key)
+        """Stream LLM response.
+
+        The blocking SDK call and chunk iteration run on the Gemini thread pool
+        and hand chunks over through a bounded queue, so a slow response never
+        blocks the event loop. Closing or cancelling the consumer stops the
+        worker and cancels the upstream stream.
+
+        `prompt` is either plain text or a structured `contents` list of
+        {"role", "parts"} messages (see PromptWindow).
+        """
+        model_instance = self._get_model(
+            api_key, model, system_instruction, generation_config or DEFAULT_GENERATION_CONFIG
+        )
         
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        cancelled = threading.Event()
+        upstream = {}
+
+        def hand_off(item) -> bool:
+            # Blocks this worker while the queue is full; gives up once the
+            # consumer has gone away
+            future = asyncio.run_coroutine_threadsafe(queue.put(item), loop)
+            while True:
+                try:
+                    future.result(timeout=0.1)
+                    return True
+                except concurrent.futures.TimeoutError:
+                    if cancelled.is_set():
+                        future.cancel()
+                        return False
+
+        def produce():
+            try:
+                response = model_instance.generate_content(prompt, stream=True)
+                upstream["response"] = response
+                for chunk in response:
+                    if cancelled.is_set():
+                        _abort_stream(response)
+                        return
+                    text = self._extract_text_from_chunk(chunk)
+                    if text and not hand_off(text):
+                        _abort_stream(response)
+                        return
+            except Exception as e:
+                if not cancelled.is_set():
+                    hand_off(e)
+                return
+            hand_off(_STREAM_DONE)
+
+        started = time.monotonic()
+        first = True
+        worker = self._run_in_executor(produce)
         try:
-            # Create the model
-            model_instance = client.GenerativeModel(
-                model_name=model,
-                system_instruction=system_instruction
-            )
-            
-            # Set up generation config
-            config = generation_config or {
-                "temperature": 0.7,
-                "top_p": 0.8,
-                "top_k": 40,
-                "max_output_tokens": 2048,
-            }
-            
-            # Generate content stream
-            response = model_instance.generate_content(
-                prompt,
-                generation_config=config,
-                stream=True
-            )
-            
-            for chunk in response:
-                text = self._extract_text_from_chunk(chunk)
-                if text:
-                    yield text
-                    
-        except Exception as e:
-            log.exception(f"LLM streaming error: {e}")
-            raise
+            while True:
+                item = await queue.get()
+                if isinstance(item, Exception):
+                    self.metrics.upstream("gemini", error=True)
+                    log.error(f"LLM streaming error: {item}")
+                    raise item
+                if first:
+                    first = False
+                    self.metrics.upstream("gemini", time.monotonic() - started)
+                if item is _STREAM_DONE:
+                    break
+                yield item
+        finally:
+            if not worker.done():
+                cancelled.set()
+                if "response" in upstream:
+                    _abort_stream(upstream["response"])
     
     async def generate_response(
         self, 
-        prompt: str, 
+        prompt: Union[str, List[Dict[str, Any]]], 
         model: str = "gemini-1.5-flash",
         api_key: str = None,
         system_instruction: str = None
     ) -> Optional[str]:
         """Generate single response (non-streaming)"""
         try:
-            client = self._make_client(api_key)
-            
-            # Create the model
-            model_instance = client.GenerativeModel(
-                model_name=model,
-                system_instruction=system_instruction
-            )
+            model_instance = self._get_model(api_key, model, system_instruction)
             
-            # Generate content
-            response = model_instance.generate_content(prompt)
+            # Generate content off the event loop
+            started = time.monotonic()
+            try:
+                response = await self._run_in_executor(partial(model_instance.generate_content, prompt))
+            except Exception:
+                self.metrics.upstream("gemini", error=True)
+                raise
+            self.metrics.upstream("gemini", time.monotonic() - started)
             return self._extract_text_from_response(response)
             
         except Exception as e:
@@ -0,0 +1,316 @@
+import math
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+# Latency buckets in seconds, fine-grained around the sub-second voice budget
+DEFAULT_BUCKETS = (0.025, 0.05, 0.1, 0.2, 0.3, 0.5, 0.75, 1.0, 1.5, 2.0, 3.0, 5.0, 10.0)
+SPEECH_BUCKETS = (0.5, 1.0, 2.0, 3.0, 5.0, 8.0, 13.0, 21.0, 34.0, 60.0)
+TOKEN_BUCKETS = (16, 32, 64, 128, 256, 512, 1024, 2048)
+PROMPT_TOKEN_BUCKETS = (256, 512, 1024, 2048, 4096, 8192)
+
+# Pipeline stages of one voice turn, in the order they normally happen
+TURN_STAGES = (
+    "audio_received",   # first audio chunk since the previous turn ended
+    "end_of_turn",      # AssemblyAI end_of_turn event
+    "intent_detected",
+    "skill_fetched",
+    "llm_first_chunk",
+    "llm_last_chunk",
+    "tts_first_chunk",  # first Murf audio chunk sent to the client
+    "audio_last_sent",  # last audio chunk sent to the client
+)
+
+LabelValues = Tuple[str, ...]
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> LabelValues:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, help, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: str):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels: str) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def render(self) -> List[str]:
+        with self._lock:
+            values = sorted(self._values.items())
+        return self.header() + [
+            f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(v)}" for key, v in values
+        ]
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (), buckets: Iterable[float] = DEFAULT_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+        # Per label set: [per-bucket counts..., sum]
+        self._series: Dict[LabelValues, List[float]] = {}
+
+    def observe(self, value: float, **labels: str):
+        key = self._key(labels)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [0.0] * (len(self.buckets) + 1)
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+                    break
+            series[-1] += value
+
+    def count(self, **labels: str) -> int:
+        series = self._series.get(self._key(labels))
+        return int(sum(series[:-1])) if series else 0
+
+    def mean(self, **labels: str) -> Optional[float]:
+        series = self._series.get(self._key(labels))
+        count = sum(series[:-1]) if series else 0
+        return series[-1] / count if count else None
+
+    def render(self) -> List[str]:
+        with self._lock:
+            snapshot = sorted((key, list(series)) for key, series in self._series.items())
+        lines = self.header()
+        for key, series in snapshot:
+            cumulative = 0.0
+            for bound, count in zip(self.buckets, series):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {_format_value(cumulative)}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(series[-1])}")
+            lines.append(f"{self.name}_count{labels} {_format_value(cumulative)}")
+        return lines
+
+class Gauge(_Metric):
+    """Gauge read at scrape time from a callback.
+
+    `read` returns a number, or for labelled gauges a mapping of label-value
+    tuples to numbers.
+    """
+
+    kind = "gauge"
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        read: Callable[[], Union[float, Dict[LabelValues, float]]],
+        labelnames: Sequence[str] = (),
+    ):
+        super().__init__(name, help, labelnames)
+        self.read = read
+
+    def render(self) -> List[str]:
+        value = self.read()
+        values = value if isinstance(value, dict) else {(): value}
+        return self.header() + [
+            f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(v)}" for key, v in sorted(values.items())
+        ]
+
+class CounterFunc(Gauge):
+    """Counter read at scrape time from a running total kept by another object"""
+
+    kind = "counter"
+
+class Metrics:
+    """Process-wide counters and histograms, exported on `/metrics`.
+
+    Rendered in the Prometheus text exposition format. Everything here is
+    safe to update from worker threads (SDK callbacks, the Gemini pool).
+    Upstream error rate is `upstream_errors_total / upstream_requests_total`
+    per provider.
+    """
+
+    def __init__(self):
+        self.turn_stage = Histogram(
+            "lumeai_turn_stage_seconds", "Time from end of user turn to each pipeline stage", ("stage",)
+        )
+        self.turn_speech = Histogram(
+            "lumeai_turn_speech_seconds", "First audio received to end of turn", buckets=SPEECH_BUCKETS
+        )
+        self.turns = Counter("lumeai_turns_total", "Completed voice turns by reply path and outcome", ("path", "outcome"))
+        self.upstream_latency = Histogram(
+            "lumeai_upstream_latency_seconds", "Time to the first response byte, chunk or audio per provider", ("provider",)
+        )
+        self.upstream_requests = Counter("lumeai_upstream_requests_total", "Upstream calls per provider", ("provider",))
+        self.upstream_errors = Counter("lumeai_upstream_errors_total", "Failed upstream calls per provider", ("provider",))
+        self.turns_coalesced = Counter(
+            "lumeai_turns_coalesced_total", "Transcripts merged into the reply of a following transcript"
+        )
+        self.transcripts_deduplicated = Counter(
+            "lumeai_transcripts_deduplicated_total", "Final transcripts dropped as repeats of the same turn"
+        )
+        self.tts_cache_lookups = Counter("lumeai_tts_cache_lookups_total", "TTS audio cache lookups", ("result",))
+        self.tts_cache_bytes_saved = Counter(
+            "lumeai_tts_cache_bytes_saved_total", "Audio bytes replayed from the TTS cache instead of synthesized"
+        )
+        self.reply_tokens = Histogram(
+            "lumeai_llm_reply_tokens", "Estimated tokens in completed Gemini replies", buckets=TOKEN_BUCKETS
+        )
+        self.barge_ins = Counter("lumeai_barge_ins_total", "Replies cancelled by user speech or a newer turn", ("reason",))
+        self.barge_in_cancel = Histogram(
+            "lumeai_barge_in_cancel_seconds", "Barge-in to the cancelled reply having unwound"
+        )
+        self.barge_in_tokens = Counter(
+            "lumeai_barge_in_tokens_total",
+            "Gemini tokens of cancelled replies: generated before the cancel, and saved (estimated from the mean reply length)",
+            ("kind",),
+        )
+        self.transcription_jobs = Counter(
+            "lumeai_transcription_jobs_total", "Batch transcription jobs by final status (or rejected when the queue was full)",
+            ("status",),
+        )
+        self.transcription_job_seconds = Histogram(
+            "lumeai_transcription_job_seconds", "Batch transcription job run time", buckets=SPEECH_BUCKETS
+        )
+        self.transcription_audio = Counter(
+            "lumeai_transcription_audio_seconds_total", "Seconds of uploaded audio transcribed by batch jobs"
+        )
+        self.speculations = Counter(
+            "lumeai_speculations_total",
+            "Skill lookups started on partial transcripts, by outcome once the final transcript was answered",
+            ("outcome",),
+        )
+        self.speculation_saved = Histogram(
+            "lumeai_speculation_saved_seconds", "Skill lookup time already elapsed when a speculative lookup was committed"
+        )
+        self.skill_rate_wait = Histogram(
+            "lumeai_skill_rate_wait_seconds", "Time skill lookups queued for their provider's rate limit", ("skill",)
+        )
+        self.skill_rate_limited = Counter(
+            "lumeai_skill_rate_limited_total",
+            "Rate limit events per skill provider: 429 answers, lookups that gave up waiting (fail_fast) "
+            "and what they answered with (served_cached, fallback)",
+            ("skill", "event"),
+        )
+        self.prompt_tokens = Histogram(
+            "lumeai_llm_prompt_tokens", "Estimated tokens of conversation (summary and turns) sent to Gemini per reply",
+            buckets=PROMPT_TOKEN_BUCKETS,
+        )
+        self.summaries = Counter(
+            "lumeai_prompt_summaries_total",
+            "Background summaries of older turns: applied, stale (the history moved on) or failed",
+            ("outcome",),
+        )
+        self.summary_seconds = Histogram("lumeai_prompt_summary_seconds", "Gemini time per background summary")
+        self._metrics: List[_Metric] = [
+            self.turn_stage, self.turn_speech, self.turns, self.turns_coalesced, self.transcripts_deduplicated,
+            self.upstream_latency, self.upstream_requests, self.upstream_errors,
+            self.tts_cache_lookups, self.tts_cache_bytes_saved,
+            self.reply_tokens, self.barge_ins, self.barge_in_cancel, self.barge_in_tokens,
+            self.transcription_jobs, self.transcription_job_seconds, self.transcription_audio,
+            self.speculations, self.speculation_saved, self.skill_rate_wait, self.skill_rate_limited,
+            self.prompt_tokens, self.summaries, self.summary_seconds,
+        ]
+
+    def gauge(self, name: str, help: str, read: Callable[[], Union[float, Dict[LabelValues, float]]], labelnames: Sequence[str] = ()):
+        """Register a gauge sampled from `read` at scrape time"""
+        self._metrics.append(Gauge(name, help, read, labelnames))
+
+    def counter_func(
+        self, name: str, help: str, read: Callable[[], Union[float, Dict[LabelValues, float]]], labelnames: Sequence[str] = ()
+    ):
+        """Register a counter whose total is read from `read` at scrape time"""
+        self._metrics.append(CounterFunc(name, help, read, labelnames))
+
+    def upstream(self, provider: str, latency: Optional[float] = None, error: bool = False):
+        """Record one upstream call and, for successes, its time to first response"""
+        self.upstream_requests.inc(provider=provider)
+        if error:
+            self.upstream_errors.inc(provider=provider)
+        elif latency is not None:
+            self.upstream_latency.observe(latency, provider=provider)
+
+    def cancelled_reply(self, generated_tokens: int, llm_finished: bool, expected_tokens: int = 0):
+        """Account a reply cut short by barge-in.
+
+        Tokens Gemini would still have produced are estimated from the mean
+        length of completed replies, or `expected_tokens` until a reply has
+        completed; nothing is saved once the stream ended.
+        """
+        self.barge_in_tokens.inc(generated_tokens, kind="generated")
+        mean = self.reply_tokens.mean()
+        expected = round(mean) if mean is not None else expected_tokens
+        if not llm_finished:
+            self.barge_in_tokens.inc(max(0, expected - generated_tokens), kind="saved")
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+class TurnTimeline:
+    """Monotonic timestamps of one turn's stages, reported when it finishes"""
+
+    __slots__ = ("metrics", "marks", "finished")
+
+    def __init__(self, metrics: Metrics, audio_received: Optional[float] = None):
+        self.metrics = metrics
+        self.marks: Dict[str, float] = {"end_of_turn": time.monotonic()}
+        if audio_received is not None:
+            self.marks["audio_received"] = audio_received
+        self.finished = False
+
+    def mark(self, stage: str, repeat: bool = False):
+        """Timestamp a stage; only the first mark counts unless `repeat` is set"""
+        if repeat or stage not in self.marks:
+            self.marks[stage] = time.monotonic()
+
+    def offsets(self) -> Dict[str, float]:
+        """Milliseconds of each marked stage relative to end of turn"""
+        end_of_turn = self.marks["end_of_turn"]
+        return {
+            stage: round((self.marks[stage] - end_of_turn) * 1000, 1)
+            for stage in TURN_STAGES if stage in self.marks
+        }
+
+    def finish(self, path: str, outcome: str = "ok"):
+        if self.finished:
+            return
+        self.finished = True
+        end_of_turn = self.marks["end_of_turn"]
+        if "audio_received" in self.marks:
+            self.metrics.turn_speech.observe(end_of_turn - self.marks["audio_received"])
+        for stage in TURN_STAGES[2:]:
+            if stage in self.marks:
+                self.metrics.turn_stage.observe(self.marks[stage] - end_of_turn, stage=stage)
+        self.metrics.turns.inc(path=path, outcome=outcome)
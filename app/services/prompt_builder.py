@@ -0,0 +1,194 @@
+import itertools
+import sys
+from collections import deque
+from typing import Any, Callable, Deque, Dict, Iterator, List, Optional, Tuple
+
+from app.core.config import get_config
+
+# Gemini's conversation roles
+USER = "user"
+MODEL = "model"
+
+# Opens the prompt when older turns have been folded into a summary
+SUMMARY_PREFIX = "Summary of our conversation so far: "
+
+# Per-turn record: (role, text, token estimate)
+Turn = Tuple[str, str, int]
+_TURN_OVERHEAD = sys.getsizeof((USER, "", 0))
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate (~4 characters per token for English text)"""
+    return len(text) // 4 + 1
+
+class PromptWindow:
+    """Running Gemini `contents` for one conversation, trimmed to a token budget.
+
+    Each turn is stored once as a compact (role, text, tokens) tuple with
+    its token estimate, so appending a turn and keeping the running total are
+    O(new turn). The oldest turns are dropped once that total exceeds the
+    budget, so `contents()`, which renders the window afresh on every call,
+    costs O(window): bounded by the budget rather than growing with the whole
+    conversation. The persona travels separately as the system instruction.
+    `on_change`, if set, is called after every change (the session manager
+    uses it to write the window behind to a shared store).
+
+    Long conversations can also be compacted: `compactable` hands out the
+    oldest turns once the prompt passes a threshold, and `compact` swaps
+    them for a summary of them, which opens every later prompt.
+    """
+
+    def __init__(self, token_budget: Optional[int] = None):
+        self.token_budget = token_budget or get_config().PROMPT_TOKEN_BUDGET
+        self.tokens = 0
+        self.bytes = 0
+        self.turns = 0
+        self.trimmed = 0
+        self.summary = ""
+        self.summary_tokens = 0
+        self.summarized = 0
+        self._turns: Deque[Turn] = deque()
+        self.on_change: Optional[Callable[[], None]] = None
+
+    def __len__(self) -> int:
+        return len(self._turns)
+
+    def __iter__(self) -> Iterator[Turn]:
+        return iter(self._turns)
+
+    def append(self, role: str, text: str):
+        """Add a turn ("user" or "model") and trim the oldest ones if over budget"""
+        if not text:
+            return
+        cost = estimate_tokens(text)
+        self._turns.append((role, text, cost))
+        self.tokens += cost
+        self.bytes += _TURN_OVERHEAD + sys.getsizeof(text)
+        self.turns += 1
+        self._trim()
+        if self.on_change is not None:
+            self.on_change()
+
+    def retract(self, since: int):
+        """Drop the turns appended since `turns` was `since` (a reply restarted with more input)"""
+        removed = False
+        while self.turns > since and self._turns:
+            _, text, cost = self._turns.pop()
+            self.tokens -= cost
+            self.bytes -= _TURN_OVERHEAD + sys.getsizeof(text)
+            self.turns -= 1
+            removed = True
+        self.turns = min(self.turns, since)
+        if removed and self.on_change is not None:
+            self.on_change()
+
+    def _trim(self):
+        # Always keep the newest turn, even if it alone is over budget
+        while self.prompt_tokens > self.token_budget and len(self._turns) > 1:
+            self._drop_oldest()
+        # A conversation has to open with a user turn
+        while self._turns and self._turns[0][0] != USER:
+            self._drop_oldest()
+
+    def _drop_oldest(self):
+        _, text, cost = self._turns.popleft()
+        self.tokens -= cost
+        self.bytes -= _TURN_OVERHEAD + sys.getsizeof(text)
+        self.trimmed += 1
+
+    @property
+    def prompt_tokens(self) -> int:
+        """Estimated size of the next prompt: summary plus the turns in the window"""
+        return self.tokens + self.summary_tokens
+
+    def compactable(self, threshold: int, keep_turns: int) -> Optional[List[Turn]]:
+        """The oldest turns to fold into the summary, once the prompt has reached `threshold` tokens.
+
+        At least the newest `keep_turns` stay verbatim, and the remaining
+        window still opens with a user turn.
+        """
+        if self.prompt_tokens < threshold:
+            return None
+        cut = len(self._turns) - keep_turns
+        while cut > 0 and self._turns[cut][0] != USER:
+            cut -= 1
+        return list(itertools.islice(self._turns, cut)) if cut > 0 else None
+
+    def compact(self, head: List[Turn], summary: str) -> bool:
+        """Replace `head` (from `compactable`) with `summary`.
+
+        False if the window no longer starts with those turns (trimmed,
+        cleared or replaced meanwhile); the summary is then stale.
+        """
+        if len(head) > len(self._turns) or any(a is not b for a, b in zip(self._turns, head)):
+            return False
+        for _ in head:
+            _, text, cost = self._turns.popleft()
+            self.tokens -= cost
+            self.bytes -= _TURN_OVERHEAD + sys.getsizeof(text)
+        self._set_summary(summary)
+        self.summarized += len(head)
+        if self.on_change is not None:
+            self.on_change()
+        return True
+
+    def _set_summary(self, summary: str):
+        if self.summary:
+            self.bytes -= sys.getsizeof(self.summary)
+        self.summary = summary
+        self.summary_tokens = estimate_tokens(summary) if summary else 0
+        if summary:
+            self.bytes += sys.getsizeof(summary)
+
+    def pairs(self) -> List[Tuple[str, str]]:
+        """(role, text) of the turns in the window, oldest first"""
+        return [(role, text) for role, text, _ in self._turns]
+
+    def replace(self, turns: List[Tuple[str, str]], summary: str = ""):
+        """Swap in another copy of this conversation, without notifying `on_change`"""
+        self._turns.clear()
+        self.tokens = 0
+        self.bytes = 0
+        self.summary = ""
+        self._set_summary(summary)
+        for role, text in turns:
+            cost = estimate_tokens(text)
+            self._turns.append((role, text, cost))
+            self.tokens += cost
+            self.bytes += _TURN_OVERHEAD + sys.getsizeof(text)
+
+    def contents(self) -> List[Dict[str, Any]]:
+        """Messages for `generate_content`, oldest first.
+
+        Consecutive turns with the same role are folded into one message,
+        since Gemini expects the roles to alternate.
+        """
+        messages: List[Dict[str, Any]] = []
+        if self.summary:
+            messages.append({"role": USER, "parts": [SUMMARY_PREFIX + self.summary]})
+        for role, text, _ in self._turns:
+            if messages and messages[-1]["role"] == role:
+                messages[-1]["parts"].append(text)
+            else:
+                messages.append({"role": role, "parts": [text]})
+        return messages
+
+    def clear(self):
+        self._turns.clear()
+        self.tokens = 0
+        self.bytes = 0
+        self.summary = ""
+        self.summary_tokens = 0
+        if self.on_change is not None:
+            self.on_change()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "window_turns": len(self._turns),
+            "tokens": self.tokens,
+            "summary_tokens": self.summary_tokens,
+            "token_budget": self.token_budget,
+            "bytes": self.bytes,
+            "turns": self.turns,
+            "trimmed": self.trimmed,
+            "summarized": self.summarized,
+        }
@@ -0,0 +1,170 @@
+import asyncio
+import logging
+import time
+from email.utils import parsedate_to_datetime
+from typing import Any, Dict, Mapping, Optional, Tuple
+
+from app.core.config import get_config
+from app.services.metrics import Metrics
+
+log = logging.getLogger("lumeai.rate_limit")
+
+# Backoff when a 429 comes without a usable Retry-After, doubled per consecutive 429
+DEFAULT_BACKOFF = 1.0
+MAX_BACKOFF = 60.0
+
+class RateLimited(Exception):
+    """The provider's next free slot is further away than the caller can wait"""
+
+    def __init__(self, provider: str, wait: float):
+        super().__init__(f"{provider} rate limited for another {wait:.1f}s")
+        self.provider = provider
+        self.wait = wait
+
+def retry_after_seconds(value: Optional[str], now: Optional[float] = None) -> Optional[float]:
+    """Seconds to wait from a Retry-After header (delta seconds or HTTP date)"""
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, when.timestamp() - (now if now is not None else time.time()))
+
+class TokenBucket:
+    """Token bucket that slows down on 429s and recovers on successes.
+
+    `rate` tokens per second accrue up to `burst`. A reservation may take
+    the bucket negative, which puts the caller in line behind the others.
+    A 429 halves the rate (down to a sixteenth of the configured one) and
+    holds every caller until its Retry-After has passed; each success
+    afterwards wins back a twentieth of the configured rate.
+    """
+
+    def __init__(self, rate: float, burst: int):
+        self.base_rate = rate
+        self.rate = rate
+        self.burst = max(1, burst)
+        self.tokens = float(self.burst)
+        self.updated = time.monotonic()
+        self.backoff = DEFAULT_BACKOFF
+        self.throttled = 0
+
+    def _refill(self, now: float):
+        if now > self.updated:
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+
+    def wait_time(self, now: float) -> float:
+        """Seconds until a token is free, without taking it"""
+        self._refill(now)
+        if self.tokens >= 1:
+            return max(0.0, self.updated - now)
+        return self.updated + (1 - self.tokens) / self.rate - now
+
+    def reserve(self, now: float) -> float:
+        """Take the next token; returns how long to wait for it"""
+        wait = self.wait_time(now)
+        self.tokens -= 1
+        return wait
+
+    def throttle(self, now: float, retry_after: Optional[float] = None):
+        """The provider answered 429"""
+        self.throttled += 1
+        self.rate = max(self.base_rate / 16, self.rate / 2)
+        if retry_after is None:
+            retry_after, self.backoff = self.backoff, min(MAX_BACKOFF, self.backoff * 2)
+        # Nothing goes out before the provider said so; then one request may
+        self.updated = max(self.updated, now + retry_after)
+        self.tokens = 1.0
+
+    def succeed(self):
+        self.backoff = DEFAULT_BACKOFF
+        if self.rate < self.base_rate:
+            self.rate = min(self.base_rate, self.rate + self.base_rate / 20)
+
+    def stats(self, now: float) -> Dict[str, Any]:
+        return {
+            "rate": round(self.rate, 3),
+            "configured_rate": self.base_rate,
+            "burst": self.burst,
+            "wait_s": round(self.wait_time(now), 3),
+            "throttled": self.throttled,
+        }
+
+class RateLimiter:
+    """Process-wide token buckets, one per skill provider.
+
+    Callers reserve a slot before each upstream request and wait for it, but
+    never longer than `max_wait` (the share of a voice turn a lookup may
+    spend queueing): past that `acquire` raises `RateLimited` at once so the
+    caller can answer from the cache or with a fallback. Responses are fed
+    back through `observe`, so a 429 and its Retry-After slow down every
+    caller of that provider. Providers without a configured limit are not
+    paced.
+    """
+
+    def __init__(
+        self,
+        limits: Optional[Mapping[str, Tuple[float, int]]] = None,
+        max_wait: Optional[float] = None,
+        metrics: Optional[Metrics] = None,
+    ):
+        config = get_config()
+        limits = config.SKILL_RATE_LIMITS if limits is None else limits
+        self.max_wait = config.SKILL_RATE_LIMIT_MAX_WAIT if max_wait is None else max_wait
+        self.metrics = metrics or Metrics()
+        self.buckets: Dict[str, TokenBucket] = {name: TokenBucket(rate, burst) for name, (rate, burst) in limits.items()}
+
+    async def acquire(self, provider: str, max_wait: Optional[float] = None):
+        """Wait for the provider's next slot, or raise RateLimited if it is too far off"""
+        bucket = self.buckets.get(provider)
+        if bucket is None:
+            return
+        started = time.monotonic()
+        deadline = started + (self.max_wait if max_wait is None else max(0.0, max_wait))
+        while True:
+            now = time.monotonic()
+            wait = bucket.wait_time(now)
+            if now + wait > deadline:
+                self.metrics.skill_rate_limited.inc(skill=provider, event="fail_fast")
+                raise RateLimited(provider, wait)
+            throttled = bucket.throttled
+            wait = bucket.reserve(now)
+            if wait > 0:
+                try:
+                    await asyncio.sleep(wait)
+                except asyncio.CancelledError:
+                    # Hand the slot back to the callers still in line
+                    bucket.tokens += 1
+                    raise
+            # A 429 that arrived while we queued may have moved our slot
+            if bucket.throttled == throttled:
+                break
+        self.metrics.skill_rate_wait.observe(time.monotonic() - started, skill=provider)
+
+    def observe(self, provider: str, status_code: int, retry_after: Optional[str] = None):
+        """Learn from a provider response"""
+        bucket = self.buckets.get(provider)
+        if bucket is None:
+            return
+        if status_code == 429:
+            seconds = retry_after_seconds(retry_after)
+            bucket.throttle(time.monotonic(), seconds)
+            self.metrics.skill_rate_limited.inc(skill=provider, event="429")
+            log.warning(f"{provider} answered 429; rate now {bucket.rate:.2f}/s, retry after {seconds}")
+        elif status_code < 400:
+            bucket.succeed()
+
+    def fell_back(self, provider: str, cached: bool):
+        """A lookup gave up on the provider and answered from the cache or a fallback"""
+        self.metrics.skill_rate_limited.inc(skill=provider, event="served_cached" if cached else "fallback")
+
+    def stats(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        return {"max_wait_s": self.max_wait, "providers": {name: b.stats(now) for name, b in self.buckets.items()}}
@@ -0,0 +1,111 @@
+import logging
+from typing import Optional
+
+from starlette.requests import HTTPConnection
+
+from app.core.config import Config, get_config
+from app.services.gemini_clients import GeminiModelCache
+from app.services.http_client import HTTPClientPool
+from app.services.intent_service import IntentService
+from app.services.llm_service import LLMService, new_llm_executor
+from app.services.metrics import Metrics
+from app.services.rate_limit import RateLimiter
+from app.services.session_store import open_session_store
+from app.services.sessions import SessionManager
+from app.services.skills_service import SkillsService, new_skill_cache
+from app.services.summarizer import HistorySummarizer
+from app.services.transcriptions import TranscriptionJobs
+from app.services.tts_cache import TTSAudioCache
+from app.services.tts_connections import MurfConnectionPool
+from app.services.tts_service import TTSService
+
+log = logging.getLogger("lumeai.registry")
+
+class ServiceRegistry:
+    """Process-wide owner of the shared services and their pooled resources.
+
+    Created once in the FastAPI lifespan; routes get it through the
+    `get_services` dependency. Per-session API keys are applied as cheap
+    overlays (`SkillsService.with_keys`) rather than new service objects.
+    """
+
+    def __init__(self, config: Optional[Config] = None):
+        self.config = config or get_config()
+
+        # Shared resources
+        self.metrics = Metrics()
+        self.http = HTTPClientPool(metrics=self.metrics)
+        self.skill_cache = new_skill_cache()
+        self.rate_limits = RateLimiter(metrics=self.metrics)
+        self.tts_connections = MurfConnectionPool()
+        self.llm_executor = new_llm_executor()
+        self.llm_models = GeminiModelCache()
+        self.sessions = SessionManager(store=open_session_store(self.config))
+        self.tts_cache = TTSAudioCache(metrics=self.metrics) if self.config.TTS_CACHE_ENABLED else None
+
+        # Services built on top of them
+        self.llm = LLMService(executor=self.llm_executor, models=self.llm_models, metrics=self.metrics)
+        self.tts = TTSService(connections=self.tts_connections, metrics=self.metrics, cache=self.tts_cache)
+        self.skills = SkillsService(http=self.http, cache=self.skill_cache, limiter=self.rate_limits)
+        self.intents = IntentService()
+        self.summarizer = HistorySummarizer(llm=self.llm, metrics=self.metrics)
+        self.transcriptions = TranscriptionJobs(
+            intents=self.intents, skills=self.skills, llm=self.llm, metrics=self.metrics
+        )
+        self._register_gauges()
+
+    def _register_gauges(self):
+        """Point-in-time gauges read from the pooled resources on each scrape"""
+        metrics = self.metrics
+        metrics.gauge("lumeai_sessions", "Sessions held in memory", lambda: len(self.sessions))
+        metrics.gauge(
+            "lumeai_sessions_connected", "Sessions with a live WebSocket",
+            lambda: sum(1 for s in self.sessions.values() if s.connections),
+        )
+        metrics.gauge(
+            "lumeai_audio_ingest_queued_bytes", "Browser audio buffered but not yet sent to AssemblyAI",
+            lambda: sum(s.audio.bytes_queued for s in self.sessions.values() if s.audio is not None and s.connections),
+        )
+        metrics.gauge(
+            "lumeai_llm_executor_queue_depth", "Gemini calls waiting for a worker thread",
+            lambda: self.llm.calls_waiting,
+        )
+        metrics.gauge("lumeai_llm_calls_running", "Gemini calls on a worker thread", lambda: self.llm.calls_running)
+        metrics.gauge("lumeai_tts_open_connections", "Open Murf sockets", lambda: self.tts_connections.stats()["open"])
+        metrics.gauge(
+            "lumeai_tts_active_contexts", "Murf utterances in flight", lambda: self.tts_connections.stats()["active_contexts"]
+        )
+        metrics.gauge("lumeai_skill_cache_entries", "Cached skill results", lambda: len(self.skill_cache))
+        metrics.counter_func(
+            "lumeai_skill_fetches_total", "Skill lookups that went upstream",
+            lambda: {(skill,): n for skill, n in self.skill_cache.fetches.items()}, ("skill",),
+        )
+        metrics.counter_func(
+            "lumeai_skill_lookups_coalesced_total", "Skill cache misses that shared an identical lookup already in flight",
+            lambda: {(skill,): n for skill, n in self.skill_cache.coalesced.items()}, ("skill",),
+        )
+        metrics.gauge("lumeai_transcription_jobs_queued", "Batch jobs waiting for a worker", lambda: self.transcriptions.queued)
+        metrics.gauge("lumeai_transcription_jobs_running", "Batch jobs being transcribed", lambda: self.transcriptions.running)
+
+    async def startup(self):
+        """Open pooled resources before serving traffic"""
+        self.http.warm(self.config.SKILL_ENDPOINTS.values())
+        if self.tts_cache is not None:
+            await self.tts_cache.load()
+        self.transcriptions.start()
+        log.info("Service registry started")
+
+    async def shutdown(self):
+        """Close pooled resources"""
+        await self.transcriptions.aclose()
+        await self.summarizer.aclose()
+        await self.http.aclose()
+        await self.tts_connections.aclose()
+        await self.sessions.aclose()
+        self.llm_executor.shutdown(wait=False, cancel_futures=True)
+        self.llm_models.clear()
+        log.info("Service registry stopped")
+
+def get_services(conn: HTTPConnection) -> ServiceRegistry:
+    """FastAPI dependency: the registry created in the app lifespan"""
+    return conn.app.state.services
@@ -0,0 +1,54 @@
+import re
+from typing import List
+
+# Sentence end: terminal punctuation (optionally closed by a quote/bracket)
+# followed by whitespace, or a line break
+_SENTENCE_END = re.compile(r"[.!?…]+[\"')\]]*\s+|\n+")
+# Clause break: only used once the pending text is long enough to speak
+_CLAUSE_END = re.compile(r"[,;:—]\s+")
+_ABBREVIATIONS = ("mr.", "mrs.", "ms.", "dr.", "prof.", "st.", "vs.", "etc.", "e.g.", "i.e.")
+
+class SentenceSegmenter:
+    """Split streaming LLM text into speakable sentence or clause segments"""
+
+    def __init__(self, min_clause_chars: int = 60, max_chars: int = 240):
+        self.min_clause_chars = min_clause_chars
+        self.max_chars = max_chars
+        self._buffer = ""
+
+    def _cut(self) -> int:
+        """Index just past the first usable boundary in the buffer, or 0"""
+        for match in _SENTENCE_END.finditer(self._buffer):
+            head = self._buffer[:match.end()].rstrip()
+            if head.lower().endswith(_ABBREVIATIONS):
+                continue
+            if head:
+                return match.end()
+
+        if len(self._buffer) >= self.min_clause_chars:
+            for match in _CLAUSE_END.finditer(self._buffer, self.min_clause_chars // 2):
+                return match.end()
+
+        if len(self._buffer) >= self.max_chars:
+            space = self._buffer.rfind(" ", 0, self.max_chars)
+            return space + 1 if space > 0 else self.max_chars
+
+        return 0
+
+    def feed(self, text: str) -> List[str]:
+        """Add streamed text and return any segments that are now complete"""
+        self._buffer += text
+        segments = []
+        while True:
+            cut = self._cut()
+            if not cut:
+                break
+            segment, self._buffer = self._buffer[:cut].strip(), self._buffer[cut:]
+            if segment:
+                segments.append(segment)
+        return segments
+
+    def flush(self) -> str:
+        """Return whatever text is still pending"""
+        segment, self._buffer = self._buffer.strip(), ""
+        return segment
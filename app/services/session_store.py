@@ -0,0 +1,201 @@
+import json
+import sqlite3
+import asyncio
+import threading
+import time
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from app.core.config import Config
+from app.core.constants import SESSION_DB_PATH
+
+# (session_id, persona, [(role, text), ...], summary of older turns)
+SessionRow = Tuple[str, str, List[Tuple[str, str]], str]
+
+@dataclass
+class StoredSession:
+    session_id: str
+    persona: str
+    turns: List[Tuple[str, str]]
+    version: int
+    summary: str = ""
+
+class SessionStore(ABC):
+    """Shared home of session state, for running more than one worker process.
+
+    `SessionManager` keeps hot sessions in memory and writes changes behind
+    to the store in batches; any worker can then load a session, and
+    compares versions to notice changes made by another one. Every method
+    that touches the backend is awaited and must keep blocking work off the
+    event loop: a lookup can wait on another worker's write. Versions are
+    opaque: a write gives the row a new one.
+    """
+
+    @abstractmethod
+    async def version(self, session_id: str) -> Optional[int]:
+        """Current version of a stored session, None if there is none"""
+
+    @abstractmethod
+    async def load(self, session_id: str) -> Optional[StoredSession]:
+        """Stored state of a session, None if there is none"""
+
+    @abstractmethod
+    async def write(self, rows: List[SessionRow], deleted: Iterable[str] = ()) -> Dict[str, int]:
+        """Upsert rows and delete ids in one transaction; returns the new version per row"""
+
+    @abstractmethod
+    async def touch(self, session_ids: Iterable[str]):
+        """Keep sessions that are still in use from expiring"""
+
+    @abstractmethod
+    async def expire(self, idle_ttl: float) -> int:
+        """Delete sessions not written or touched for `idle_ttl` seconds"""
+
+    async def stats(self) -> Dict[str, Any]:
+        return {}
+
+    def close(self):
+        pass
+
+class SQLiteSessionStore(SessionStore):
+    """Session store in one local SQLite file in WAL mode.
+
+    WAL lets every worker read while one writes, so no separate service is
+    needed for a single-host deployment. Lookups go through a reader
+    connection on a worker thread, so a lookup stuck behind another worker's
+    write (up to `busy_timeout_ms`) never stalls the event loop; writes run
+    on a dedicated thread with its own connection, one transaction per batch.
+    """
+
+    def __init__(self, path: Path, busy_timeout_ms: int = 5000):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.busy_timeout_ms = busy_timeout_ms
+        self.reads = 0
+        self.transactions = 0
+        self.rows_written = 0
+        self._reader = self._connect()
+        self._reader_lock = threading.Lock()
+        self._reader.execute(
+            "CREATE TABLE IF NOT EXISTS sessions ("
+            "id TEXT PRIMARY KEY, persona TEXT NOT NULL, turns TEXT NOT NULL, "
+            "version INTEGER NOT NULL, updated_at REAL NOT NULL, summary TEXT NOT NULL DEFAULT '')"
+        )
+        columns = {row[1] for row in self._reader.execute("PRAGMA table_info(sessions)")}
+        if "summary" not in columns:
+            self._reader.execute("ALTER TABLE sessions ADD COLUMN summary TEXT NOT NULL DEFAULT ''")
+        self._reader.execute("CREATE INDEX IF NOT EXISTS sessions_updated_at ON sessions (updated_at)")
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="session-store")
+        self._writer_conn: Optional[sqlite3.Connection] = None
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, isolation_level=None, check_same_thread=False)
+        conn.execute(f"PRAGMA busy_timeout = {self.busy_timeout_ms}")
+        conn.execute("PRAGMA journal_mode = WAL")
+        conn.execute("PRAGMA synchronous = NORMAL")
+        return conn
+
+    def _read(self, query: str, args: tuple) -> Optional[tuple]:
+        with self._reader_lock:
+            self.reads += 1
+            return self._reader.execute(query, args).fetchone()
+
+    async def version(self, session_id: str) -> Optional[int]:
+        row = await asyncio.to_thread(self._read, "SELECT version FROM sessions WHERE id = ?", (session_id,))
+        return row[0] if row else None
+
+    async def load(self, session_id: str) -> Optional[StoredSession]:
+        row = await asyncio.to_thread(
+            self._read, "SELECT persona, turns, version, summary FROM sessions WHERE id = ?", (session_id,)
+        )
+        if row is None:
+            return None
+        persona, turns, version, summary = row
+        return StoredSession(session_id, persona, [tuple(t) for t in json.loads(turns)], version, summary)
+
+    async def _run(self, fn, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._writer, fn, *args)
+
+    def _transaction(self, statements):
+        if self._writer_conn is None:
+            self._writer_conn = self._connect()
+        conn = self._writer_conn
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            result = statements(conn)
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        self.transactions += 1
+        return result
+
+    def _write(self, rows: List[SessionRow], deleted: List[str]) -> Dict[str, int]:
+        now = time.time()
+        # Wall-clock nanoseconds: unique per write, including across workers
+        versions = {row[0]: time.time_ns() + i for i, row in enumerate(rows)}
+
+        def statements(conn: sqlite3.Connection):
+            if deleted:
+                conn.executemany("DELETE FROM sessions WHERE id = ?", [(i,) for i in deleted])
+            conn.executemany(
+                "INSERT INTO sessions (id, persona, turns, version, updated_at, summary) VALUES (?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT (id) DO UPDATE SET persona = excluded.persona, turns = excluded.turns, "
+                "version = excluded.version, updated_at = excluded.updated_at, summary = excluded.summary",
+                [(i, persona, json.dumps(turns), versions[i], now, summary) for i, persona, turns, summary in rows],
+            )
+
+        self._transaction(statements)
+        self.rows_written += len(rows)
+        return versions
+
+    async def write(self, rows: List[SessionRow], deleted: Iterable[str] = ()) -> Dict[str, int]:
+        return await self._run(self._write, rows, list(deleted))
+
+    async def touch(self, session_ids: Iterable[str]):
+        now = time.time()
+        ids = [(now, i) for i in session_ids]
+        if ids:
+            await self._run(self._transaction, lambda conn: conn.executemany(
+                "UPDATE sessions SET updated_at = ? WHERE id = ?", ids
+            ))
+
+    async def expire(self, idle_ttl: float) -> int:
+        cutoff = time.time() - idle_ttl
+        return await self._run(self._transaction, lambda conn: conn.execute(
+            "DELETE FROM sessions WHERE updated_at < ?", (cutoff,)
+        ).rowcount)
+
+    def _count(self) -> int:
+        with self._reader_lock:
+            return self._reader.execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+
+    async def stats(self) -> Dict[str, Any]:
+        stored = await asyncio.to_thread(self._count)
+        return {
+            "backend": "sqlite",
+            "path": str(self.path),
+            "stored_sessions": stored,
+            "reads": self.reads,
+            "transactions": self.transactions,
+            "rows_written": self.rows_written,
+        }
+
+    def close(self):
+        self._writer.shutdown(wait=True)
+        if self._writer_conn is not None:
+            self._writer_conn.close()
+        with self._reader_lock:
+            self._reader.close()
+
+def open_session_store(config: Config) -> Optional[SessionStore]:
+    """The configured shared store; None keeps sessions in this process only"""
+    backend = config.SESSION_STORE.lower()
+    if backend == "memory":
+        return None
+    if backend == "sqlite":
+        return SQLiteSessionStore(config.SESSION_DB_PATH or SESSION_DB_PATH)
+    raise ValueError(f"Unknown SESSION_STORE '{config.SESSION_STORE}' (expected memory or sqlite)")
@@ -0,0 +1,316 @@
+import sys
+import time
+import asyncio
+import logging
+import weakref
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+from app.core.config import get_config
+from app.services.prompt_builder import PromptWindow
+from app.services.session_store import SessionStore
+
+log = logging.getLogger("lumeai.sessions")
+
+class Session:
+    """Per-conversation state: persona, API keys and the prompt window"""
+
+    __slots__ = (
+        "session_id", "_persona", "api_keys", "history", "audio", "turns", "speculation", "connections", "created_at",
+        "last_seen", "version", "on_change", "__weakref__",
+    )
+
+    def __init__(self, session_id: str, persona: str):
+        self.session_id = session_id
+        self._persona = persona
+        self.api_keys: Dict[str, str] = {}
+        self.history = PromptWindow()
+        self.audio = None  # AudioIngest of the latest connection
+        self.turns = None  # TurnController of the latest connection
+        self.speculation = None  # Speculator of the latest connection
+        self.connections = 0
+        self.created_at = time.monotonic()
+        self.last_seen = self.created_at
+        self.version = 0  # Store version this copy was loaded from or last written as
+        self.on_change: Optional[Callable[[], None]] = None
+
+    @property
+    def persona(self) -> str:
+        return self._persona
+
+    @persona.setter
+    def persona(self, persona: str):
+        if persona != self._persona:
+            self._persona = persona
+            if self.on_change is not None:
+                self.on_change()
+
+    def restore(self, persona: str, turns: List[Tuple[str, str]], version: int, summary: str = ""):
+        """Take on the stored state of this session (not a change to write back)"""
+        self._persona = persona
+        self.history.replace(turns, summary)
+        self.version = version
+
+    def approx_bytes(self) -> int:
+        """Rough memory footprint: turn records, keys and the audio ring buffer"""
+        keys = sum(sys.getsizeof(v) for v in self.api_keys.values())
+        audio = self.audio.buffer_bytes if self.audio is not None else 0
+        return sys.getsizeof(self) + self.history.bytes + keys + audio
+
+class SessionManager:
+    """Bounded session store with idle TTL and LRU eviction.
+
+    Sessions are kept in least-recently-used order. Creating one past
+    `max_sessions` evicts the least recently used one without a live
+    connection (if every session is connected, the cap is exceeded until
+    some disconnect); a periodic sweep drops sessions idle for longer than
+    `idle_ttl` that have no live connection.
+
+    With a shared `store` (several workers), the sessions here are a hot
+    cache of it. Persona and history changes are written behind, batched
+    every `flush_interval` seconds; `flush` writes them out at once. Looking
+    a session up (awaited, the store is read off the event loop) checks its
+    stored version and reloads it if another worker changed it, so a
+    conversation can continue on any worker. Evicting a session only drops
+    the local copy; the store expires sessions idle past the TTL on its own.
+    API keys never leave the process.
+    """
+
+    def __init__(
+        self,
+        max_sessions: Optional[int] = None,
+        idle_ttl: Optional[float] = None,
+        store: Optional[SessionStore] = None,
+        flush_interval: Optional[float] = None,
+    ):
+        config = get_config()
+        self.max_sessions = max_sessions or config.SESSION_MAX
+        self.idle_ttl = idle_ttl or config.SESSION_IDLE_TTL
+        self.default_persona = config.PERSONAS["default"]
+        self.store = store
+        self.flush_interval = flush_interval if flush_interval is not None else config.SESSION_FLUSH_MS / 1000
+        self.created = 0
+        self.lru_evictions = 0
+        self.ttl_evictions = 0
+        self.over_capacity = 0
+        self.store_loads = 0
+        self.reloads = 0
+        self.flushes = 0
+        self.flushed_rows = 0
+        self.flush_errors = 0
+        self._sessions: "OrderedDict[str, Session]" = OrderedDict()
+        self._sweeper: Optional[asyncio.Task] = None
+        # Write-behind state: sessions changed and ids deleted since the last flush
+        self._dirty: Dict[str, Session] = {}
+        self._deleted: Set[str] = set()
+        self._flusher: Optional[asyncio.Task] = None
+        self._flush_lock = asyncio.Lock()
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def __contains__(self, session_id: str) -> bool:
+        return session_id in self._sessions
+
+    def values(self) -> List[Session]:
+        """Snapshot of the live sessions"""
+        return list(self._sessions.values())
+
+    async def get(self, session_id: str) -> Optional[Session]:
+        """Existing session (here or in the store) without creating or touching it"""
+        return await self._sync(session_id)
+
+    async def get_or_create(self, session_id: str) -> Session:
+        """Session for this id, marked as most recently used"""
+        session = await self._sync(session_id)
+        if session is None:
+            session = self._add(Session(session_id, self.default_persona))
+            self.created += 1
+        else:
+            self._sessions.move_to_end(session_id)
+        session.last_seen = time.monotonic()
+        return session
+
+    def _add(self, session: Session) -> Session:
+        # Through a weak reference: a callback holding the session would make every
+        # evicted session a reference cycle, left for the cyclic GC to find
+        ref = weakref.ref(session)
+        session.on_change = session.history.on_change = lambda: self._changed(ref())
+        self._sessions[session.session_id] = session
+        while len(self._sessions) > self.max_sessions:
+            # Never cut off a live call: its next turn would start over with a blank session
+            evicted_id = next(
+                (i for i, s in self._sessions.items() if not s.connections and s is not session), None
+            )
+            if evicted_id is None:
+                self.over_capacity += 1
+                log.debug(f"All other sessions are connected; {len(self._sessions)} over a cap of {self.max_sessions}")
+                break
+            del self._sessions[evicted_id]
+            self.lru_evictions += 1
+            log.debug(f"Evicted least recently used session {evicted_id}")
+        if self._sweeper is None or self._sweeper.done():
+            try:
+                self._sweeper = asyncio.get_running_loop().create_task(self._sweep_loop())
+            except RuntimeError:
+                pass  # No loop (sync callers); evict_idle() can still be called directly
+        return session
+
+    def _unsynced(self, session_id: str) -> bool:
+        # Local changes not written yet are the newest state
+        return self.store is None or session_id in self._dirty or session_id in self._deleted
+
+    async def _sync(self, session_id: str) -> Optional[Session]:
+        """Bring the local copy up to date with the store, loading it if there is none.
+
+        Other lookups, changes and flushes run while the store is read, so
+        the local state is checked again after every await.
+        """
+        session = self._sessions.get(session_id)
+        if self._unsynced(session_id):
+            return session
+        if session is None:
+            stored = await self.store.load(session_id)
+            session = self._sessions.get(session_id)
+            if session is not None or stored is None or self._unsynced(session_id):
+                # Loaded meanwhile by a concurrent lookup, or never stored
+                return session
+            session = self._add(Session(session_id, stored.persona))
+            session.restore(stored.persona, stored.turns, stored.version, stored.summary)
+            self.store_loads += 1
+            return session
+        known = session.version
+        version = await self.store.version(session_id)
+        # A flush or another lookup may have moved this copy on during the read
+        if version == known or session.version != known or self._unsynced(session_id):
+            return session
+        if version is None:
+            if known:
+                # Reset on another worker: forget the conversation, keep this connection's persona
+                session.restore(session.persona, [], 0)
+                self.reloads += 1
+            return session
+        stored = await self.store.load(session_id)
+        if stored is not None and session.version == known and not self._unsynced(session_id):
+            session.restore(stored.persona, stored.turns, stored.version, stored.summary)
+            self.reloads += 1
+        return session
+
+    def _changed(self, session: Optional[Session]):
+        if self.store is None or session is None:
+            return
+        self._dirty[session.session_id] = session
+        self._deleted.discard(session.session_id)
+        self._schedule_flush()
+
+    def _schedule_flush(self):
+        if self._flusher is None or self._flusher.done():
+            try:
+                self._flusher = asyncio.get_running_loop().create_task(self._flush_later())
+            except RuntimeError:
+                pass  # No loop; flush() writes the changes when awaited
+
+    async def _flush_later(self):
+        await asyncio.sleep(self.flush_interval)
+        await self.flush()
+
+    async def flush(self):
+        """Write pending changes to the store in one transaction"""
+        if self.store is None:
+            return
+        async with self._flush_lock:
+            if not self._dirty and not self._deleted:
+                return
+            dirty, self._dirty = self._dirty, {}
+            deleted, self._deleted = self._deleted, set()
+            rows = [(s.session_id, s.persona, s.history.pairs(), s.history.summary) for s in dirty.values()]
+            try:
+                versions = await self.store.write(rows, deleted)
+            except Exception as e:
+                # Keep the changes (unless superseded meanwhile) for the next flush
+                self.flush_errors += 1
+                log.warning(f"Writing {len(rows)} sessions to the store failed: {e}")
+                for session_id, session in dirty.items():
+                    if session_id not in self._deleted:
+                        self._dirty.setdefault(session_id, session)
+                self._deleted |= {session_id for session_id in deleted if session_id not in self._dirty}
+                self._schedule_flush()
+                return
+            for session_id, version in versions.items():
+                dirty[session_id].version = version
+            self.flushes += 1
+            self.flushed_rows += len(rows)
+
+    def discard(self, session_id: str) -> bool:
+        """Forget a session, here and in the store"""
+        if self.store is not None:
+            self._dirty.pop(session_id, None)
+            self._deleted.add(session_id)
+            self._schedule_flush()
+        return self._sessions.pop(session_id, None) is not None
+
+    def evict_idle(self) -> int:
+        """Drop sessions idle past the TTL that have no live connection"""
+        cutoff = time.monotonic() - self.idle_ttl
+        evicted = 0
+        # LRU order means the idle candidates are all at the front
+        for session_id, session in list(self._sessions.items()):
+            if session.last_seen > cutoff:
+                break
+            if session.connections:
+                continue
+            del self._sessions[session_id]
+            evicted += 1
+        self.ttl_evictions += evicted
+        return evicted
+
+    async def _sweep_loop(self):
+        while self._sessions:
+            await asyncio.sleep(min(self.idle_ttl / 2, 60))
+            evicted = self.evict_idle()
+            if evicted:
+                log.info(f"Evicted {evicted} idle sessions")
+            if self.store is not None:
+                try:
+                    # Connected sessions stay; other workers' idle ones expire here too
+                    await self.store.touch([s.session_id for s in self._sessions.values() if s.connections])
+                    expired = await self.store.expire(self.idle_ttl)
+                except Exception as e:
+                    log.warning(f"Session store sweep failed: {e}")
+                    continue
+                if expired:
+                    log.info(f"Expired {expired} idle sessions from the store")
+
+    async def stats(self) -> Dict[str, Any]:
+        sizes = [s.approx_bytes() for s in self._sessions.values()]
+        return {
+            "sessions": len(self._sessions),
+            "connected": sum(1 for s in self._sessions.values() if s.connections),
+            "max_sessions": self.max_sessions,
+            "idle_ttl": self.idle_ttl,
+            "created": self.created,
+            "lru_evictions": self.lru_evictions,
+            "ttl_evictions": self.ttl_evictions,
+            "over_capacity": self.over_capacity,
+            "approx_bytes": sum(sizes),
+            "approx_bytes_per_session": sum(sizes) // len(sizes) if sizes else 0,
+            "store": {
+                **(await self.store.stats() if self.store is not None else {"backend": "memory"}),
+                "loads": self.store_loads,
+                "reloads": self.reloads,
+                "flushes": self.flushes,
+                "flushed_rows": self.flushed_rows,
+                "flush_errors": self.flush_errors,
+                "pending_writes": len(self._dirty) + len(self._deleted),
+            },
+        }
+
+    async def aclose(self):
+        if self._sweeper:
+            self._sweeper.cancel()
+        if self._flusher:
+            self._flusher.cancel()
+        if self.store is not None:
+            await self.flush()
+            await asyncio.to_thread(self.store.close)
+        self._sessions.clear()
@@ -1,20 +1,69 @@
-import asyncio
+import copy
 import os
-import requests
-import random
 import time
+import httpx
+import random
 import logging
 from typing import Optional, Dict, Any, Union, List
 
+from app.core.config import get_config
+from app.services.cache import TTLCache
+from app.services.http_client import HTTPClientPool
+from app.services.rate_limit import RateLimited, RateLimiter
+
 log = logging.getLogger("lumeai.skills_service")
 
+RATE_LIMITED = "API rate limited. Please try again later."
+
+FALLBACK_QUOTES = [
+    {"quote": "The only way to do great work is to love what you do.", "author": "Steve Jobs"},
+    {"quote": "Innovation distinguishes between a leader and a follower.", "author": "Steve Jobs"},
+    {"quote": "Success is not final, failure is not fatal: courage to continue counts.", "author": "Churchill"}
+]
+
+def _is_cacheable(result: Any) -> bool:
+    """Only successful lookups are cached; error dicts and messages are not"""
+    if isinstance(result, dict):
+        return "error" not in result
+    return isinstance(result, list) and bool(result)
+
+def _normalize(text: str) -> str:
+    return " ".join(text.lower().split())
+
+def new_skill_cache() -> TTLCache:
+    """Cache for skill lookups that never stores error results.
+
+    Keys leave the API key out, since a successful lookup is the same
+    whoever asks; lookups pass it as the single-flight scope instead, so one
+    session's rejected key never turns into another session's error.
+    """
+    config = get_config()
+    return TTLCache(config.SKILL_CACHE_MAX_ENTRIES, cacheable=_is_cacheable, single_flight=config.SKILL_SINGLE_FLIGHT)
+
 class SkillsService:
     """Service for handling external API integrations"""
     
-    def __init__(self):
+    def __init__(
+        self, http: Optional[HTTPClientPool] = None, cache: Optional[TTLCache] = None,
+        limiter: Optional[RateLimiter] = None,
+    ):
+        config = get_config()
         self.weather_api_key = os.getenv("WEATHER_API_KEY", "")
         self.news_api_key = os.getenv("NEWS_API_KEY", "")
         self.tmdb_api_key = os.getenv("TMDB_API_KEY", "")
+        self.http = http or HTTPClientPool()
+        self.cache = cache if cache is not None else new_skill_cache()
+        self.limiter = limiter or RateLimiter()
+        self.cache_ttls = config.SKILL_CACHE_TTLS
+        self.endpoints = config.SKILL_ENDPOINTS
+    
+    def with_keys(self, weather_key: str = "", news_key: str = "", tmdb_key: str = "") -> "SkillsService":
+        """Lightweight per-session view sharing this service's pool and cache"""
+        overlay = copy.copy(self)
+        overlay.weather_api_key = weather_key or self.weather_api_key
+        overlay.news_api_key = news_key or self.news_api_key
+        overlay.tmdb_api_key = tmdb_key or self.tmdb_api_key
+        return overlay
     
     async def execute_skill(self, intent_data: Dict[str, Any]) -> str:
         """Execute the appropriate skill based on intent"""
@@ -24,6 +73,8 @@ class SkillsService:
             if intent == "weather":
                 location = intent_data.get("location", "London")
                 result = await self.get_weather(location)
+                if isinstance(result, dict) and result.get("error") == RATE_LIMITED:
+                    return f"Sorry, {RATE_LIMITED}"
                 if isinstance(result, dict) and "error" in result:
                     return f"Sorry, I couldn't get weather for {location}. Please check the city name."
                 if isinstance(result, dict):
@@ -51,6 +102,8 @@ class SkillsService:
             elif intent == "movies":
                 query = intent_data.get("query", "popular")
                 result = await self.search_movies(query)
+                if isinstance(result, dict) and result.get("error") == RATE_LIMITED:
+                    return f"Sorry, {RATE_LIMITED}"
                 if isinstance(result, dict) and "error" in result:
                     return f"Sorry, couldn't find movies about '{query}'. Try a different search term."
                 if isinstance(result, list) and result:
@@ -94,20 +147,43 @@ class SkillsService:
         
         return "I'm not sure how to help with that."
     
+    async def _get(self, skill: str, url: str, params: Optional[Dict[str, Any]] = None, max_wait: Optional[float] = None):
+        """GET paced by the provider's rate limit; raises RateLimited rather than wait past `max_wait`"""
+        await self.limiter.acquire(skill, max_wait)
+        response = await self.http.get(url, params=params)
+        self.limiter.observe(skill, response.status_code, response.headers.get("Retry-After"))
+        return response
+
+    async def _lookup(self, skill: str, key: tuple, fetch, scope: Optional[str] = None, limited: Any = None) -> Any:
+        """Cached lookup that answers with the last result it had, or `limited`, while the provider is rate limited"""
+        try:
+            return await self.cache.get_or_fetch(key, fetch, self.cache_ttls[skill], scope=scope)
+        except RateLimited as e:
+            cached = self.cache.peek(key)
+            self.limiter.fell_back(skill, cached is not None)
+            log.info(f"Not waiting for {skill} ({e}); answering {'from cache' if cached is not None else 'with fallback'}")
+            return cached if cached is not None else limited
+
     async def get_weather(self, city: str) -> Union[Dict[str, Any], str]:
         """Get weather information using WeatherAPI"""
         if not city.strip() or not self.weather_api_key:
             return {"error": "Invalid city or API key not set"}
         
+        return await self._lookup(
+            "weather", ("weather", _normalize(city)), lambda: self._fetch_weather(city),
+            scope=self.weather_api_key, limited={"error": RATE_LIMITED},
+        )
+    
+    async def _fetch_weather(self, city: str) -> Union[Dict[str, Any], str]:
         try:
-            url = f"http://api.weatherapi.com/v1/current.json"
+            url = self.endpoints["weather"]
             params = {
                 "key": self.weather_api_key,
                 "q": city.strip(),
                 "aqi": "no"
             }
             
-            response = requests.get(url, params=params, timeout=10)
+            response = await self._get("weather", url, params)
             if response.status_code != 200:
                 return {"error": f"Failed to fetch weather for {city}"}
             
@@ -118,6 +194,8 @@ class SkillsService:
                 "temperature_c": data.get("current", {}).get("temp_c"),
                 "condition": data.get("current", {}).get("condition", {}).get("text"),
             }
+        except RateLimited:
+            raise
         except Exception as e:
             log.exception(f"Weather API error: {e}")
             return {"error": f"Weather error: {str(e)}"}
@@ -127,8 +205,14 @@ class SkillsService:
         if not self.news_api_key:
             return f"Please set NEWS_API_KEY to get {topic} news."
         
+        return await self._lookup(
+            "news", ("news", _normalize(topic), n), lambda: self._fetch_news(topic, n),
+            scope=self.news_api_key, limited=f"Sorry, {RATE_LIMITED}",
+        )
+    
+    async def _fetch_news(self, topic: str, n: int) -> Union[List[Dict], str]:
         try:
-            url = "https://newsapi.org/v2/top-headlines"
+            url = self.endpoints["news"]
             valid_categories = ['business', 'entertainment', 'general', 'health', 'science', 'sports', 'technology']
             
             if topic.lower() in valid_categories:
@@ -148,7 +232,7 @@ class SkillsService:
                     "sortBy": "publishedAt"
                 }
             
-            response = requests.get(url, params=params, timeout=12)
+            response = await self._get("news", url, params)
             response.raise_for_status()
             data = response.json()
             
@@ -168,6 +252,8 @@ class SkillsService:
                 } for a in articles
             ]
             
+        except RateLimited:
+            raise
         except Exception as e:
             log.exception(f"News API error: {e}")
             return f"News fetch error: {str(e)}"
@@ -177,8 +263,14 @@ class SkillsService:
         if not query.strip() or not self.tmdb_api_key:
             return {"error": "Invalid query or TMDB_API_KEY not set"}
         
+        return await self._lookup(
+            "movies", ("movies", _normalize(query)), lambda: self._fetch_movies(query),
+            scope=self.tmdb_api_key, limited={"error": RATE_LIMITED},
+        )
+    
+    async def _fetch_movies(self, query: str) -> Union[List[Dict], Dict[str, str]]:
         try:
-            url = "https://api.themoviedb.org/3/search/movie"
+            url = self.endpoints["movies"]
             params = {
                 "api_key": self.tmdb_api_key,
                 "query": query.strip(),
@@ -186,7 +278,7 @@ class SkillsService:
                 "include_adult": False
             }
             
-            response = requests.get(url, params=params, timeout=10)
+            response = await self._get("movies", url, params)
             
             if response.status_code == 401:
                 return {"error": "Invalid TMDB API key"}
@@ -211,7 +303,9 @@ class SkillsService:
                 } for m in movies[:10]
             ]
             
-        except requests.RequestException as e:
+        except RateLimited:
+            raise
+        except httpx.HTTPError as e:
             log.exception(f"Movie search network error: {e}")
             return {"error": f"Network error: {str(e)}"}
         except Exception as e:
@@ -220,11 +314,15 @@ class SkillsService:
     
     async def search_anime(self, query: str = "naruto", retries: int = 3) -> Union[List[Dict], Dict[str, str]]:
         """Search anime using Jikan API"""
+        return await self._lookup(
+            "anime", ("anime", _normalize(query)), lambda: self._fetch_anime(query, retries), limited={"error": RATE_LIMITED}
+        )
+    
+    async def _fetch_anime(self, query: str, retries: int) -> Union[List[Dict], Dict[str, str]]:
+        # Jikan is paced by the shared limiter; retries share one wait budget
+        deadline = time.monotonic() + self.limiter.max_wait
         try:
-            # Add delay to avoid rate limiting
-            await asyncio.sleep(random.uniform(1, 2))
-            
-            url = "https://api.jikan.moe/v4/anime"
+            url = self.endpoints["anime"]
             params = {
                 "q": query.strip(),
                 "limit": 5,
@@ -235,18 +333,16 @@ class SkillsService:
             
             for attempt in range(retries):
                 try:
-                    response = requests.get(url, params=params, timeout=15)
+                    response = await self._get("anime", url, params, max_wait=deadline - time.monotonic())
                     
                     if response.status_code == 429:
-                        wait_time = int(response.headers.get('Retry-After', 60))
+                        # The limiter took note of Retry-After; the next attempt waits for it if the budget allows
                         if attempt < retries - 1:
-                            await asyncio.sleep(wait_time)
                             continue
-                        return {"error": "API rate limited. Please try again later."}
+                        return {"error": RATE_LIMITED}
                     
                     elif response.status_code != 200:
                         if attempt < retries - 1:
-                            await asyncio.sleep(2)
                             continue
                         return {"error": f"Anime search failed: HTTP {response.status_code}"}
                     
@@ -281,12 +377,13 @@ class SkillsService:
                     
                     return results
                     
-                except requests.RequestException as e:
+                except httpx.HTTPError as e:
                     if attempt < retries - 1:
-                        await asyncio.sleep(3)
                         continue
                     return {"error": f"Network error: {str(e)}"}
                 
+        except RateLimited:
+            raise
         except Exception as e:
             log.exception(f"Anime search error: {e}")
             return {"error": f"Anime search error: {str(e)}"}
@@ -294,15 +391,16 @@ class SkillsService:
     async def get_quote(self, category: str = "motivational") -> Dict[str, str]:
         """Get inspirational quotes"""
         try:
+            base_url = self.endpoints["quote"]
             if category.lower() in ["motivational", "inspirational", "success", "life"]:
-                url = f"https://zenquotes.io/api/quotes/[{category}]"
+                url = f"{base_url}/quotes/[{category}]"
             else:
-                url = "https://zenquotes.io/api/random"
+                url = f"{base_url}/random"
             
-            response = requests.get(url, timeout=10)
+            response = await self._get("quote", url)
             if response.status_code != 200:
-                url = "https://zenquotes.io/api/random"
-                response = requests.get(url, timeout=10)
+                url = f"{base_url}/random"
+                response = await self._get("quote", url)
             
             data = response.json()
             if data and isinstance(data, list):
@@ -313,14 +411,13 @@ class SkillsService:
                     "category": category
                 }
             
-            # Fallback quotes
-            fallbacks = [
-                {"quote": "The only way to do great work is to love what you do.", "author": "Steve Jobs"},
-                {"quote": "Innovation distinguishes between a leader and a follower.", "author": "Steve Jobs"},
-                {"quote": "Success is not final, failure is not fatal: courage to continue counts.", "author": "Churchill"}
-            ]
-            return random.choice(fallbacks)
+            return random.choice(FALLBACK_QUOTES)
             
+        except RateLimited as e:
+            # Quotes are not cached; any quote beats waiting out ZenQuotes
+            self.limiter.fell_back("quote", False)
+            log.info(f"Not waiting for quote ({e}); answering with fallback")
+            return random.choice(FALLBACK_QUOTES)
         except Exception as e:
             log.exception(f"Quote API error: {e}")
             return {
@@ -0,0 +1,206 @@
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Optional, Set, Tuple
+
+from app.core.config import get_config
+from app.services.intent_service import IntentService
+from app.services.metrics import Metrics
+from app.services.skills_service import SkillsService
+
+log = logging.getLogger("lumeai.speculation")
+
+IntentKey = Tuple[Tuple[str, str], ...]
+
+def intent_key(intent_data: Optional[Dict[str, Any]]) -> Optional[IntentKey]:
+    """Comparable form of a detected intent; case and spacing of arguments are ignored"""
+    if not intent_data or not intent_data.get("intent"):
+        return None
+    return tuple(sorted((name, " ".join(str(value).lower().split())) for name, value in intent_data.items()))
+
+@dataclass
+class _Turn:
+    """Speculation state of one AssemblyAI turn"""
+    candidate: Optional[IntentKey] = None
+    streak: int = 0
+    ended: bool = False
+    key: Optional[IntentKey] = None
+    task: Optional[asyncio.Task] = None
+    started: float = 0.0
+    done_at: Optional[float] = None
+    timer: Optional[asyncio.TimerHandle] = None
+
+class Speculator:
+    """Skill lookups started from partial transcripts, before the user has finished.
+
+    Partials of each AssemblyAI turn go through intent detection. Once the
+    same intent was detected on `stable_partials` consecutive partials, on a
+    partial not followed by another within `stable_ms`, or on the unformatted
+    end-of-turn transcript, its skill lookup starts in the background, and the Murf socket is opened on the first partial of a
+    turn. When the reply to the final transcript has detected its intent,
+    `take` hands over the lookup if the intent matches and discards it
+    otherwise; discarded lookups still fill the shared skill cache. One per
+    voice connection; every method runs on the event loop.
+    """
+
+    def __init__(
+        self,
+        intents: IntentService,
+        skills: SkillsService,
+        metrics: Optional[Metrics] = None,
+        stable_partials: Optional[int] = None,
+        stable_ms: Optional[int] = None,
+        warm_tts: Optional[Callable[[], Awaitable[Any]]] = None,
+    ):
+        self.intents = intents
+        self.skills = skills
+        self.metrics = metrics or Metrics()
+        config = get_config()
+        self.stable_partials = stable_partials if stable_partials is not None else config.SPECULATION_STABLE_PARTIALS
+        self.stable_delay = (stable_ms if stable_ms is not None else config.SPECULATION_STABLE_MS) / 1000
+        self.warm_tts = warm_tts
+        self.started = 0
+        self.outcomes = {"committed": 0, "discarded": 0, "unused": 0}
+        self.saved_seconds = 0.0
+        self.tts_warmups = 0
+        self._turns: Dict[int, _Turn] = {}
+        self._background: Set[asyncio.Task] = set()
+
+    def on_partial(self, text: str, turn_order: int, settled: bool = False):
+        """Feed a partial transcript; `settled` for the unformatted end-of-turn one"""
+        turn = self._turns.get(turn_order)
+        if turn is None:
+            turn = self._turns[turn_order] = _Turn()
+            self._warm()
+        if turn.ended:
+            return
+        if turn.timer is not None:
+            turn.timer.cancel()
+            turn.timer = None
+
+        intent_data = self.intents.detect_intent(text)
+        key = intent_key(intent_data)
+        if key is None:
+            turn.candidate, turn.streak = None, 0
+            return
+        if key == turn.candidate:
+            turn.streak += 1
+        else:
+            turn.candidate, turn.streak = key, 1
+        if key == turn.key:
+            return
+        if settled or turn.streak >= self.stable_partials:
+            self._start(turn, key, intent_data)
+        elif self.stable_delay:
+            # No newer partial for a while (the user paused): stable enough as well
+            turn.timer = asyncio.get_running_loop().call_later(self.stable_delay, self._start, turn, key, intent_data)
+
+    def end_turn(self, turn_order: int):
+        """The final transcript of `turn_order` arrived; its speculation waits for `take`"""
+        turn = self._turns.get(turn_order)
+        if turn is not None:
+            turn.ended = True
+            if turn.timer is not None:
+                turn.timer.cancel()
+                turn.timer = None
+
+    def take(self, intent_data: Optional[Dict[str, Any]]) -> Optional[asyncio.Task]:
+        """The speculative lookup for the final intent of the turns just answered, if any.
+
+        Speculations of every ended turn are settled here (coalesced turns
+        share one reply): the first that matches is committed, the rest are
+        discarded. Turns still being spoken are left alone.
+        """
+        ended = [order for order, turn in self._turns.items() if turn.ended]
+        if not ended:
+            return None
+        latest = max(ended)
+        key = intent_key(intent_data)
+        match = None
+        for order in sorted(o for o in self._turns if o <= latest):
+            turn = self._turns.pop(order)
+            if turn.timer is not None:
+                turn.timer.cancel()
+            if turn.task is None:
+                continue
+            if match is None and turn.key == key:
+                match = turn
+            else:
+                self._settle(turn, "discarded")
+        if match is None:
+            return None
+
+        # Lookup time already behind us: all of it if the result is in, else the head start
+        saved = (match.done_at or time.monotonic()) - match.started
+        self.saved_seconds += saved
+        self.metrics.speculation_saved.observe(saved)
+        self._count("committed")
+        return match.task
+
+    def _start(self, turn: _Turn, key: IntentKey, intent_data: Dict[str, Any]):
+        turn.timer = None
+        if turn.ended:
+            return
+        if turn.task is not None:
+            self._settle(turn, "discarded")
+        turn.key = key
+        turn.started = time.monotonic()
+        turn.done_at = None
+        turn.task = asyncio.create_task(self.skills.execute_skill(intent_data))
+        turn.task.add_done_callback(lambda task, turn=turn: self._landed(turn, task))
+        self.started += 1
+        log.debug(f"Speculative lookup started: {intent_data}")
+
+    def _landed(self, turn: _Turn, task: asyncio.Task):
+        if turn.task is task:
+            turn.done_at = time.monotonic()
+        # Mark the exception retrieved; a committed lookup still raises it when awaited
+        if not task.cancelled():
+            task.exception()
+
+    def _settle(self, turn: _Turn, outcome: str):
+        if not turn.task.done():
+            turn.task.cancel()
+        turn.task = None
+        self._count(outcome)
+
+    def _count(self, outcome: str):
+        self.outcomes[outcome] += 1
+        self.metrics.speculations.inc(outcome=outcome)
+
+    def _warm(self):
+        if self.warm_tts is None:
+            return
+        self.tts_warmups += 1
+        task = asyncio.create_task(self.warm_tts())
+        self._background.add(task)
+        task.add_done_callback(self._warmed)
+
+    def _warmed(self, task: asyncio.Task):
+        self._background.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            log.debug(f"Murf warmup failed: {task.exception()}")
+
+    async def aclose(self):
+        """Cancel lookups nobody will commit"""
+        for turn in self._turns.values():
+            if turn.timer is not None:
+                turn.timer.cancel()
+            if turn.task is not None:
+                self._settle(turn, "unused")
+        self._turns.clear()
+        for task in list(self._background):
+            task.cancel()
+
+    def stats(self) -> Dict[str, Any]:
+        settled = sum(self.outcomes.values())
+        committed = self.outcomes["committed"]
+        return {
+            "started": self.started,
+            **self.outcomes,
+            "pending": sum(1 for turn in self._turns.values() if turn.task is not None),
+            "hit_rate": round(committed / settled, 4) if settled else None,
+            "saved_ms_mean": round(self.saved_seconds / committed * 1000, 1) if committed else None,
+            "tts_warmups": self.tts_warmups,
+        }
@@ -0,0 +1,95 @@
+import asyncio
+import logging
+import time
+from typing import Any, Dict, List, Optional
+
+from app.core.config import get_config
+from app.services.llm_service import LLMService
+from app.services.metrics import Metrics
+from app.services.prompt_builder import USER, PromptWindow, Turn
+
+log = logging.getLogger("lumeai.summarizer")
+
+SUMMARY_INSTRUCTION = (
+    "Summarize this conversation between a user and a voice assistant in at most {words} words. "
+    "Keep names, facts, preferences and open questions the assistant may need later. "
+    "Write plain prose in the third person, without a preamble."
+)
+
+def summary_prompt(summary: str, turns: List[Turn], words: int) -> str:
+    """Prompt that folds `turns` into the running `summary`"""
+    lines = [SUMMARY_INSTRUCTION.format(words=words), ""]
+    if summary:
+        lines.append(f"Summary so far: {summary}")
+    for role, text, _ in turns:
+        lines.append(f"{'User' if role == USER else 'Assistant'}: {text}")
+    return "\n".join(lines)
+
+class HistorySummarizer:
+    """Rolling summaries of long conversations, made off the reply path.
+
+    After a reply, `maybe_compact` checks the session's prompt window; past
+    `threshold` tokens it folds all but the newest `keep_turns` turns into
+    the window's summary with a background Gemini call, so later prompts
+    are the summary plus recent turns instead of the whole conversation.
+    At most one summary per window is in flight; a summary that comes back
+    after the window moved on (trimmed, reset) is dropped.
+    """
+
+    def __init__(
+        self,
+        llm: LLMService,
+        metrics: Optional[Metrics] = None,
+        threshold: Optional[int] = None,
+        keep_turns: Optional[int] = None,
+        words: Optional[int] = None,
+    ):
+        config = get_config()
+        self.llm = llm
+        self.metrics = metrics or Metrics()
+        self.threshold = threshold if threshold is not None else config.PROMPT_SUMMARY_TOKENS
+        self.keep_turns = keep_turns if keep_turns is not None else config.PROMPT_SUMMARY_KEEP_TURNS
+        self.words = words or config.PROMPT_SUMMARY_WORDS
+        self.enabled = config.PROMPT_SUMMARY_ENABLED and self.threshold > 0
+        self.outcomes = {"applied": 0, "stale": 0, "failed": 0}
+        self._running: Dict[int, asyncio.Task] = {}
+
+    def maybe_compact(self, window: PromptWindow, api_key: Optional[str] = None) -> Optional[asyncio.Task]:
+        """Start summarizing the oldest turns of `window` if it is long enough"""
+        if not self.enabled or id(window) in self._running:
+            return None
+        head = window.compactable(self.threshold, self.keep_turns)
+        if not head:
+            return None
+        task = asyncio.create_task(self._compact(window, head, api_key))
+        self._running[id(window)] = task
+        task.add_done_callback(lambda _, key=id(window): self._running.pop(key, None))
+        return task
+
+    async def _compact(self, window: PromptWindow, head: List[Turn], api_key: Optional[str]):
+        started = time.monotonic()
+        summary = await self.llm.generate_response(summary_prompt(window.summary, head, self.words), api_key=api_key)
+        self.metrics.summary_seconds.observe(time.monotonic() - started)
+        if not summary or not summary.strip():
+            outcome = "failed"
+        elif window.compact(head, summary.strip()):
+            outcome = "applied"
+            log.debug(f"Summarized {len(head)} turns; prompt now {window.prompt_tokens} tokens")
+        else:
+            outcome = "stale"
+        self.outcomes[outcome] += 1
+        self.metrics.summaries.inc(outcome=outcome)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "threshold_tokens": self.threshold,
+            "keep_turns": self.keep_turns,
+            "running": len(self._running),
+            **self.outcomes,
+        }
+
+    async def aclose(self):
+        for task in list(self._running.values()):
+            task.cancel()
+        self._running.clear()
@@ -0,0 +1,425 @@
+import time
+import uuid
+import wave
+import asyncio
+import logging
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+import numpy as np
+from assemblyai.streaming.v3 import (
+    StreamingClient, StreamingClientOptions, StreamingEvents, StreamingParameters,
+)
+
+from app.core.config import get_config
+from app.core.constants import FALLBACK_TEXT, UPLOADS_DIR
+from app.services.audio_ingest import stream_sink
+from app.services.intent_service import IntentService
+from app.services.llm_service import LLMService
+from app.services.metrics import Metrics
+from app.services.prompt_builder import MODEL, USER, PromptWindow
+from app.services.skills_service import SkillsService
+from app.services.turns import RecentTranscripts
+
+log = logging.getLogger("lumeai.transcriptions")
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+RAW_PCM_EXTENSIONS = {".pcm", ".raw"}
+# Silence appended to every file so its last utterance still ends on silence
+TRAILING_SILENCE_MS = 1000
+# Output samples per vectorized resampling step
+RESAMPLE_BLOCK = 16384
+
+class JobError(Exception):
+    status_code = 400
+
+class JobNotFound(JobError):
+    status_code = 404
+
+class JobQueueFull(JobError):
+    status_code = 503
+
+class UnsupportedAudio(JobError):
+    status_code = 415
+
+def read_audio(path: Path, pcm_sample_rate: int):
+    """Samples of a WAV or raw 16-bit PCM file as mono float32 in [-1, 1), and their rate"""
+    suffix = path.suffix.lower()
+    if suffix in RAW_PCM_EXTENSIONS:
+        data = path.read_bytes()
+        samples = np.frombuffer(data, dtype="<i2", count=len(data) // 2).astype(np.float32) / 32768.0
+        return samples, pcm_sample_rate
+    if suffix != ".wav":
+        raise UnsupportedAudio(f"Cannot transcribe {suffix or 'extensionless'} files; upload WAV or raw 16-bit PCM")
+
+    try:
+        with wave.open(str(path), "rb") as wav:
+            channels, width, rate = wav.getnchannels(), wav.getsampwidth(), wav.getframerate()
+            data = wav.readframes(wav.getnframes())
+    except (wave.Error, EOFError) as e:
+        raise JobError(f"Unsupported WAV file: {e}")
+
+    if width == 1:
+        samples = (np.frombuffer(data, dtype=np.uint8).astype(np.float32) - 128.0) / 128.0
+    elif width == 2:
+        samples = np.frombuffer(data, dtype="<i2").astype(np.float32) / 32768.0
+    elif width == 3:
+        raw = np.frombuffer(data, dtype=np.uint8).reshape(-1, 3).astype(np.int32)
+        # Little-endian 24-bit, sign-extended through the top byte
+        joined = (raw[:, 0] | (raw[:, 1] << 8) | (raw[:, 2] << 16)) << 8 >> 8
+        samples = joined.astype(np.float32) / 8388608.0
+    elif width == 4:
+        samples = np.frombuffer(data, dtype="<i4").astype(np.float32) / 2147483648.0
+    else:
+        raise JobError(f"Unsupported WAV sample width: {width} bytes")
+
+    if channels > 1:
+        samples = samples[: len(samples) - len(samples) % channels].reshape(-1, channels).mean(axis=1)
+    return samples, rate
+
+def _lowpass(ratio: float) -> np.ndarray:
+    """Hann-windowed sinc at the Nyquist frequency of a rate `ratio` times lower"""
+    cutoff = 0.5 / ratio
+    n = np.arange(-16 * int(np.ceil(ratio)), 16 * int(np.ceil(ratio)) + 1)
+    taps = 2 * cutoff * np.sinc(2 * cutoff * n) * np.hanning(n.size)
+    return (taps / taps.sum()).astype(np.float32)
+
+def resample(samples: np.ndarray, source_rate: int, target_rate: int) -> np.ndarray:
+    """Band-limited resampling with vectorized numpy, a block of output at a time.
+
+    When downsampling, only the output samples are low-pass filtered (each
+    is a dot product of the filter with a strided window of the input, so
+    one matrix-vector product per block), which keeps higher frequencies
+    from aliasing into the speech band. Fractional positions are then
+    interpolated linearly. Working in blocks bounds both the temporary
+    memory and how long any single numpy call holds the GIL, so live
+    sessions on the event loop keep running alongside a batch job.
+    """
+    if source_rate == target_rate or samples.size == 0:
+        return samples.astype(np.float32, copy=False)
+    ratio = source_rate / target_rate
+    taps = _lowpass(ratio) if ratio > 1 else np.ones(1, dtype=np.float32)
+    half = taps.size // 2
+    windows = np.lib.stride_tricks.sliding_window_view(
+        np.pad(samples.astype(np.float32, copy=False), (half, half)), taps.size
+    )
+    last = samples.size - 1
+    out = np.empty(int(samples.size / ratio), dtype=np.float32)
+    for start in range(0, out.size, RESAMPLE_BLOCK):
+        positions = np.arange(start, min(start + RESAMPLE_BLOCK, out.size)) * ratio
+        left = positions.astype(np.int64)
+        frac = (positions - left).astype(np.float32)
+        block = windows[left] @ taps
+        if frac.any():
+            block += (windows[np.minimum(left + 1, last)] @ taps - block) * frac
+        out[start:start + block.size] = block
+    return out
+
+def to_pcm16(samples: np.ndarray) -> bytes:
+    out = np.empty(samples.size, dtype="<i2")
+    for start in range(0, samples.size, RESAMPLE_BLOCK):
+        out[start:start + RESAMPLE_BLOCK] = np.clip(samples[start:start + RESAMPLE_BLOCK] * 32768.0, -32768, 32767)
+    return out.tobytes()
+
+@dataclass
+class TranscriptionJob:
+    id: str
+    filename: str
+    persona: str
+    sample_rate: int  # of raw PCM uploads; WAV files carry their own
+    api_keys: Dict[str, str] = field(default_factory=dict, repr=False)
+    status: str = QUEUED
+    submitted_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    audio_seconds: Optional[float] = None
+    turns: List[Dict[str, str]] = field(default_factory=list)
+    error: Optional[str] = None
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "job_id": self.id,
+            "filename": self.filename,
+            "status": self.status,
+            "submitted_at": self.submitted_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "audio_seconds": self.audio_seconds,
+            "turns": len(self.turns),
+            "error": self.error,
+        }
+
+    def result(self) -> Dict[str, Any]:
+        return {**self.summary(), "turns": list(self.turns)}
+
+class TranscriptionJobs:
+    """Bounded worker pool that runs uploaded audio through the voice pipeline.
+
+    Each job decodes a WAV or raw PCM file and resamples it to the STT rate
+    off the event loop, streams it to AssemblyAI in `AUDIO_FRAME_MS` frames
+    (paced at `TRANSCRIBE_REALTIME_FACTOR` times real time, 0 for unpaced),
+    and answers every end-of-turn transcript in order with the same
+    intent -> skill -> Gemini routing as the chat endpoint, keeping the file's
+    own prompt window. At most `TRANSCRIBE_WORKERS` jobs run at once and at
+    most `TRANSCRIBE_QUEUE_MAX` wait, so batch work takes a fixed, small share
+    of the Gemini pool and AssemblyAI connections away from live sessions.
+    Finished jobs are kept for `TRANSCRIBE_JOBS_KEPT` lookups, oldest dropped.
+    """
+
+    def __init__(
+        self,
+        intents: IntentService,
+        skills: SkillsService,
+        llm: LLMService,
+        metrics: Optional[Metrics] = None,
+        workers: Optional[int] = None,
+        max_queued: Optional[int] = None,
+        directory: Optional[Path] = None,
+    ):
+        config = get_config()
+        self.config = config
+        self.intents = intents
+        self.skills = skills
+        self.llm = llm
+        self.metrics = metrics or Metrics()
+        self.workers = workers or config.TRANSCRIBE_WORKERS
+        self.max_queued = max_queued or config.TRANSCRIBE_QUEUE_MAX
+        self.max_kept = config.TRANSCRIBE_JOBS_KEPT
+        self.realtime_factor = config.TRANSCRIBE_REALTIME_FACTOR
+        self.directory = Path(directory or UPLOADS_DIR)
+        self.submitted = 0
+        self.rejected = 0
+        self.running = 0
+        self._jobs: "OrderedDict[str, TranscriptionJob]" = OrderedDict()
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+
+    @property
+    def queued(self) -> int:
+        return self._queue.qsize() if self._queue is not None else 0
+
+    def start(self):
+        """Start the workers on the running loop"""
+        if self._tasks:
+            return
+        self._queue = asyncio.Queue(maxsize=self.max_queued)
+        self._tasks = [asyncio.create_task(self._worker(), name=f"transcribe-{i}") for i in range(self.workers)]
+
+    async def submit(
+        self,
+        filename: str,
+        persona: Optional[str] = None,
+        sample_rate: Optional[int] = None,
+        api_keys: Optional[Dict[str, str]] = None,
+    ) -> TranscriptionJob:
+        """Queue a stored upload for transcription; raises JobError if it cannot be"""
+        if self._queue is None:
+            raise JobQueueFull("Transcription workers are not running")
+        # Only names inside the uploads directory, as returned by /api/upload-audio
+        if not filename or Path(filename).name != filename or filename.startswith("."):
+            raise JobError("Expected the filename returned by /api/upload-audio")
+        if not await asyncio.to_thread((self.directory / filename).is_file):
+            raise JobNotFound(f"No uploaded file named {filename}")
+        suffix = Path(filename).suffix.lower()
+        if suffix != ".wav" and suffix not in RAW_PCM_EXTENSIONS:
+            raise UnsupportedAudio(f"Cannot transcribe {suffix or 'extensionless'} files; upload WAV or raw 16-bit PCM")
+        persona_key = (persona or "default").lower().strip()
+
+        job = TranscriptionJob(
+            id=uuid.uuid4().hex,
+            filename=filename,
+            persona=self.config.PERSONAS.get(persona_key, self.config.PERSONAS["default"]),
+            sample_rate=sample_rate or self.config.AUDIO_SAMPLE_RATE,
+            api_keys={k: v for k, v in (api_keys or {}).items() if v},
+        )
+        try:
+            self._queue.put_nowait(job)
+        except asyncio.QueueFull:
+            self.rejected += 1
+            self.metrics.transcription_jobs.inc(status="rejected")
+            raise JobQueueFull(f"Transcription queue is full ({self.max_queued} jobs waiting)")
+
+        self.submitted += 1
+        self._jobs[job.id] = job
+        self._forget_finished()
+        return job
+
+    def get(self, job_id: str) -> TranscriptionJob:
+        job = self._jobs.get(job_id)
+        if job is None:
+            raise JobNotFound(f"Unknown transcription job {job_id}")
+        return job
+
+    def _forget_finished(self):
+        finished = [j.id for j in self._jobs.values() if j.status in (DONE, FAILED)]
+        for job_id in finished[: max(0, len(finished) - self.max_kept)]:
+            del self._jobs[job_id]
+
+    async def _worker(self):
+        while True:
+            job = await self._queue.get()
+            try:
+                await self._run(job)
+            finally:
+                self._queue.task_done()
+
+    async def _run(self, job: TranscriptionJob):
+        job.status = RUNNING
+        job.started_at = time.time()
+        self.running += 1
+        started = time.monotonic()
+        try:
+            pcm = await asyncio.to_thread(self._prepare, job)
+            job.audio_seconds = round(len(pcm) / (2 * self.config.AUDIO_SAMPLE_RATE), 3)
+            await self._transcribe(job, pcm)
+            job.status = DONE
+            self.metrics.transcription_audio.inc(job.audio_seconds)
+        except asyncio.CancelledError:
+            job.status, job.error = FAILED, "cancelled"
+            raise
+        except Exception as e:
+            job.status, job.error = FAILED, str(e)
+            log.warning(f"Transcription job {job.id} ({job.filename}) failed: {e}")
+        finally:
+            self.running -= 1
+            job.finished_at = time.time()
+            job.api_keys = {}
+            self.metrics.transcription_jobs.inc(status=job.status)
+            self.metrics.transcription_job_seconds.observe(time.monotonic() - started)
+            log.info(f"Transcription job {job.id}: {job.status}, {len(job.turns)} turns, {job.audio_seconds} s of audio")
+
+    def _prepare(self, job: TranscriptionJob) -> bytes:
+        """Decoded, resampled 16-bit PCM of the job's file (worker thread)"""
+        samples, rate = read_audio(self.directory / job.filename, job.sample_rate)
+        target = self.config.AUDIO_SAMPLE_RATE
+        pcm = to_pcm16(resample(samples, rate, target))
+        return pcm + bytes(target * 2 * TRAILING_SILENCE_MS // 1000)
+
+    def _frames(self, pcm: bytes) -> Iterator[bytes]:
+        frame_ms = self.config.AUDIO_FRAME_MS
+        frame_bytes = self.config.AUDIO_SAMPLE_RATE * 2 * frame_ms // 1000
+        started = time.monotonic()
+        for index, offset in enumerate(range(0, len(pcm), frame_bytes)):
+            if self.realtime_factor > 0:
+                delay = started + index * frame_ms / 1000 / self.realtime_factor - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+            yield pcm[offset:offset + frame_bytes]
+
+    def _stream(self, client: StreamingClient, pcm: bytes):
+        """Send the whole file upstream and close the last turn (worker thread)"""
+        try:
+            stream_sink(client)(self._frames(pcm))
+            client.force_endpoint()
+        finally:
+            # Waits for the Termination event, so every turn has been delivered
+            client.disconnect(terminate=True)
+
+    async def _transcribe(self, job: TranscriptionJob, pcm: bytes):
+        loop = asyncio.get_running_loop()
+        transcripts: asyncio.Queue = asyncio.Queue()
+        recent = RecentTranscripts()
+        errors: List[str] = []
+
+        def on_turn(client, event):
+            text = event.transcript.strip()
+            if not event.end_of_turn or not getattr(event, "turn_is_formatted", False) or not text:
+                return
+            if recent.seen(text, event.turn_order):
+                self.metrics.transcripts_deduplicated.inc()
+                return
+            loop.call_soon_threadsafe(transcripts.put_nowait, text)
+
+        def on_error(client, error):
+            self.metrics.upstream_errors.inc(provider="assemblyai")
+            errors.append(str(error))
+
+        api_key = job.api_keys.get("assembly_key") or self.config.ASSEMBLYAI_API_KEY
+        if not api_key:
+            raise JobError("Missing AssemblyAI API key")
+
+        def connect() -> StreamingClient:
+            # Building the client alone takes tens of milliseconds; keep it off the loop too
+            client = StreamingClient(StreamingClientOptions(api_key=api_key, api_host=self.config.ASSEMBLYAI_API_HOST))
+            client.on(StreamingEvents.Turn, on_turn)
+            client.on(StreamingEvents.Error, on_error)
+            client.connect(StreamingParameters(
+                sample_rate=self.config.AUDIO_SAMPLE_RATE,
+                format_turns=True,
+                end_of_turn_confidence_threshold=0.75,
+                min_end_of_turn_silence_when_confident=160,
+                max_turn_silence=2400,
+            ))
+            return client
+
+        connect_started = time.monotonic()
+        try:
+            client = await asyncio.to_thread(connect)
+        except Exception:
+            self.metrics.upstream("assemblyai", error=True)
+            raise
+        self.metrics.upstream("assemblyai", time.monotonic() - connect_started)
+
+        # Replies run while the rest of the file is still being transcribed
+        replies = asyncio.create_task(self._reply_all(job, transcripts))
+        try:
+            await asyncio.to_thread(self._stream, client, pcm)
+        finally:
+            transcripts.put_nowait(None)
+            await replies
+        if errors and not job.turns:
+            raise JobError(f"Speech recognition error: {errors[0]}")
+
+    async def _reply_all(self, job: TranscriptionJob, transcripts: asyncio.Queue):
+        history = PromptWindow()
+        skills = self.skills.with_keys(
+            weather_key=job.api_keys.get("weather_key", ""),
+            news_key=job.api_keys.get("news_key", ""),
+            tmdb_key=job.api_keys.get("tmdb_key", ""),
+        )
+        gemini_key = job.api_keys.get("gemini_key") or self.config.GEMINI_API_KEY
+        while True:
+            text = await transcripts.get()
+            if text is None:
+                return
+            history.append(USER, text)
+            intent_data = self.intents.detect_intent(text)
+            if intent_data and intent_data.get("intent"):
+                source = "skill"
+                reply = await skills.execute_skill(intent_data)
+            else:
+                source = "llm"
+                reply = await self.llm.generate_response(
+                    history.contents(), api_key=gemini_key, system_instruction=job.persona
+                ) or FALLBACK_TEXT
+            history.append(MODEL, reply)
+            job.turns.append({"transcript": text, "reply": reply, "source": source})
+
+    async def aclose(self):
+        """Stop the workers; running jobs are marked failed"""
+        for task in self._tasks:
+            task.cancel()
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def stats(self) -> Dict[str, Any]:
+        statuses: Dict[str, int] = {}
+        for job in self._jobs.values():
+            statuses[job.status] = statuses.get(job.status, 0) + 1
+        return {
+            "workers": self.workers,
+            "running": self.running,
+            "queued": self.queued,
+            "max_queued": self.max_queued,
+            "submitted": self.submitted,
+            "rejected": self.rejected,
+            "kept": len(self._jobs),
+            "by_status": statuses,
+        }
@@ -0,0 +1,177 @@
+import os
+import json
+import struct
+import asyncio
+import hashlib
+import logging
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import aiofiles
+
+from app.core.config import get_config
+from app.core.constants import TTS_CACHE_DIR
+from app.services.metrics import Metrics
+
+log = logging.getLogger("lumeai.tts_cache")
+
+# Each chunk is stored as a big-endian u32 length followed by the audio bytes,
+# so hits replay with Murf's original chunk boundaries
+_CHUNK_LENGTH = struct.Struct("!I")
+_SUFFIX = ".audio"
+
+def synthesis_key(text: str, voice_config: Dict[str, Any], sample_rate: int, audio_format: str) -> str:
+    """Content address of one synthesized utterance"""
+    voice = json.dumps(voice_config, sort_keys=True, separators=(",", ":"))
+    material = "\x1f".join((text.strip(), voice, str(sample_rate), audio_format))
+    return hashlib.sha256(material.encode()).hexdigest()
+
+def pack_chunks(chunks: List[bytes]) -> bytes:
+    return b"".join(_CHUNK_LENGTH.pack(len(c)) + c for c in chunks)
+
+def unpack_chunks(data: bytes) -> List[bytes]:
+    chunks, offset = [], 0
+    while offset < len(data):
+        (length,) = _CHUNK_LENGTH.unpack_from(data, offset)
+        offset += _CHUNK_LENGTH.size
+        chunks.append(data[offset:offset + length])
+        offset += length
+    return chunks
+
+class TTSAudioCache:
+    """Content-addressed on-disk cache of synthesized utterances.
+
+    Files live under `directory/<first two hex digits>/<key>.audio`. The
+    in-memory index keeps LRU order (seeded from file mtimes on startup, and
+    hits touch the file), and entries are evicted oldest-first once the
+    total exceeds `max_bytes`. Writes go to a temporary file and are renamed
+    into place, so a crash never leaves a truncated entry behind.
+    """
+
+    def __init__(
+        self,
+        directory: Optional[Path] = None,
+        max_bytes: Optional[int] = None,
+        metrics: Optional[Metrics] = None,
+    ):
+        self.directory = Path(directory or TTS_CACHE_DIR)
+        self.max_bytes = max_bytes or get_config().TTS_CACHE_MAX_BYTES
+        self.metrics = metrics or Metrics()
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.evictions = 0
+        self.bytes_saved = 0
+        self.total_bytes = 0
+        self._index: "OrderedDict[str, int]" = OrderedDict()
+        self._writing: set = set()
+        self._loaded = False
+
+    def _path(self, key: str) -> Path:
+        return self.directory / key[:2] / f"{key}{_SUFFIX}"
+
+    def _scan(self):
+        """Rebuild the index from disk, least recently used first"""
+        entries = []
+        if self.directory.exists():
+            for path in self.directory.glob(f"*/*{_SUFFIX}"):
+                try:
+                    stat = path.stat()
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, path.stem, stat.st_size))
+        entries.sort()
+        self._index = OrderedDict((key, size) for _, key, size in entries)
+        self.total_bytes = sum(self._index.values())
+
+    async def load(self):
+        """Index whatever a previous run left on disk (once)"""
+        if not self._loaded:
+            self._loaded = True
+            await asyncio.to_thread(self._scan)
+            if self._index:
+                log.info(f"TTS cache: {len(self._index)} entries, {self.total_bytes} bytes on disk")
+
+    async def get(self, key: str) -> Optional[List[bytes]]:
+        """Audio chunks for a key, or None on a miss"""
+        await self.load()
+        if key not in self._index:
+            self.misses += 1
+            self.metrics.tts_cache_lookups.inc(result="miss")
+            return None
+        path = self._path(key)
+        try:
+            async with aiofiles.open(path, "rb") as f:
+                data = await f.read()
+            await asyncio.to_thread(os.utime, path)
+        except OSError as e:
+            log.warning(f"TTS cache entry {key} unreadable: {e}")
+            self.total_bytes -= self._index.pop(key, 0)
+            self.misses += 1
+            self.metrics.tts_cache_lookups.inc(result="miss")
+            return None
+
+        self._index.move_to_end(key)
+        chunks = unpack_chunks(data)
+        saved = sum(len(c) for c in chunks)
+        self.hits += 1
+        self.bytes_saved += saved
+        self.metrics.tts_cache_lookups.inc(result="hit")
+        self.metrics.tts_cache_bytes_saved.inc(saved)
+        return chunks
+
+    async def put(self, key: str, chunks: List[bytes]):
+        """Store a complete utterance and evict down to the size cap"""
+        await self.load()
+        data = pack_chunks(chunks)
+        if not chunks or len(data) > self.max_bytes or key in self._index or key in self._writing:
+            return
+        path = self._path(key)
+        tmp = path.with_suffix(f".{os.getpid()}.tmp")
+        self._writing.add(key)
+        try:
+            await asyncio.to_thread(path.parent.mkdir, parents=True, exist_ok=True)
+            async with aiofiles.open(tmp, "wb") as f:
+                await f.write(data)
+            await asyncio.to_thread(os.replace, tmp, path)
+        except OSError as e:
+            log.warning(f"Could not store TTS cache entry {key}: {e}")
+            return
+        finally:
+            self._writing.discard(key)
+
+        self._index[key] = len(data)
+        self.total_bytes += len(data)
+        self.stores += 1
+        evicted = []
+        while self.total_bytes > self.max_bytes and self._index:
+            old_key, size = self._index.popitem(last=False)
+            self.total_bytes -= size
+            self.evictions += 1
+            evicted.append(self._path(old_key))
+        if evicted:
+            await asyncio.to_thread(self._unlink, evicted)
+
+    @staticmethod
+    def _unlink(paths: List[Path]):
+        for path in paths:
+            try:
+                path.unlink()
+            except OSError:
+                pass
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "directory": str(self.directory),
+            "entries": len(self._index),
+            "bytes": self.total_bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "stores": self.stores,
+            "evictions": self.evictions,
+            "bytes_saved": self.bytes_saved,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
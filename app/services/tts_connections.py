@@ -0,0 +1,220 @@
+import json
+import time
+import uuid
+import asyncio
+import logging
+import websockets
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, Optional, Set, Tuple
+
+from app.core.config import get_config
+
+log = logging.getLogger("lumeai.tts_connections")
+
+# Pushed into a context's inbox when its socket drops mid-utterance
+CONNECTION_LOST = object()
+
+# Output requested from Murf on every socket
+MURF_SAMPLE_RATE = 44100
+MURF_FORMAT = "WAV"
+
+def new_context_id() -> str:
+    return f"lumeai-{uuid.uuid4().hex[:16]}"
+
+class MurfConnection:
+    """One warm Murf stream-input socket shared by many utterances.
+
+    Each utterance gets its own context id; a single reader task routes
+    incoming audio to the matching context's inbox. The voice config is sent
+    once per socket, and a socket that idled out is reopened transparently
+    before a context's first message. Once closed for good (`aclose`, e.g.
+    evicted from the pool) it refuses to reopen, so no socket outlives it.
+    """
+
+    def __init__(self, url: str, api_key: str, voice_config: Dict[str, Any]):
+        self.url = url
+        self.api_key = api_key
+        self.voice_config = voice_config
+        self.ws = None
+        self.connects = 0
+        self.last_used = time.monotonic()
+        self.closed = False
+        self._alive = False
+        self._reader: Optional[asyncio.Task] = None
+        self._lock = asyncio.Lock()
+        self._inboxes: Dict[str, asyncio.Queue] = {}
+        self._streaming: Set[str] = set()
+
+    @property
+    def active_contexts(self) -> int:
+        return len(self._inboxes)
+
+    @property
+    def is_open(self) -> bool:
+        return self._alive
+
+    @property
+    def connecting(self) -> bool:
+        return self._lock.locked()
+
+    async def ensure_open(self):
+        """Connect (or reconnect) and send the voice config"""
+        async with self._lock:
+            if self._alive:
+                return
+            if self.closed:
+                raise ConnectionError("Murf connection is closed")
+            uri = f"{self.url}?api-key={self.api_key}&sample_rate={MURF_SAMPLE_RATE}&channel_type=MONO&format={MURF_FORMAT}"
+            ws = await websockets.connect(uri, ping_interval=20, ping_timeout=10)
+            try:
+                if self.closed:
+                    # Closed while connecting: nothing would ever close this socket
+                    raise ConnectionError("Murf connection is closed")
+                await asyncio.wait_for(ws.send(json.dumps({"voice_config": self.voice_config})), timeout=5.0)
+            except Exception:
+                await ws.close()
+                raise
+            if self.connects:
+                log.info("Reconnected Murf socket")
+            self.connects += 1
+            self.ws = ws
+            self._alive = True
+            self._reader = asyncio.create_task(self._read_loop(ws))
+
+    async def _read_loop(self, ws):
+        try:
+            async for raw in ws:
+                data = json.loads(raw)
+                inbox = self._inboxes.get(data.get("context_id"))
+                if inbox is None and len(self._streaming) == 1:
+                    # Replies without a context id can only belong to the one live utterance
+                    inbox = self._inboxes.get(next(iter(self._streaming)))
+                if inbox is not None:
+                    inbox.put_nowait(data)
+        except websockets.ConnectionClosed:
+            pass
+        except Exception as e:
+            log.warning(f"Murf reader error: {e}")
+        finally:
+            if self.ws is ws:
+                self._alive = False
+                for context_id in self._streaming:
+                    self._inboxes[context_id].put_nowait(CONNECTION_LOST)
+                self._streaming.clear()
+
+    @asynccontextmanager
+    async def context(self) -> AsyncIterator[Tuple[str, asyncio.Queue]]:
+        """Reserve a fresh context id and its inbox for one utterance"""
+        context_id = new_context_id()
+        inbox: asyncio.Queue = asyncio.Queue()
+        self._inboxes[context_id] = inbox
+        try:
+            yield context_id, inbox
+        finally:
+            self._inboxes.pop(context_id, None)
+            self._streaming.discard(context_id)
+            self.last_used = time.monotonic()
+
+    async def send(self, context_id: str, payload: Dict[str, Any]):
+        """Send a message for a context, reopening the socket if it idled out"""
+        if context_id not in self._inboxes:
+            raise ConnectionError(f"Murf context {context_id} is closed")
+        message = json.dumps({**payload, "context_id": context_id})
+        first = context_id not in self._streaming
+        if first:
+            await self.ensure_open()
+        try:
+            await asyncio.wait_for(self.ws.send(message), timeout=5.0)
+        except websockets.ConnectionClosed:
+            if not first:
+                raise
+            # Closed between the check and the send; nothing of this context is lost yet
+            self._alive = False
+            await self.ensure_open()
+            await asyncio.wait_for(self.ws.send(message), timeout=5.0)
+        self._streaming.add(context_id)
+        self.last_used = time.monotonic()
+
+    async def clear(self, context_id: str):
+        """Drop a context's pending synthesis on Murf's side (best effort)"""
+        if context_id not in self._streaming or not self._alive:
+            return
+        try:
+            await asyncio.wait_for(self.ws.send(json.dumps({"context_id": context_id, "clear": True})), timeout=1.0)
+        except Exception as e:
+            log.debug(f"Could not clear Murf context {context_id}: {e}")
+
+    async def aclose(self):
+        self.closed = True
+        self._alive = False
+        if self._reader:
+            self._reader.cancel()
+        if self.ws is not None:
+            try:
+                await self.ws.close()
+            except Exception:
+                pass
+
+class MurfConnectionPool:
+    """Warm Murf sockets keyed by (API key, voice), evicted when idle"""
+
+    def __init__(self, url: Optional[str] = None, idle_timeout: Optional[float] = None):
+        config = get_config()
+        self.url = url or config.WS_URL
+        self.idle_timeout = idle_timeout or config.TTS_IDLE_TIMEOUT
+        self.evictions = 0
+        self._connections: Dict[Tuple[str, str], MurfConnection] = {}
+        self._sweeper: Optional[asyncio.Task] = None
+
+    def acquire(self, api_key: str, voice_config: Dict[str, Any]) -> MurfConnection:
+        """Get the shared connection for this key and voice (opened lazily)"""
+        key = (api_key, json.dumps(voice_config, sort_keys=True))
+        conn = self._connections.get(key)
+        if conn is None:
+            conn = MurfConnection(self.url, api_key, voice_config)
+            self._connections[key] = conn
+        # Not idle from here on, even before its socket is open
+        conn.last_used = time.monotonic()
+        if self._sweeper is None or self._sweeper.done():
+            self._sweeper = asyncio.create_task(self._sweep_loop())
+        return conn
+
+    async def open(self, api_key: str, voice_config: Dict[str, Any]) -> MurfConnection:
+        """Shared connection for this key and voice with its socket open"""
+        conn = self.acquire(api_key, voice_config)
+        await conn.ensure_open()
+        return conn
+
+    async def warm(self, api_key: str, voice_config: Dict[str, Any]):
+        """Open the socket ahead of the first utterance"""
+        await self.open(api_key, voice_config)
+
+    async def evict_idle(self):
+        now = time.monotonic()
+        for key, conn in list(self._connections.items()):
+            # One being opened is about to be used, however long the handshake takes
+            if conn.active_contexts == 0 and not conn.connecting and now - conn.last_used > self.idle_timeout:
+                del self._connections[key]
+                self.evictions += 1
+                await conn.aclose()
+
+    async def _sweep_loop(self):
+        while self._connections:
+            await asyncio.sleep(self.idle_timeout / 2)
+            await self.evict_idle()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "connections": len(self._connections),
+            "open": sum(1 for c in self._connections.values() if c.is_open),
+            "active_contexts": sum(c.active_contexts for c in self._connections.values()),
+            "connects": sum(c.connects for c in self._connections.values()),
+            "evictions": self.evictions,
+        }
+
+    async def aclose(self):
+        if self._sweeper:
+            self._sweeper.cancel()
+        connections, self._connections = list(self._connections.values()), {}
+        for conn in connections:
+            await conn.aclose()
@@ -1,25 +1,116 @@
-import json
+import base64
 import asyncio
-import websockets
 import logging
-from typing import Optional, Callable, Dict, Any
+import time
+from typing import Optional, Callable, Dict, Any, AsyncIterator, Tuple
+
+from app.services.metrics import Metrics
+from app.services.tts_cache import TTSAudioCache, synthesis_key
+from app.services.tts_connections import (
+    CONNECTION_LOST, MURF_FORMAT, MURF_SAMPLE_RATE, MurfConnectionPool, new_context_id,
+)
 
 log = logging.getLogger("lumeai.tts_service")
 
+async def _single(text: str) -> AsyncIterator[str]:
+    yield text
+
+DEFAULT_VOICE_CONFIG = {
+    "voiceId": "en-US-Natalie",
+    "style": "Conversational",
+    "rate": 0,
+    "pitch": 0,
+    "variation": 1
+}
+
 class TTSService:
     """Service for handling Text-to-Speech"""
-    
-    def __init__(self):
-        self.ws_url = "wss://api.murf.ai/v1/speech/stream-input"
-        self.context_id = "lumeai-context-123"
-    
+
+    def __init__(
+        self,
+        connections: Optional[MurfConnectionPool] = None,
+        metrics: Optional[Metrics] = None,
+        cache: Optional[TTSAudioCache] = None,
+    ):
+        self.connections = connections or MurfConnectionPool()
+        self.metrics = metrics or Metrics()
+        self.cache = cache
+        self.voice_config = DEFAULT_VOICE_CONFIG
+        self.recv_timeout = 10.0
+
     async def stream_tts(
-        self, 
-        text: str, 
+        self,
+        text: str,
         ws_callback: Optional[Callable[[Dict[str, Any]], Any]] = None,
         murf_key: str = None
     ):
-        """Stream TTS audio generation"""
+        """Stream TTS audio generation.
+
+        Whole utterances go through the audio cache when one is configured:
+        hits are replayed through the usual audio_start/audio_chunk/
+        audio_complete messages without contacting Murf, and misses are
+        stored once Murf has delivered the final chunk.
+        """
+        if self.cache is None or not ws_callback or not murf_key:
+            await self.stream_tts_segments(_single(text), ws_callback, murf_key)
+            return
+
+        key = synthesis_key(text, self.voice_config, MURF_SAMPLE_RATE, MURF_FORMAT)
+        chunks = await self.cache.get(key)
+        if chunks is not None:
+            await self._replay(chunks, ws_callback)
+            return
+
+        recorded: list = []
+
+        async def recording_callback(payload: Dict[str, Any]):
+            if payload.get("type") == "audio_chunk":
+                recorded.append(base64.b64decode(payload["audio"]))
+            await ws_callback(payload)
+
+        if await self.stream_tts_segments(_single(text), recording_callback, murf_key):
+            await self.cache.put(key, recorded)
+
+    async def _replay(self, chunks: list, ws_callback: Callable[[Dict[str, Any]], Any]):
+        """Send cached audio through the same messages a live synthesis uses"""
+        context_id = new_context_id()
+        await ws_callback({
+            "type": "audio_start",
+            "context_id": context_id,
+            "cached": True,
+            "message": "Starting audio generation..."
+        })
+        for number, chunk in enumerate(chunks, 1):
+            await ws_callback({
+                "type": "audio_chunk",
+                "audio": base64.b64encode(chunk).decode(),
+                "format": "wav_base64",
+                "context_id": context_id,
+                "chunk_number": number,
+                "is_final": number == len(chunks)
+            })
+        await ws_callback({
+            "type": "audio_complete",
+            "total_chunks": len(chunks),
+            "context_id": context_id,
+            "message": f"Audio generation complete with {len(chunks)} chunks"
+        })
+
+    async def stream_tts_segments(
+        self,
+        segments: AsyncIterator[str],
+        ws_callback: Optional[Callable[[Dict[str, Any]], Any]] = None,
+        murf_key: str = None
+    ) -> bool:
+        """Stream TTS for text that is still being generated.
+
+        Each segment is sent as soon as it arrives into this utterance's own
+        context on the shared Murf socket, while audio chunks are forwarded in
+        order. If TTS fails the segments are still drained so the text side
+        keeps flowing; errors from the segment source itself propagate.
+
+        Returns whether Murf delivered the utterance through its final marker.
+        """
         if not murf_key:
             log.warning("No MURF API key provided, skipping TTS")
             if ws_callback:
@@ -27,84 +118,126 @@ class TTSService:
                     "type": "audio_error",
                     "message": "MURF API key not configured"
                 })
-            return
-        
-        uri = f"{self.ws_url}?api-key={murf_key}&sample_rate=44100&channel_type=MONO&format=WAV&context_id={self.context_id}"
-        
+            async for _ in segments:
+                pass
+            return False
+
+        source_error: list = []
+        sender: Optional[asyncio.Task] = None
+        context_id: Optional[str] = None
+        first_text_at: list = []
+
         try:
-            async with websockets.connect(uri, ping_interval=20, ping_timeout=10) as ws:
-                # Voice config
-                voice_config = {
-                    "voice_config": {
-                        "voiceId": "en-US-Natalie", 
-                        "style": "Conversational", 
-                        "rate": 0, 
-                        "pitch": 0, 
-                        "variation": 1
-                    }
-                }
-                await asyncio.wait_for(ws.send(json.dumps(voice_config)), timeout=5.0)
-                
-                audio_chunks = []
-                
+            conn = await self.connections.open(murf_key, self.voice_config)
+
+            async with conn.context() as (context_id, inbox):
                 # Send audio start signal
                 if ws_callback:
                     await ws_callback({
-                        "type": "audio_start", 
-                        "context_id": self.context_id,
+                        "type": "audio_start",
+                        "context_id": context_id,
                         "message": "Starting audio generation..."
                     })
-                
-                # Send text for TTS
-                try:
-                    await asyncio.wait_for(ws.send(json.dumps({"text": text})), timeout=5.0)
-                    
+
+                async def send_segments():
+                    iterator = segments.__aiter__()
                     while True:
                         try:
-                            response = await asyncio.wait_for(ws.recv(), timeout=10.0)
-                            data = json.loads(response)
-                            
-                            if "audio" in data and data["audio"]:
-                                audio_b64 = data["audio"]
-                                audio_chunks.append(audio_b64)
-                                
-                                if ws_callback:
-                                    await ws_callback({
-                                        "type": "audio_chunk", 
-                                        "audio": audio_b64,
-                                        "format": "wav_base64",
-                                        "chunk_number": len(audio_chunks),
-                                        "is_final": data.get("final", False)
-                                    })
-                            
-                            if data.get("final"):
-                                break
-                                
-                        except asyncio.TimeoutError:
+                            segment = await iterator.__anext__()
+                        except StopAsyncIteration:
                             break
-                
-                except asyncio.TimeoutError:
-                    pass
-                
-                # Send end signal
+                        except Exception as e:
+                            # Text source failed: unblock the audio reader and bail out
+                            source_error.append(e)
+                            inbox.put_nowait(CONNECTION_LOST)
+                            raise
+                        if not first_text_at:
+                            first_text_at.append(time.monotonic())
+                        await conn.send(context_id, {"text": segment})
+                    await conn.send(context_id, {"end": True})
+
+                sender = asyncio.create_task(send_segments())
                 try:
-                    await asyncio.wait_for(ws.send(json.dumps({"end": True})), timeout=5.0)
-                    
-                    if ws_callback:
-                        await ws_callback({
-                            "type": "audio_complete",
-                            "total_chunks": len(audio_chunks),
-                            "context_id": self.context_id,
-                            "message": f"Audio generation complete with {len(audio_chunks)} chunks"
-                        })
-                        
-                except Exception:
-                    pass
-                    
+                    chunk_count, complete = await self._forward_audio(
+                        context_id, inbox, sender, ws_callback, first_text_at
+                    )
+                    await sender
+                except asyncio.CancelledError:
+                    # Barge-in: stop the text source (and with it the LLM
+                    # stream), then drop what Murf still has queued
+                    sender.cancel()
+                    await asyncio.wait({sender}, timeout=1.0)
+                    await conn.clear(context_id)
+                    raise
+
+                if ws_callback:
+                    await ws_callback({
+                        "type": "audio_complete",
+                        "total_chunks": chunk_count,
+                        "context_id": context_id,
+                        "message": f"Audio generation complete with {chunk_count} chunks"
+                    })
+                return complete
+
+        except asyncio.CancelledError:
+            if sender:
+                sender.cancel()
+            raise
         except Exception as e:
+            if sender:
+                # Cancelling here would tear down the text source too; the
+                # sender fails on its next send to the dead socket instead
+                await asyncio.gather(sender, return_exceptions=True)
+            if source_error:
+                raise source_error[0]
+            self.metrics.upstream("murf", error=True)
             log.error(f"TTS Error: {e}")
             if ws_callback:
                 await ws_callback({
                     "type": "audio_error",
+                    "context_id": context_id,
                     "message": f"Audio generation failed: {str(e)}"
                 })
+            # Keep the text side flowing even without audio
+            async for _ in segments:
+                pass
+            return False
+
+    async def _forward_audio(
+        self, context_id: str, inbox: asyncio.Queue, sender: asyncio.Task, ws_callback, first_text_at: list
+    ) -> Tuple[int, bool]:
+        """Relay this context's audio chunks until Murf reports the final one.
+
+        Returns the chunk count and whether the final marker arrived (rather
+        than Murf going quiet). Murf latency is measured from the first text
+        segment sent to the first audio chunk back.
+        """
+        chunk_count = 0
+        while True:
+            try:
+                data = await asyncio.wait_for(inbox.get(), timeout=self.recv_timeout)
+            except asyncio.TimeoutError:
+                # Silence is expected while the LLM is still producing text
+                if sender.done():
+                    return chunk_count, False
+                continue
+            if data is CONNECTION_LOST:
+                raise ConnectionError("Murf connection lost")
+
+            if "audio" in data and data["audio"]:
+                chunk_count += 1
+                if chunk_count == 1 and first_text_at:
+                    self.metrics.upstream("murf", time.monotonic() - first_text_at[0])
+                if ws_callback:
+                    await ws_callback({
+                        "type": "audio_chunk",
+                        "audio": data["audio"],
+                        "format": "wav_base64",
+                        "context_id": context_id,
+                        "chunk_number": chunk_count,
+                        "is_final": data.get("final", False)
+                    })
+
+            # Only the final marker after the last segment ends the utterance
+            if data.get("final") and sender.done():
+                return chunk_count, True
@@ -0,0 +1,180 @@
+import time
+import asyncio
+import logging
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional, Set, Tuple
+
+from app.core.config import get_config
+from app.services.metrics import Metrics, TurnTimeline
+
+log = logging.getLogger("lumeai.turns")
+
+Responder = Callable[[str, Optional[TurnTimeline]], Awaitable[Any]]
+
+class RecentTranscripts:
+    """Bounded, time-windowed memory of end-of-turn transcripts already handled.
+
+    Drops a final transcript delivered twice for the same turn without
+    suppressing a user who genuinely repeats themselves: entries are keyed
+    by turn order and expire after `window` seconds.
+    """
+
+    def __init__(self, window: Optional[float] = None, max_entries: int = 128):
+        self.window = window if window is not None else get_config().TURN_DEDUP_WINDOW
+        self.max_entries = max_entries
+        self.duplicates = 0
+        self._seen: "OrderedDict[Hashable, float]" = OrderedDict()
+
+    def seen(self, text: str, turn_order: int = -1) -> bool:
+        """Whether this transcript was already handled; remembers it if not"""
+        now = time.monotonic()
+        while self._seen and (
+            len(self._seen) >= self.max_entries or now - next(iter(self._seen.values())) > self.window
+        ):
+            self._seen.popitem(last=False)
+        key = (turn_order, " ".join(text.lower().split()))
+        if key in self._seen:
+            self.duplicates += 1
+            return True
+        self._seen[key] = now
+        return False
+
+    def __len__(self) -> int:
+        return len(self._seen)
+
+class TurnController:
+    """Ordered assistant replies for one voice connection.
+
+    User turns are answered strictly one after another by a single worker
+    task, so history is appended in the order the user spoke. A reply starts
+    as soon as its transcript arrives; if another transcript follows within
+    `coalesce_ms` of that start, the reply is cancelled (not counted as a
+    barge-in, `restarting` is set while it unwinds) and restarted as one
+    reply to both. A newer turn after that, or speech recognised
+    while a reply is in flight, cancels that reply (`barge_in`) and waits
+    for it to unwind: the Gemini stream is closed, the Murf context cleared
+    and the client told to flush playback by the reply itself. Replies are
+    tagged with the AssemblyAI turn order so late events of the turn being
+    answered never cancel their own reply.
+    """
+
+    def __init__(
+        self,
+        respond: Responder,
+        metrics: Optional[Metrics] = None,
+        coalesce_ms: Optional[int] = None,
+        cancel_timeout: float = 2.0,
+    ):
+        self.respond = respond
+        self.metrics = metrics or Metrics()
+        self.coalesce_window = (coalesce_ms if coalesce_ms is not None else get_config().TURN_COALESCE_MS) / 1000
+        self.cancel_timeout = cancel_timeout
+        self.started = 0
+        self.completed = 0
+        self.coalesced = 0
+        self.restarts = 0
+        self.barge_ins = 0
+        self.last_cancel_ms: Optional[float] = None
+        self._pending: List[Tuple[str, int, Optional[TurnTimeline]]] = []
+        self._reply_started = 0.0
+        self.restarting = False
+        self._worker: Optional[asyncio.Task] = None
+        self._task: Optional[asyncio.Task] = None
+        self._background: Set[asyncio.Task] = set()
+        self._turn_order = -1
+
+    @property
+    def active(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def submit(self, text: str, turn_order: int = -1, timeline: Optional[TurnTimeline] = None):
+        """Queue a finished user turn; must be called on the event loop"""
+        self._pending.append((text, turn_order, timeline))
+        if self.active and turn_order > self._turn_order:
+            if time.monotonic() - self._reply_started < self.coalesce_window:
+                # Follow-up right behind the previous transcript: answer both in one reply
+                self.restarting = True
+                self._task.cancel()
+            else:
+                # A new turn always supersedes the reply to the previous one
+                task = asyncio.create_task(self.barge_in(turn_order, reason="turn"))
+                self._background.add(task)
+                task.add_done_callback(self._background_done)
+        if self._worker is None or self._worker.done():
+            self._worker = asyncio.create_task(self._run())
+
+    def _background_done(self, task: asyncio.Task):
+        self._background.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            log.error(f"Barge-in failed: {task.exception()!r}")
+
+    async def _run(self):
+        while self._pending:
+            batch, self._pending = self._pending, []
+            text = " ".join(t for t, _, _ in batch)
+            _, turn_order, timeline = batch[-1]
+            if len(batch) > 1:
+                self.coalesced += len(batch) - 1
+                self.metrics.turns_coalesced.inc(len(batch) - 1)
+                log.info(f"Coalesced {len(batch)} transcripts into one reply")
+
+            self._turn_order = turn_order
+            self._reply_started = time.monotonic()
+            self._task = asyncio.create_task(self.respond(text, timeline))
+            self.started += 1
+            await asyncio.wait({self._task})
+            if self.restarting:
+                self.restarting = False
+                if self._task.cancelled():
+                    # Answer this batch again, together with what cut it short
+                    self.restarts += 1
+                    self._pending[:0] = batch
+                    continue
+            if not self._task.cancelled():
+                self.completed += 1
+
+    async def barge_in(self, turn_order: Optional[int] = None, reason: str = "speech") -> bool:
+        """Cancel the active reply if it answers an older turn than `turn_order`.
+
+        Returns whether a reply was cancelled.
+        """
+        task = self._task
+        if task is None or task.done():
+            return False
+        if turn_order is not None and turn_order <= self._turn_order:
+            return False
+
+        started = time.monotonic()
+        task.cancel()
+        done, _ = await asyncio.wait({task}, timeout=self.cancel_timeout)
+        elapsed = time.monotonic() - started
+        if not done:
+            log.warning(f"Reply still unwinding {self.cancel_timeout}s after barge-in")
+
+        self.barge_ins += 1
+        self.last_cancel_ms = round(elapsed * 1000, 1)
+        self.metrics.barge_ins.inc(reason=reason)
+        self.metrics.barge_in_cancel.observe(elapsed)
+        log.info(f"Barge-in ({reason}): cancelled reply in {self.last_cancel_ms} ms")
+        return True
+
+    async def aclose(self):
+        """Drop queued turns and cancel the active reply without counting a barge-in"""
+        self._pending.clear()
+        tasks = {t for t in (self._worker, self._task, *self._background) if t is not None and not t.done()}
+        for task in tasks:
+            task.cancel()
+        if tasks:
+            await asyncio.wait(tasks, timeout=self.cancel_timeout)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "active": self.active,
+            "pending": len(self._pending),
+            "started": self.started,
+            "completed": self.completed,
+            "coalesced": self.coalesced,
+            "restarts": self.restarts,
+            "barge_ins": self.barge_ins,
+            "last_cancel_ms": self.last_cancel_ms,
+        }
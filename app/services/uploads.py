@@ -0,0 +1,199 @@
+import hashlib
+import logging
+import uuid
+from dataclasses import dataclass
+from pathlib import Path
+from typing import AsyncIterator, Dict, Optional
+
+import aiofiles
+import aiofiles.os
+
+try:
+    from python_multipart.exceptions import MultipartParseError
+    from python_multipart.multipart import MultipartParser, parse_options_header
+except ImportError:  # python-multipart < 0.0.13
+    from multipart.exceptions import MultipartParseError
+    from multipart.multipart import MultipartParser, parse_options_header
+
+log = logging.getLogger("lumeai.uploads")
+
+AUDIO_EXTENSIONS = {".webm", ".wav", ".mp3", ".ogg", ".oga", ".m4a", ".mp4", ".flac", ".aac", ".pcm"}
+AUDIO_CONTENT_TYPES = {
+    "audio/webm": ".webm", "audio/wav": ".wav", "audio/x-wav": ".wav", "audio/wave": ".wav",
+    "audio/mpeg": ".mp3", "audio/ogg": ".ogg", "audio/mp4": ".m4a", "audio/x-m4a": ".m4a",
+    "audio/flac": ".flac", "audio/aac": ".aac",
+}
+# Headers and boundaries around the file part
+MULTIPART_OVERHEAD = 64 * 1024
+
+class UploadError(Exception):
+    status_code = 400
+
+class UploadTooLarge(UploadError):
+    status_code = 413
+
+@dataclass
+class StoredUpload:
+    sha256: str
+    filename: str  # content-addressed name under the uploads directory
+    path: Path
+    size: int
+    content_type: str
+    original_filename: str
+    deduplicated: bool
+
+def audio_extension(filename: str, content_type: str) -> str:
+    """Extension for the stored file, never taken verbatim from the client"""
+    suffix = Path(filename or "").suffix.lower()
+    if suffix in AUDIO_EXTENSIONS:
+        return suffix
+    return AUDIO_CONTENT_TYPES.get((content_type or "").split(";")[0].strip().lower(), ".bin")
+
+class _FilePart:
+    """python-multipart callbacks that pick out one form field's bytes.
+
+    The parser is synchronous, so data is collected per fed body chunk and
+    written out by the caller between feeds.
+    """
+
+    def __init__(self, field: str):
+        self.field = field
+        self.found = False
+        self.filename = ""
+        self.content_type = ""
+        self.pending = bytearray()
+        self._headers: Dict[bytes, bytes] = {}
+        self._header_field = b""
+        self._header_value = b""
+        self._in_field = False
+
+    def callbacks(self):
+        return {
+            "on_part_begin": self._on_part_begin,
+            "on_header_field": self._on_header_field,
+            "on_header_value": self._on_header_value,
+            "on_header_end": self._on_header_end,
+            "on_headers_finished": self._on_headers_finished,
+            "on_part_data": self._on_part_data,
+            "on_part_end": self._on_part_end,
+        }
+
+    def _on_part_begin(self):
+        self._headers = {}
+
+    def _on_header_field(self, data: bytes, start: int, end: int):
+        self._header_field += data[start:end]
+
+    def _on_header_value(self, data: bytes, start: int, end: int):
+        self._header_value += data[start:end]
+
+    def _on_header_end(self):
+        self._headers[self._header_field.lower()] = self._header_value
+        self._header_field = self._header_value = b""
+
+    def _on_headers_finished(self):
+        _, options = parse_options_header(self._headers.get(b"content-disposition", b""))
+        self._in_field = not self.found and options.get(b"name", b"").decode() == self.field
+        if self._in_field:
+            self.found = True
+            self.filename = options.get(b"filename", b"").decode(errors="replace")
+            self.content_type = self._headers.get(b"content-type", b"").decode(errors="replace")
+
+    def _on_part_data(self, data: bytes, start: int, end: int):
+        if self._in_field:
+            self.pending += data[start:end]
+
+    def _on_part_end(self):
+        self._in_field = False
+
+async def _existing_copy(directory: Path, sha256: str) -> Optional[Path]:
+    """A stored upload with this hash, whatever extension it was given"""
+    for suffix in sorted(AUDIO_EXTENSIONS) + [".bin"]:
+        path = directory / f"{sha256}{suffix}"
+        if await aiofiles.os.path.exists(path):
+            return path
+    return None
+
+async def store_audio_upload(
+    body: AsyncIterator[bytes],
+    content_type: str,
+    directory: Path,
+    max_bytes: int,
+    chunk_bytes: int,
+    content_length: Optional[int] = None,
+    field: str = "file",
+) -> StoredUpload:
+    """Stream one multipart file field to disk under its SHA-256.
+
+    The body is parsed as it arrives and written in `chunk_bytes` blocks to a
+    temporary file while being hashed, so memory stays bounded whatever the
+    upload size, and the upload is cut off as soon as it passes `max_bytes`.
+    The finished file is renamed to `<sha256><ext>`; if audio with that hash
+    is already stored the temporary copy is discarded instead.
+    """
+    if content_length is not None and content_length > max_bytes + MULTIPART_OVERHEAD:
+        raise UploadTooLarge(f"Upload exceeds the {max_bytes} byte limit")
+    mime, options = parse_options_header(content_type)
+    boundary = options.get(b"boundary")
+    if mime != b"multipart/form-data" or not boundary:
+        raise UploadError("Expected a multipart/form-data upload")
+
+    part = _FilePart(field)
+    parser = MultipartParser(boundary, part.callbacks())
+    digest = hashlib.sha256()
+    size = 0
+    tmp = directory / f".upload-{uuid.uuid4().hex}.part"
+
+    try:
+        async with aiofiles.open(tmp, "wb") as out:
+            async for chunk in body:
+                try:
+                    parser.write(chunk)
+                except MultipartParseError as e:
+                    raise UploadError(f"Malformed multipart body: {e}") from e
+                if len(part.pending) < chunk_bytes:
+                    continue
+                # Write whole blocks; the remainder waits for the next feed
+                cut = len(part.pending) - len(part.pending) % chunk_bytes
+                block = bytes(part.pending[:cut])
+                del part.pending[:cut]
+                size += len(block)
+                if size > max_bytes:
+                    raise UploadTooLarge(f"Upload exceeds the {max_bytes} byte limit")
+                digest.update(block)
+                await out.write(block)
+            try:
+                parser.finalize()
+            except MultipartParseError as e:
+                raise UploadError(f"Malformed multipart body: {e}") from e
+            if part.pending:
+                size += len(part.pending)
+                if size > max_bytes:
+                    raise UploadTooLarge(f"Upload exceeds the {max_bytes} byte limit")
+                digest.update(part.pending)
+                await out.write(bytes(part.pending))
+        if not part.found:
+            raise UploadError(f"Missing '{field}' field")
+
+        sha256 = digest.hexdigest()
+        path = await _existing_copy(directory, sha256)
+        deduplicated = path is not None
+        if not deduplicated:
+            path = directory / f"{sha256}{audio_extension(part.filename, part.content_type)}"
+            await aiofiles.os.replace(tmp, path)
+        filename = path.name
+    finally:
+        try:
+            await aiofiles.os.remove(tmp)
+        except FileNotFoundError:
+            pass
+
+    return StoredUpload(
+        sha256=sha256,
+        filename=filename,
+        path=path,
+        size=size,
+        content_type=part.content_type,
+        original_filename=part.filename,
+        deduplicated=deduplicated,
+    )
@@ -0,0 +1,114 @@
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional
+
+import numpy as np
+
+from app.core.config import get_config
+
+class VoiceActivityGate:
+    """Energy / zero-crossing voice activity gate for 16-bit mono PCM frames.
+
+    Frames are speech when their level clears both an absolute threshold and
+    a tracked noise floor, and they are not noise-like (high zero-crossing
+    rate at modest level). After speech, `hangover_ms` of audio keeps flowing
+    so the upstream endpointing still sees the silence that ends a turn; it
+    must exceed AssemblyAI's `max_turn_silence`. While silent, the last
+    `preroll_ms` is held back and replayed at speech onset, and only one
+    frame per `keepalive_ms` goes upstream to keep the stream alive.
+    """
+
+    def __init__(
+        self,
+        frame_ms: Optional[int] = None,
+        threshold_db: Optional[float] = None,
+        hangover_ms: Optional[int] = None,
+        preroll_ms: Optional[int] = None,
+        keepalive_ms: Optional[int] = None,
+        max_zcr: float = 0.35,
+        floor_margin_db: float = 9.0,
+        floor_rise_db: float = 0.1,
+    ):
+        config = get_config()
+        self.frame_ms = frame_ms or config.AUDIO_FRAME_MS
+        self.threshold_db = threshold_db if threshold_db is not None else config.VAD_THRESHOLD_DB
+        hangover_ms = hangover_ms if hangover_ms is not None else config.VAD_HANGOVER_MS
+        preroll_ms = preroll_ms if preroll_ms is not None else config.VAD_PREROLL_MS
+        keepalive_ms = keepalive_ms if keepalive_ms is not None else config.VAD_KEEPALIVE_MS
+        self.max_zcr = max_zcr
+        self.floor_margin_db = floor_margin_db
+        self.floor_rise_db = floor_rise_db
+
+        self.hangover_frames = hangover_ms // self.frame_ms
+        self.keepalive_frames = keepalive_ms // self.frame_ms if keepalive_ms else 0
+        self._preroll: Deque[bytes] = deque(maxlen=max(0, preroll_ms // self.frame_ms))
+        self._noise_floor_db = self.threshold_db
+        self._hangover = 0
+        self._since_keepalive = 0
+
+        self.frames_in = 0
+        self.frames_speech = 0
+        self.frames_forwarded = 0
+        self.frames_skipped = 0
+
+    def is_speech(self, frame: bytes) -> bool:
+        samples = np.frombuffer(frame, dtype=np.int16, count=len(frame) // 2)
+        if samples.size < 2:
+            return False
+        x = samples.astype(np.float32)
+        rms = float(np.sqrt(np.mean(x * x)))
+        level_db = 20.0 * np.log10(max(rms, 1.0) / 32768.0)
+        zcr = np.count_nonzero(np.signbit(samples[1:]) != np.signbit(samples[:-1])) / (samples.size - 1)
+
+        # Noise floor follows dips immediately and rises slowly through speech
+        if level_db < self._noise_floor_db:
+            self._noise_floor_db = level_db
+        else:
+            self._noise_floor_db += self.floor_rise_db
+
+        threshold = max(self.threshold_db, self._noise_floor_db + self.floor_margin_db)
+        if level_db <= threshold:
+            return False
+        # Loud frames are speech regardless; quieter ones must not look like hiss
+        return zcr < self.max_zcr or level_db > threshold + 15.0
+
+    def process(self, frame: bytes) -> List[bytes]:
+        """Frames to forward upstream for this input frame (possibly none)"""
+        self.frames_in += 1
+        if self.is_speech(frame):
+            self.frames_speech += 1
+            self._hangover = self.hangover_frames
+            out = list(self._preroll)
+            self._preroll.clear()
+            out.append(frame)
+        elif self._hangover > 0:
+            self._hangover -= 1
+            out = [frame]
+        else:
+            self._since_keepalive += 1
+            if self.keepalive_frames and self._since_keepalive >= self.keepalive_frames:
+                # Held-back frames are older than this one; they would arrive out of order
+                self._since_keepalive = 0
+                self.frames_skipped += len(self._preroll)
+                self._preroll.clear()
+                out = [frame]
+            else:
+                if self._preroll.maxlen:
+                    if len(self._preroll) == self._preroll.maxlen:
+                        self.frames_skipped += 1
+                    self._preroll.append(frame)
+                else:
+                    self.frames_skipped += 1
+                return []
+        self.frames_forwarded += len(out)
+        return out
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "frames_in": self.frames_in,
+            "frames_speech": self.frames_speech,
+            "frames_forwarded": self.frames_forwarded,
+            "frames_skipped": self.frames_skipped,
+            "skipped_ms": self.frames_skipped * self.frame_ms,
+            "skipped_share": round(self.frames_skipped / self.frames_in, 4) if self.frames_in else 0.0,
+            "noise_floor_db": round(self._noise_floor_db, 1),
+        }
@@ -0,0 +1 @@
+# empty on purpose
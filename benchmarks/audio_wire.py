@@ -0,0 +1,61 @@
+"""TTS audio to the browser: base64-in-JSON text frames vs. binary frames.
+
+Feeds Murf-shaped chunks (base64 PCM in JSON) through both outbound paths and
+reports bytes on the wire and server-side encode cost per chunk. The binary
+frames are decoded back and compared with the original audio.
+
+    python -m benchmarks.audio_wire --chunks 2000 --chunk-bytes 8192
+"""
+import argparse
+import base64
+import json
+import os
+import sys
+import time
+
+from app.services.audio_channel import BinaryAudioChannel, decode_audio_frame
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--chunks", type=int, default=2000)
+    parser.add_argument("--chunk-bytes", type=int, default=8192)
+    args = parser.parse_args()
+
+    audio = [os.urandom(args.chunk_bytes) for _ in range(args.chunks)]
+    murf_chunks = [base64.b64encode(a).decode() for a in audio]
+    context_id = "lumeai-benchmark"
+
+    def payload(i):
+        return {
+            "type": "audio_chunk",
+            "audio": murf_chunks[i],
+            "format": "wav_base64",
+            "context_id": context_id,
+            "chunk_number": i + 1,
+            "is_final": i == args.chunks - 1,
+        }
+
+    start = time.perf_counter()
+    text_bytes = sum(len(json.dumps(payload(i)).encode()) for i in range(args.chunks))
+    text_s = time.perf_counter() - start
+
+    channel = BinaryAudioChannel()
+    channel.encode({"type": "audio_start", "context_id": context_id})
+    start = time.perf_counter()
+    frames = [channel.encode(payload(i)) for i in range(args.chunks)]
+    binary_s = time.perf_counter() - start
+    binary_bytes = sum(len(f) for f in frames)
+
+    decoded = [decode_audio_frame(f) for f in frames]
+    intact = all(d[3] == a for d, a in zip(decoded, audio)) and decoded[-1][2] and decoded[0][0] == 1
+
+    raw = args.chunks * args.chunk_bytes
+    print(f"audio: {args.chunks} chunks, {raw / 1e6:.1f} MB of PCM")
+    print(f"  json/base64: {text_bytes / 1e6:7.2f} MB on the wire (+{text_bytes / raw - 1:.1%}), {text_s / args.chunks * 1e6:6.1f} us/chunk")
+    print(f"  binary:      {binary_bytes / 1e6:7.2f} MB on the wire (+{binary_bytes / raw - 1:.1%}), {binary_s / args.chunks * 1e6:6.1f} us/chunk")
+    print(f"  round trip intact: {intact}")
+    if not intact:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
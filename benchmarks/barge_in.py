@@ -0,0 +1,188 @@
+"""Barge-in: the user talks over a long reply, with and without speech-triggered cancel.
+
+Runs the app against the local provider fakes (benchmarks.fake_providers)
+with a long Gemini reply. Each session asks a question, waits until the
+reply's audio has been playing for `--interrupt-after` seconds, then speaks
+again. It is run twice, with BARGE_IN_ENABLED on and off (off, the old reply
+is only superseded once the new turn ends), and reports:
+
+- flush latency: first partial transcript of the new speech -> client
+  receives `playback_flush`
+- server cancel latency (lumeai_barge_in_cancel_seconds)
+- stale audio chunks of the old reply received after the user spoke
+- Gemini chunks actually streamed by the fake vs. what full replies would
+  have been, and the app's own generated/saved token estimate
+
+    python -m benchmarks.barge_in --sessions 5 --reply-words 400
+"""
+import argparse
+import asyncio
+import json
+import re
+import statistics
+import time
+from typing import Dict, List
+
+import httpx
+import numpy as np
+import websockets
+
+from app.services.prompt_builder import estimate_tokens
+from benchmarks.fake_providers import FakeProviders
+from benchmarks.load_harness import CHUNK_BYTES, CHUNK_SECS, AppProcess, percentile, synth_turn
+
+SESSION_IN_TRANSCRIPT = re.compile(r"session (\d+) turn (\d+)")
+
+def metric_sum(text: str, name: str, **labels: str) -> float:
+    """Sum of the samples of one metric in Prometheus text output"""
+    total = 0.0
+    for line in text.splitlines():
+        if not line.startswith(name):
+            continue
+        series, _, value = line.rpartition(" ")
+        if series.split("{")[0] != name:
+            continue
+        if all(f'{k}="{v}"' in series for k, v in labels.items()):
+            total += float(value)
+    return total
+
+async def run_session(url: str, question: bytes, interruption: bytes, silence: bytes, args, record: dict):
+    loop = asyncio.get_running_loop()
+    outbox: List[bytes] = []
+    interrupt = asyncio.Event()
+    done = asyncio.Event()
+    state = {"turn": 0, "audio_context": None, "flushed": None}
+
+    def queue_audio(pcm: bytes):
+        outbox.extend(pcm[i:i + CHUNK_BYTES] for i in range(0, len(pcm), CHUNK_BYTES))
+
+    async def receive(ws):
+        async for message in ws:
+            now = time.time()
+            if isinstance(message, bytes):
+                # Binary frames carry audio of the reply currently announced by audio_start
+                kind, payload = "audio_chunk", {}
+            else:
+                payload = json.loads(message)
+                kind = payload.get("type")
+            if kind == "transcript":
+                match = SESSION_IN_TRANSCRIPT.search(payload["text"])
+                if match:
+                    record["fake_session"] = match.group(1)
+                state["turn"] += 1
+            elif kind == "audio_start":
+                state["audio_context"] = payload.get("turn_id", payload.get("context_id"))
+            elif kind == "audio_chunk":
+                if state["turn"] == 1:
+                    if "first_audio" not in record:
+                        record["first_audio"] = now
+                        loop.call_later(args.interrupt_after, interrupt.set)
+                    if "spoke_at" in record:
+                        record["stale_chunks"] += 1
+            elif kind == "playback_flush" and "flush_at" not in record:
+                record["flush_at"] = now
+            elif kind == "audio_complete" and state["turn"] >= 2:
+                done.set()
+            elif kind in ("error", "audio_error"):
+                record["errors"].append(payload.get("message"))
+
+    async with websockets.connect(url, max_size=None) as ws:
+        reader = asyncio.create_task(receive(ws))
+        queue_audio(question)
+        next_send = loop.time()
+        deadline = loop.time() + args.timeout
+        asked_again = False
+        while not done.is_set() and loop.time() < deadline:
+            if interrupt.is_set() and not asked_again:
+                asked_again = True
+                record["spoke_at"] = time.time()
+                queue_audio(interruption)
+            await ws.send(outbox.pop(0) if outbox else silence)
+            next_send += CHUNK_SECS
+            await asyncio.sleep(max(0.0, next_send - loop.time()))
+        if not done.is_set():
+            record["errors"].append("timed out waiting for the second reply")
+        await ws.send("__stop")
+        reader.cancel()
+
+def run_mode(barge_in: bool, args) -> Dict[str, object]:
+    providers = FakeProviders(
+        reply_words=args.reply_words, token_latency=args.token_latency, partial_ms=args.partial_ms
+    ).start()
+    app = AppProcess({
+        "ASSEMBLYAI_API_HOST": providers.urls["assemblyai_host"],
+        "GEMINI_API_ENDPOINT": providers.urls["gemini_endpoint"],
+        "GEMINI_TRANSPORT": "rest",
+        "MURF_WS_URL": providers.urls["murf_url"],
+        "AUTO_ASSISTANT_REPLY": "true",
+        "BARGE_IN_ENABLED": "true" if barge_in else "false",
+        # No reply completes before the first barge-in; tell the app how long they run
+        "BARGE_IN_EXPECTED_REPLY_TOKENS": str(estimate_tokens(" ".join(f"word{i}" for i in range(args.reply_words)))),
+    }).start()
+
+    rng = np.random.default_rng(11)
+    question = synth_turn(1.5, 0.0, rng)
+    interruption = synth_turn(1.5, 0.0, rng)
+    silence = synth_turn(0.0, CHUNK_SECS, rng)[:CHUNK_BYTES]
+    records = [{"errors": [], "stale_chunks": 0} for _ in range(args.sessions)]
+
+    async def drive():
+        async def one(i: int):
+            await asyncio.sleep(i * 0.1)
+            query = f"session=barge-{i}&assembly_key=b&gemini_key=b&murf_key=b&audio=binary"
+            try:
+                await run_session(
+                    f"ws://127.0.0.1:{app.port}/ws/stream?{query}", question, interruption, silence, args, records[i]
+                )
+            except Exception as e:
+                records[i]["errors"].append(f"{type(e).__name__}: {e}")
+        await asyncio.gather(*(one(i) for i in range(args.sessions)))
+
+    try:
+        asyncio.run(drive())
+        metrics = httpx.get(f"http://127.0.0.1:{app.port}/metrics").text
+    finally:
+        app.stop()
+        provider_stats = providers.stop()
+
+    partials = provider_stats["partials_sent"]
+    flush_ms = [
+        (r["flush_at"] - partials[f"{r['fake_session']}:1"]) * 1000
+        for r in records if "flush_at" in r and f"{r.get('fake_session')}:1" in partials
+    ]
+    cancels = metric_sum(metrics, "lumeai_barge_in_cancel_seconds_count")
+    return {
+        "flush_ms": flush_ms,
+        "cancel_ms": metric_sum(metrics, "lumeai_barge_in_cancel_seconds_sum") / cancels * 1000 if cancels else float("nan"),
+        "barge_ins": metric_sum(metrics, "lumeai_barge_ins_total"),
+        "stale_chunks": [r["stale_chunks"] for r in records],
+        "chunks_planned": provider_stats["llm_chunks_planned"],
+        "chunks_streamed": provider_stats["llm_chunks_streamed"],
+        "tokens_generated": metric_sum(metrics, "lumeai_barge_in_tokens_total", kind="generated"),
+        "tokens_saved": metric_sum(metrics, "lumeai_barge_in_tokens_total", kind="saved"),
+        "errors": [e for r in records for e in r["errors"]],
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=3)
+    parser.add_argument("--reply-words", type=int, default=300)
+    parser.add_argument("--token-latency", type=float, default=0.05, help="seconds between Gemini chunks")
+    parser.add_argument("--partial-ms", type=int, default=400, help="speech before the fake STT sends a partial")
+    parser.add_argument("--interrupt-after", type=float, default=1.0, help="seconds of reply audio before speaking again")
+    parser.add_argument("--timeout", type=float, default=40.0)
+    args = parser.parse_args()
+
+    for barge_in in (False, True):
+        r = run_mode(barge_in, args)
+        print(f"barge-in {'on' if barge_in else 'off'}:")
+        print(f"  flush latency after first partial: p50 {percentile(r['flush_ms'], 50):.0f} ms, max {max(r['flush_ms'], default=float('nan')):.0f} ms")
+        print(f"  server cancel latency: mean {r['cancel_ms']:.1f} ms over {r['barge_ins']:.0f} barge-ins")
+        print(f"  stale audio chunks after the user spoke: mean {statistics.mean(r['stale_chunks']):.1f} per session")
+        print(f"  gemini chunks streamed: {r['chunks_streamed']} of {r['chunks_planned']} planned")
+        print(f"  app token estimate for cancelled replies: {r['tokens_generated']:.0f} generated, {r['tokens_saved']:.0f} saved")
+        for error in sorted(set(r["errors"]))[:3]:
+            print(f"  error: {error}")
+
+if __name__ == "__main__":
+    main()
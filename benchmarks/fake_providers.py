@@ -0,0 +1,278 @@
+"""Local stand-ins for AssemblyAI streaming, Gemini and Murf, for load testing.
+
+All three speak enough of the real wire protocols that the app's own SDK
+clients talk to them unchanged:
+
+- FakeAssemblyAI: the v3 streaming WebSocket (`/v3/ws`). It sends Begin, then
+  watches the PCM level, sends a partial Turn event every `partial_ms` of
+  speech and answers each utterance with a formatted end-of-turn Turn event
+  once `eot_silence_ms` of silence has arrived.
+- FakeGemini: the REST `:streamGenerateContent` endpoint. It streams a JSON
+  array of candidates with a first-token delay and then one chunk per tick.
+- StubMurfServer (from benchmarks.stubs): the stream-input socket.
+
+Every delay is `latency ± jitter`. FakeProviders runs all three on one event
+loop in a child process, so they do not compete with the app under test.
+"""
+import asyncio
+import json
+import multiprocessing
+import random
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from benchmarks.stubs import StubMurfServer
+
+def jittered(latency: float, jitter: float) -> float:
+    return max(0.0, latency + random.uniform(-jitter, jitter))
+
+class FakeAssemblyAI:
+    """AssemblyAI v3 streaming stand-in driven by the energy of incoming PCM"""
+
+    def __init__(
+        self,
+        latency: float = 0.15,
+        jitter: float = 0.05,
+        eot_silence_ms: int = 700,
+        partial_ms: int = 400,
+        speech_db: float = -40.0,
+        sample_rate: int = 16000,
+    ):
+        self.latency = latency
+        self.jitter = jitter
+        self.eot_silence_ms = eot_silence_ms
+        self.partial_ms = partial_ms
+        self.speech_db = speech_db
+        self.sample_rate = sample_rate
+        self.port: Optional[int] = None
+        self.sessions = 0
+        self.audio_bytes = 0
+        # Transcript -> wall-clock time its end-of-turn event was sent
+        self.turns_sent: Dict[str, float] = {}
+        # "session:turn" -> wall-clock time of the turn's first partial
+        self.partials_sent: Dict[str, float] = {}
+
+    def _is_speech(self, pcm: bytes) -> bool:
+        samples = np.frombuffer(pcm, dtype=np.int16, count=len(pcm) // 2).astype(np.float32)
+        if samples.size == 0:
+            return False
+        rms = float(np.sqrt(np.mean(samples * samples)))
+        return 20 * np.log10(max(rms, 1.0) / 32768.0) > self.speech_db
+
+    async def _send_turn(self, ws, session_index: int, turn_order: int):
+        await asyncio.sleep(jittered(self.latency, self.jitter))
+        transcript = f"Tell me something interesting for session {session_index} turn {turn_order}."
+        self.turns_sent[transcript] = time.time()
+        await ws.send(json.dumps({
+            "type": "Turn",
+            "turn_order": turn_order,
+            "turn_is_formatted": True,
+            "end_of_turn": True,
+            "transcript": transcript,
+            "end_of_turn_confidence": 0.9,
+            "words": [],
+        }))
+
+    async def handle(self, ws):
+        self.sessions += 1
+        session_index = self.sessions
+        expires = datetime.now(timezone.utc) + timedelta(hours=1)
+        await ws.send(json.dumps({"type": "Begin", "id": f"fake-{session_index}", "expires_at": expires.isoformat()}))
+
+        bytes_per_ms = self.sample_rate * 2 / 1000
+        in_speech = False
+        silence_ms = 0.0
+        speech_ms = 0.0
+        turn_order = 0
+        pending: List[asyncio.Task] = []
+        try:
+            async for message in ws:
+                if isinstance(message, bytes):
+                    self.audio_bytes += len(message)
+                    if self._is_speech(message):
+                        if not in_speech:
+                            speech_ms = 0.0
+                        in_speech = True
+                        silence_ms = 0.0
+                        before, speech_ms = speech_ms, speech_ms + len(message) / bytes_per_ms
+                        if int(speech_ms // self.partial_ms) > int(before // self.partial_ms):
+                            self.partials_sent.setdefault(f"{session_index}:{turn_order}", time.time())
+                            await ws.send(json.dumps({
+                                "type": "Turn", "turn_order": turn_order, "turn_is_formatted": False,
+                                "end_of_turn": False, "transcript": "tell me",
+                                "end_of_turn_confidence": 0.1, "words": [],
+                            }))
+                    elif in_speech:
+                        silence_ms += len(message) / bytes_per_ms
+                        if silence_ms >= self.eot_silence_ms:
+                            in_speech = False
+                            pending.append(asyncio.create_task(self._send_turn(ws, session_index, turn_order)))
+                            turn_order += 1
+                    continue
+                if json.loads(message).get("type") == "Terminate":
+                    await asyncio.gather(*pending, return_exceptions=True)
+                    await ws.send(json.dumps({"type": "Termination", "audio_duration_seconds": 0, "session_duration_seconds": 0}))
+                    break
+        except Exception:
+            pass
+        finally:
+            for task in pending:
+                task.cancel()
+
+class FakeGemini:
+    """Gemini REST streaming stand-in (`models/<name>:streamGenerateContent`)"""
+
+    def __init__(
+        self,
+        first_token_latency: float = 0.35,
+        token_latency: float = 0.03,
+        jitter: float = 0.1,
+        reply_words: int = 45,
+        words_per_chunk: int = 3,
+    ):
+        self.first_token_latency = first_token_latency
+        self.token_latency = token_latency
+        self.jitter = jitter
+        self.reply_words = reply_words
+        self.words_per_chunk = words_per_chunk
+        self.port: Optional[int] = None
+        self.requests = 0
+        self.chunks_planned = 0
+        self.chunks_streamed = 0
+
+    def _reply_chunks(self) -> List[str]:
+        words = []
+        for i in range(self.reply_words):
+            word = f"word{i}"
+            if i % 12 == 11:
+                word += "."
+            words.append(word)
+        step = self.words_per_chunk
+        return [" ".join(words[i:i + step]) + " " for i in range(0, len(words), step)]
+
+    @staticmethod
+    def _candidate(text: str, final: bool) -> str:
+        candidate = {"content": {"role": "model", "parts": [{"text": text}]}, "index": 0}
+        if final:
+            candidate["finishReason"] = 1
+        return json.dumps({"candidates": [candidate]})
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                length = 0
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b""):
+                        break
+                    name, _, value = line.decode().partition(":")
+                    if name.strip().lower() == "content-length":
+                        length = int(value.strip())
+                if length:
+                    await reader.readexactly(length)
+                self.requests += 1
+                streaming = b"streamGenerateContent" in request_line
+
+                if not streaming:
+                    body = self._candidate("".join(self._reply_chunks()), True).encode()
+                    await asyncio.sleep(jittered(self.first_token_latency, self.jitter))
+                    writer.write(
+                        b"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\n"
+                        + f"Content-Length: {len(body)}\r\n\r\n".encode() + body
+                    )
+                    await writer.drain()
+                    continue
+
+                writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\nTransfer-Encoding: chunked\r\n\r\n")
+                await asyncio.sleep(jittered(self.first_token_latency, self.jitter))
+                chunks = self._reply_chunks()
+                self.chunks_planned += len(chunks)
+                for i, text in enumerate(chunks):
+                    piece = ("[" if i == 0 else ",") + self._candidate(text, i == len(chunks) - 1)
+                    if i == len(chunks) - 1:
+                        piece += "]"
+                    data = piece.encode()
+                    writer.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+                    await writer.drain()
+                    if writer.is_closing():
+                        break
+                    self.chunks_streamed += 1
+                    await asyncio.sleep(jittered(self.token_latency, self.token_latency / 2))
+                writer.write(b"0\r\n\r\n")
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError, asyncio.CancelledError):
+            pass
+        finally:
+            writer.close()
+
+def _run_providers(settings: dict, conn):
+    import websockets
+
+    random.seed(settings.get("seed", 0))
+    assemblyai = FakeAssemblyAI(
+        latency=settings["stt_latency"], jitter=settings["stt_jitter"],
+        eot_silence_ms=settings["eot_silence_ms"], partial_ms=settings["partial_ms"],
+    )
+    gemini = FakeGemini(
+        first_token_latency=settings["llm_latency"], jitter=settings["llm_jitter"],
+        token_latency=settings["token_latency"], reply_words=settings["reply_words"],
+    )
+    murf = StubMurfServer(latency=settings["tts_latency"], jitter=settings["tts_jitter"])
+
+    async def main():
+        stt_server = await websockets.serve(assemblyai.handle, "127.0.0.1", 0, max_size=None)
+        llm_server = await asyncio.start_server(gemini.handle, "127.0.0.1", 0)
+        tts_server = await websockets.serve(murf._handle, "127.0.0.1", 0)
+        conn.send({
+            "assemblyai_host": f"ws://127.0.0.1:{stt_server.sockets[0].getsockname()[1]}",
+            "gemini_endpoint": f"http://127.0.0.1:{llm_server.sockets[0].getsockname()[1]}",
+            "murf_url": f"ws://127.0.0.1:{tts_server.sockets[0].getsockname()[1]}/v1/speech/stream-input",
+        })
+        await asyncio.get_running_loop().run_in_executor(None, conn.recv)
+        for server in (stt_server, llm_server, tts_server):
+            server.close()
+        conn.send({
+            "stt_sessions": assemblyai.sessions,
+            "stt_audio_bytes": assemblyai.audio_bytes,
+            "turns_sent": assemblyai.turns_sent,
+            "partials_sent": assemblyai.partials_sent,
+            "llm_requests": gemini.requests,
+            "llm_chunks_planned": gemini.chunks_planned,
+            "llm_chunks_streamed": gemini.chunks_streamed,
+            "tts_connections": murf.connections,
+            "tts_texts": murf.texts,
+        })
+
+    asyncio.run(main())
+
+class FakeProviders:
+    """All three fakes in one child process; `urls` tells the app where they are"""
+
+    def __init__(self, **settings):
+        defaults = {
+            "stt_latency": 0.15, "stt_jitter": 0.05, "eot_silence_ms": 700, "partial_ms": 400,
+            "llm_latency": 0.35, "llm_jitter": 0.1, "token_latency": 0.03, "reply_words": 45,
+            "tts_latency": 0.2, "tts_jitter": 0.05,
+        }
+        self.settings = {**defaults, **settings}
+        self._parent, child = multiprocessing.Pipe()
+        self._proc = multiprocessing.Process(target=_run_providers, args=(self.settings, child), daemon=True)
+        self.urls: Dict[str, str] = {}
+        self.stats: Dict[str, object] = {}
+
+    def start(self) -> "FakeProviders":
+        self._proc.start()
+        self.urls = self._parent.recv()
+        return self
+
+    def stop(self) -> Dict[str, object]:
+        self._parent.send("stop")
+        self.stats = self._parent.recv()
+        self._proc.join(timeout=5)
+        return self.stats
@@ -0,0 +1,110 @@
+"""Intent detection: correctness against the labeled corpus, latency and throughput.
+
+Checks IntentService.detect_intent against benchmarks/intent_corpus.jsonl
+(labels recorded from the original regex-per-call implementation), then times
+per-utterance latency and batch throughput for both the original and the
+compiled engine. Exits non-zero on any label mismatch.
+
+    python -m benchmarks.intent_bench --repeat 200
+"""
+import argparse
+import json
+import re
+import statistics
+import sys
+import time
+from pathlib import Path
+
+from app.services.intent_service import IntentService
+
+CORPUS = Path(__file__).with_name("intent_corpus.jsonl")
+
+def legacy_detect_intent(text):
+    """The original implementation, kept verbatim as the reference"""
+    if not text or not text.strip():
+        return None
+    text_lower = text.lower().strip()
+    weather_patterns = [
+        r"weather in ([\w\s]+)",
+        r"temperature in (\w+)",
+        r"how.*weather.*(\w+)",
+        r"what.*weather.*like in (\w+)",
+        r"weather.*(\w+)",
+        r"temperature.*(\w+)"
+    ]
+    for pattern in weather_patterns:
+        match = re.search(pattern, text_lower)
+        if match:
+            return {"intent": "weather", "location": match.group(1).strip()}
+    if any(keyword in text_lower for keyword in ["weather", "temperature", "forecast", "climate"]):
+        return {"intent": "weather", "location": "London"}
+    if any(w in text_lower for w in ["news", "headlines", "happening", "current events"]):
+        match = re.search(r"news.*?about\s+(\w+)|(\w+)\s+news", text_lower)
+        topic = (match.group(1) or match.group(2)) if match else "general"
+        return {"intent": "news", "topic": topic}
+    if any(w in text_lower for w in ["movie", "film", "cinema"]):
+        match = re.search(r"movies?.*?about\s+([\w\s]+)|find.*?movie\s+([\w\s]+)|search.*?movie\s+([\w\s]+)", text_lower)
+        query = match.group(1) or match.group(2) or match.group(3) if match else "popular"
+        return {"intent": "movies", "query": query.strip()}
+    if "anime" in text_lower:
+        match = re.search(r"anime.*?about\s+([\w\s]+)|search.*?anime\s+([\w\s]+)", text_lower)
+        query = (match.group(1) or match.group(2)) if match else "naruto"
+        return {"intent": "anime", "query": query.strip()}
+    if any(w in text_lower for w in ["quote", "inspire", "motivate", "wisdom"]):
+        match = re.search(r"quote.*?about\s+([\w\s]+)", text_lower)
+        category = match.group(1).strip() if match else "motivational"
+        return {"intent": "quote", "category": category}
+    return None
+
+def load_corpus():
+    with CORPUS.open(encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+def time_engine(detect, texts, repeat):
+    per_call = []
+    for text in texts:
+        start = time.perf_counter()
+        for _ in range(repeat):
+            detect(text)
+        per_call.append((time.perf_counter() - start) / repeat * 1e6)
+
+    batch = texts * repeat
+    start = time.perf_counter()
+    for text in batch:
+        detect(text)
+    elapsed = time.perf_counter() - start
+    return {
+        "p50_us": statistics.median(per_call),
+        "p99_us": statistics.quantiles(per_call, n=100)[98],
+        "mean_us": statistics.fmean(per_call),
+        "throughput_per_s": len(batch) / elapsed,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    corpus = load_corpus()
+    service = IntentService()
+    mismatches = [row for row in corpus if service.detect_intent(row["text"]) != row["expected"]]
+    for row in mismatches:
+        print(f"MISMATCH {row['text']!r}: expected {row['expected']}, got {service.detect_intent(row['text'])}")
+    print(f"corpus: {len(corpus)} utterances, {len(mismatches)} mismatches")
+
+    texts = [row["text"] for row in corpus]
+    batch_results = service.detect_intents(texts)
+    assert batch_results == [row["expected"] for row in corpus] or mismatches
+
+    for name, detect in (("legacy", legacy_detect_intent), ("compiled", service.detect_intent)):
+        r = time_engine(detect, texts, args.repeat)
+        print(
+            f"{name:>9}: p50 {r['p50_us']:6.2f} us | p99 {r['p99_us']:6.2f} us | "
+            f"mean {r['mean_us']:6.2f} us | {r['throughput_per_s']:,.0f} utterances/s"
+        )
+
+    if mismatches:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
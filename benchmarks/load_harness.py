@@ -0,0 +1,287 @@
+"""Concurrent /ws/stream sessions against local stand-ins for every provider.
+
+For each session count N, starts the fake AssemblyAI, Gemini and Murf servers
+(benchmarks.fake_providers) and the app under uvicorn, each in its own
+process, then opens N WebSocket sessions that stream PCM in real time like
+the browser does (~85 ms chunks of speech followed by a pause, per turn).
+It reports:
+
+- end-of-turn -> first LLM chunk and -> first audio (p50/p95/p99). End of
+  turn is when the fake STT sent its Turn event.
+- app event-loop lag (sampled every 20 ms inside the app process)
+- app CPU utilisation and RSS (current and peak)
+
+The driver shares the machine with the app, so absolute numbers are
+pessimistic on small hosts; compare levels against each other.
+
+    python -m benchmarks.load_harness --sessions 1,5,10,20 --turns 3
+    python -m benchmarks.load_harness --sessions 10 --wav recording.wav --llm-latency 0.6 --llm-jitter 0.2
+"""
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import socket
+import statistics
+import time
+import wave
+from typing import Dict, List, Optional
+
+import numpy as np
+import websockets
+
+from benchmarks.fake_providers import FakeProviders
+
+SAMPLE_RATE = 16000
+CHUNK_BYTES = 2730  # what the browser sends: 4096 samples at 48 kHz, downsampled to 16 kHz PCM16
+CHUNK_SECS = CHUNK_BYTES / 2 / SAMPLE_RATE
+
+def percentile(values: List[float], q: float) -> float:
+    if not values:
+        return float("nan")
+    if len(values) == 1:
+        return values[0]
+    return statistics.quantiles(values, n=100, method="inclusive")[int(q) - 1]
+
+def read_proc_status() -> Dict[str, float]:
+    status = {}
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith(("VmRSS:", "VmHWM:")):
+                name, value = line.split(":")
+                status[name] = int(value.split()[0]) / 1024
+    return status
+
+def _run_app(env: Dict[str, str], port: int, conn):
+    """Child process: the app under uvicorn plus a loop-lag sampler"""
+    os.environ.update(env)
+    import logging
+    import warnings
+    warnings.filterwarnings("ignore", category=FutureWarning)
+    import uvicorn
+    from app.main import app
+
+    logging.disable(logging.WARNING)
+
+    async def main():
+        server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="error", ws_max_size=16 * 1024 * 1024))
+        serving = asyncio.create_task(server.serve())
+        while not server.started:
+            await asyncio.sleep(0.01)
+
+        lags: List[float] = []
+        stop = asyncio.Event()
+
+        async def sample_lag():
+            loop = asyncio.get_running_loop()
+            while not stop.is_set():
+                start = loop.time()
+                await asyncio.sleep(0.02)
+                lags.append((loop.time() - start - 0.02) * 1000)
+
+        sampler = asyncio.create_task(sample_lag())
+        cpu_start, wall_start = time.process_time(), time.perf_counter()
+        conn.send("ready")
+        await asyncio.get_running_loop().run_in_executor(None, conn.recv)
+        cpu, wall = time.process_time() - cpu_start, time.perf_counter() - wall_start
+        stop.set()
+        await sampler
+        status = read_proc_status()
+        services = app.state.services
+        conn.send({
+            "lags_ms": lags,
+            "cpu_percent": cpu / wall * 100,
+            "rss_mb": status.get("VmRSS", 0.0),
+            "rss_peak_mb": status.get("VmHWM", 0.0),
+            "murf": services.tts_connections.stats(),
+            "gemini": services.llm_models.stats(),
+        })
+        server.should_exit = True
+        await serving
+
+    asyncio.run(main())
+
+class AppProcess:
+    def __init__(self, env: Dict[str, str]):
+        with socket.socket() as s:
+            s.bind(("127.0.0.1", 0))
+            self.port = s.getsockname()[1]
+        self._parent, child = multiprocessing.Pipe()
+        self._proc = multiprocessing.Process(target=_run_app, args=(env, self.port, child), daemon=True)
+
+    def start(self) -> "AppProcess":
+        self._proc.start()
+        self._parent.recv()
+        return self
+
+    def stop(self) -> dict:
+        self._parent.send("stop")
+        stats = self._parent.recv()
+        self._proc.join(timeout=10)
+        return stats
+
+def synth_turn(speech_secs: float, pause_secs: float, rng: np.random.Generator) -> bytes:
+    """Voiced-sounding burst followed by room noise, as PCM16"""
+    t = np.arange(int(speech_secs * SAMPLE_RATE)) / SAMPLE_RATE
+    pitch = rng.uniform(100, 220)
+    voiced = sum(np.sin(2 * np.pi * pitch * k * t) / k for k in range(1, 6)) * (0.55 + 0.45 * np.sin(2 * np.pi * 4 * t))
+    speech = 4000 * voiced + rng.normal(0, 30, t.size)
+    pause = rng.normal(0, 30, int(pause_secs * SAMPLE_RATE))
+    return np.clip(np.concatenate([speech, pause]), -32768, 32767).astype(np.int16).tobytes()
+
+def load_wav(path: str) -> bytes:
+    with wave.open(path, "rb") as w:
+        if w.getframerate() != SAMPLE_RATE or w.getsampwidth() != 2 or w.getnchannels() != 1:
+            raise SystemExit(f"{path}: expected 16 kHz 16-bit mono PCM")
+        return w.readframes(w.getnframes())
+
+async def run_session(url: str, turn_audio: List[bytes], record: dict):
+    turns: Dict[str, dict] = record["turns"]
+    current: Optional[dict] = None
+    done = asyncio.Event()
+    expected = len(turn_audio)
+
+    async def receive(ws):
+        nonlocal current
+        async for message in ws:
+            now = time.time()
+            if isinstance(message, bytes):
+                if current is not None and current["first_audio"] is None:
+                    current["first_audio"] = now
+                continue
+            data = json.loads(message)
+            kind = data.get("type")
+            if kind == "transcript":
+                current = turns[data["text"]] = {"client_eot": now, "first_llm": None, "first_audio": None, "complete": None}
+            elif kind == "llm_chunk" and current is not None and current["first_llm"] is None:
+                current["first_llm"] = now
+            elif kind == "audio_chunk" and current is not None and current["first_audio"] is None:
+                current["first_audio"] = now
+            elif kind == "audio_complete" and current is not None:
+                current["complete"] = now
+                if sum(1 for t in turns.values() if t["complete"]) >= expected:
+                    done.set()
+            elif kind == "info" and data.get("message") == "Ready to process audio":
+                record["ready"] = now
+            elif kind in ("error", "audio_error"):
+                record["errors"].append(data.get("message"))
+
+    started = time.time()
+    async with websockets.connect(url, max_size=None) as ws:
+        reader = asyncio.create_task(receive(ws))
+        loop = asyncio.get_running_loop()
+        next_send = loop.time()
+        for audio in turn_audio:
+            for offset in range(0, len(audio), CHUNK_BYTES):
+                await ws.send(audio[offset:offset + CHUNK_BYTES])
+                next_send += CHUNK_SECS
+                await asyncio.sleep(max(0.0, next_send - loop.time()))
+        try:
+            await asyncio.wait_for(done.wait(), timeout=15)
+        except asyncio.TimeoutError:
+            record["errors"].append("timed out waiting for the last reply")
+        await ws.send("__stop")
+        reader.cancel()
+    record["connect_ms"] = (record.get("ready", started) - started) * 1000
+
+async def drive(port: int, sessions: int, turn_audio: List[bytes], stagger: float) -> List[dict]:
+    records = [{"turns": {}, "errors": []} for _ in range(sessions)]
+
+    async def one(i: int):
+        await asyncio.sleep(i * stagger)
+        query = f"session=load-{i}&assembly_key=load&gemini_key=load&murf_key=load&audio=binary"
+        try:
+            await run_session(f"ws://127.0.0.1:{port}/ws/stream?{query}", turn_audio, records[i])
+        except Exception as e:
+            records[i]["errors"].append(f"{type(e).__name__}: {e}")
+
+    await asyncio.gather(*(one(i) for i in range(sessions)))
+    return records
+
+def run_level(sessions: int, args, turn_audio: List[bytes]) -> dict:
+    providers = FakeProviders(
+        stt_latency=args.stt_latency, stt_jitter=args.stt_jitter,
+        llm_latency=args.llm_latency, llm_jitter=args.llm_jitter, token_latency=args.token_latency,
+        tts_latency=args.tts_latency, tts_jitter=args.tts_jitter,
+    ).start()
+    app = AppProcess({
+        "ASSEMBLYAI_API_HOST": providers.urls["assemblyai_host"],
+        "GEMINI_API_ENDPOINT": providers.urls["gemini_endpoint"],
+        "GEMINI_TRANSPORT": "rest",
+        "MURF_WS_URL": providers.urls["murf_url"],
+        "AUTO_ASSISTANT_REPLY": "true",
+    }).start()
+    try:
+        records = asyncio.run(drive(app.port, sessions, turn_audio, args.stagger))
+    finally:
+        app_stats = app.stop()
+        provider_stats = providers.stop()
+
+    sent = provider_stats["turns_sent"]
+    to_llm, to_audio, errors, missing = [], [], [], 0
+    for record in records:
+        errors.extend(record["errors"])
+        for text, turn in record["turns"].items():
+            eot = sent.get(text, turn["client_eot"])
+            if turn["first_llm"]:
+                to_llm.append((turn["first_llm"] - eot) * 1000)
+            if turn["first_audio"]:
+                to_audio.append((turn["first_audio"] - eot) * 1000)
+            else:
+                missing += 1
+    return {
+        "sessions": sessions,
+        "turns": sum(len(r["turns"]) for r in records),
+        "expected_turns": sessions * len(turn_audio),
+        "to_llm": to_llm,
+        "to_audio": to_audio,
+        "missing_audio": missing,
+        "errors": errors,
+        "app": app_stats,
+        "providers": provider_stats,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", default="1,5,10,20", help="comma-separated session counts")
+    parser.add_argument("--turns", type=int, default=3)
+    parser.add_argument("--speech-secs", type=float, default=2.0)
+    parser.add_argument("--pause-secs", type=float, default=3.6)
+    parser.add_argument("--wav", help="16 kHz mono PCM16 WAV to stream for every turn instead of synthetic audio")
+    parser.add_argument("--stagger", type=float, default=0.05, help="seconds between session starts")
+    parser.add_argument("--stt-latency", type=float, default=0.15)
+    parser.add_argument("--stt-jitter", type=float, default=0.05)
+    parser.add_argument("--llm-latency", type=float, default=0.35, help="first-token latency")
+    parser.add_argument("--llm-jitter", type=float, default=0.1)
+    parser.add_argument("--token-latency", type=float, default=0.03)
+    parser.add_argument("--tts-latency", type=float, default=0.2)
+    parser.add_argument("--tts-jitter", type=float, default=0.05)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(7)
+    if args.wav:
+        turn_audio = [load_wav(args.wav)] * args.turns
+    else:
+        turn_audio = [synth_turn(args.speech_secs, args.pause_secs, rng) for _ in range(args.turns)]
+
+    print(
+        f"{'N':>4} {'turns':>9} | {'eot->llm p50/p95/p99 ms':>24} | {'eot->audio p50/p95/p99 ms':>26} | "
+        f"{'loop lag p50/p99/max ms':>23} | {'cpu%':>5} | {'rss/peak MB':>11} | errors"
+    )
+    for sessions in (int(n) for n in args.sessions.split(",")):
+        r = run_level(sessions, args, turn_audio)
+        lags = r["app"]["lags_ms"]
+        print(
+            f"{sessions:>4} {r['turns']:>4}/{r['expected_turns']:<4} | "
+            f"{percentile(r['to_llm'], 50):7.0f} {percentile(r['to_llm'], 95):7.0f} {percentile(r['to_llm'], 99):7.0f}  | "
+            f"{percentile(r['to_audio'], 50):8.0f} {percentile(r['to_audio'], 95):7.0f} {percentile(r['to_audio'], 99):7.0f}  | "
+            f"{percentile(lags, 50):6.1f} {percentile(lags, 99):6.1f} {max(lags, default=0):7.1f}  | "
+            f"{r['app']['cpu_percent']:5.1f} | {r['app']['rss_mb']:5.0f}/{r['app']['rss_peak_mb']:<5.0f} | "
+            f"{len(r['errors']) + r['missing_audio']}"
+        )
+        for error in sorted(set(r["errors"]))[:3]:
+            print(f"       error: {error}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""Prompt size and build cost over a long conversation.
+
+Replays N turns and records, at checkpoints, the prompt size and the time to
+build the next prompt for the original full-history string rebuild and for
+PromptWindow. The windowed prompt should level off at the token budget while
+the original keeps growing.
+
+    python -m benchmarks.prompt_growth --turns 400 --budget 4000
+"""
+import argparse
+import time
+
+from app.services.prompt_builder import MODEL, USER, PromptWindow, estimate_tokens
+
+PERSONA = "You are a helpful and neutral AI assistant.\nAnswer clearly and politely without role-play."
+
+def legacy_prompt(history):
+    """The original per-turn rebuild, kept verbatim as the reference"""
+    conversation_prompt = f"System: {PERSONA}\n\n"
+    for turn in history:
+        speaker = "Human" if turn["role"] == "user" else "Assistant"
+        conversation_prompt += f"{speaker}: {turn['content']}\n"
+    conversation_prompt += "\nAssistant: "
+    return conversation_prompt
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--turns", type=int, default=400)
+    parser.add_argument("--budget", type=int, default=4000)
+    args = parser.parse_args()
+
+    history = []
+    window = PromptWindow(token_budget=args.budget)
+    checkpoints = {max(1, args.turns * k // 8) for k in range(1, 9)}
+
+    print(f"{'turn':>6} | {'legacy tokens':>13} {'build us':>9} | {'window tokens':>13} {'build us':>9}")
+    for turn in range(1, args.turns + 1):
+        user_text = f"Tell me something interesting about topic number {turn}, please keep it short."
+        reply = f"Here is a short fact about topic {turn}. " * 6
+
+        history.append({"role": "user", "content": user_text})
+        start = time.perf_counter()
+        prompt = legacy_prompt(history)
+        legacy_us = (time.perf_counter() - start) * 1e6
+
+        start = time.perf_counter()
+        window.append(USER, user_text)
+        window.contents()
+        window_us = (time.perf_counter() - start) * 1e6
+
+        if turn in checkpoints:
+            print(
+                f"{turn:>6} | {estimate_tokens(prompt):>13,} {legacy_us:>9.1f} | "
+                f"{window.tokens + estimate_tokens(PERSONA):>13,} {window_us:>9.1f}"
+            )
+
+        history.append({"role": "assistant", "content": reply})
+        window.append(MODEL, reply)
+
+    print(f"window: {window.stats()}")
+
+if __name__ == "__main__":
+    main()
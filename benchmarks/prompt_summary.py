@@ -0,0 +1,122 @@
+"""Rolling summaries: prompt tokens and Gemini latency over a long voice conversation.
+
+Replays `--turns` turns through a PromptWindow with a Gemini stand-in whose
+response time grows with the prompt (`--base-ms` plus `--ms-per-1k` per
+thousand prompt tokens; an assumption, adjust to what you measure). The
+user speaks for `--gap` seconds between replies, which is when background
+summaries run. All sleeps are multiplied by `--time-scale` to keep the run
+short; reported times are unscaled. Three histories:
+
+- verbatim: every turn resent (the budget set out of reach)
+- trimmed: the `--budget` token window, oldest turns dropped
+- summarized: the same window, with HistorySummarizer folding older turns
+  into a summary past `--threshold` tokens
+
+    python -m benchmarks.prompt_summary --turns 300 --threshold 1500
+"""
+import argparse
+import asyncio
+import statistics
+import time
+from typing import Union
+
+from app.services.metrics import Metrics
+from app.services.prompt_builder import MODEL, USER, PromptWindow, estimate_tokens
+from app.services.summarizer import HistorySummarizer
+
+class FakeGemini:
+    """`generate_response` stand-in whose latency grows with the prompt"""
+
+    def __init__(self, args):
+        self.args = args
+        self.requests = 0
+        self.seconds = 0.0
+
+    def latency(self, prompt_tokens: int) -> float:
+        return (self.args.base_ms + self.args.ms_per_1k * prompt_tokens / 1000) / 1000
+
+    async def generate_response(self, prompt: Union[str, list], api_key: str = None, **kwargs) -> str:
+        text = prompt if isinstance(prompt, str) else " ".join(p for m in prompt for p in m["parts"])
+        latency = self.latency(estimate_tokens(text))
+        await asyncio.sleep(latency * self.args.time_scale)
+        self.requests += 1
+        self.seconds += latency
+        return " ".join(f"point{i}" for i in range(self.args.summary_words))
+
+async def run(mode: str, args) -> dict:
+    window = PromptWindow(token_budget=10 ** 9 if mode == "verbatim" else args.budget)
+    gemini = FakeGemini(args)
+    metrics = Metrics()
+    summarizer = HistorySummarizer(
+        llm=gemini, metrics=metrics, threshold=args.threshold, keep_turns=args.keep_turns, words=args.summary_words
+    )
+    checkpoints = {max(1, args.turns * k // 8) for k in range(1, 9)}
+    rows, tokens, latencies = [], [], []
+
+    for turn in range(1, args.turns + 1):
+        window.append(USER, f"Tell me something interesting about topic number {turn}, please keep it short.")
+        prompt_tokens = window.prompt_tokens
+        latency = gemini.latency(prompt_tokens)
+        await asyncio.sleep(latency * args.time_scale)
+        window.append(MODEL, f"Here is a short fact about topic {turn}. " * 6)
+        if mode == "summarized":
+            summarizer.maybe_compact(window)
+        tokens.append(prompt_tokens)
+        latencies.append(latency * 1000)
+        if turn in checkpoints:
+            rows.append((turn, prompt_tokens, latency * 1000))
+        await asyncio.sleep(args.gap * args.time_scale)
+
+    await summarizer.aclose()
+    tail = slice(len(tokens) // 2, None)
+    return {
+        "rows": rows,
+        "tail_tokens": statistics.mean(tokens[tail]),
+        "tail_latency": statistics.mean(latencies[tail]),
+        "window": window.stats(),
+        "summaries": summarizer.outcomes,
+        # Replies only sleep; every generate_response call was a summary
+        "summary_seconds": gemini.seconds,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--turns", type=int, default=300)
+    parser.add_argument("--budget", type=int, default=4000, help="prompt window token budget")
+    parser.add_argument("--threshold", type=int, default=1500, help="summarize past this many prompt tokens")
+    parser.add_argument("--keep-turns", type=int, default=6)
+    parser.add_argument("--summary-words", type=int, default=150)
+    parser.add_argument("--gap", type=float, default=3.0, help="seconds the user speaks between replies")
+    parser.add_argument("--base-ms", type=float, default=350, help="Gemini response time for an empty prompt")
+    parser.add_argument("--ms-per-1k", type=float, default=120, help="added Gemini time per 1000 prompt tokens")
+    parser.add_argument("--time-scale", type=float, default=0.01, help="multiplier on every sleep")
+    args = parser.parse_args()
+
+    results = {}
+    started = time.perf_counter()
+    for mode in ("verbatim", "trimmed", "summarized"):
+        results[mode] = asyncio.run(run(mode, args))
+    print(f"{args.turns} turns in {time.perf_counter() - started:.1f} s (time scale {args.time_scale:g})")
+
+    modes = list(results)
+    print(f"{'turn':>6} | " + " | ".join(f"{m + ' tokens':>17} {'gemini ms':>9}" for m in modes))
+    for i, (turn, _, _) in enumerate(results[modes[0]]["rows"]):
+        print(f"{turn:>6} | " + " | ".join(
+            f"{results[m]['rows'][i][1]:>17,} {results[m]['rows'][i][2]:>9.0f}" for m in modes
+        ))
+    for mode, r in results.items():
+        w = r["window"]
+        line = (
+            f"{mode:>10}: second half mean {r['tail_tokens']:6,.0f} prompt tokens, {r['tail_latency']:5.0f} ms per reply; "
+            f"{w['trimmed']} turns dropped, {w['summarized']} summarized"
+        )
+        if mode == "summarized":
+            s = r["summaries"]
+            line += (
+                f"; {s['applied']} summaries applied, {s['stale']} stale, {s['failed']} failed, "
+                f"{r['summary_seconds']:.1f} s of background Gemini time"
+            )
+        print(line)
+
+if __name__ == "__main__":
+    main()
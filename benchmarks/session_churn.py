@@ -0,0 +1,95 @@
+"""Session memory under churn: plain dicts vs. the bounded SessionManager.
+
+Simulates a long-running worker where every connection gets a fresh session
+id (like anonymous `anon-<ts>` clients) and speaks a few turns. Traced memory
+of the original never-evicted dicts grows with the number of sessions seen;
+the SessionManager's stays flat once it reaches its session cap.
+
+A second case connects `--connected` sockets (more than `--max-sessions`)
+and churns anonymous sessions around them: every connected session must keep
+its persona and history.
+
+    python -m benchmarks.session_churn --sessions 20000 --max-sessions 1000
+"""
+import argparse
+import asyncio
+import tracemalloc
+
+from app.services.prompt_builder import MODEL, USER
+from app.services.sessions import SessionManager
+
+PERSONA = "You are a helpful and neutral AI assistant."
+
+def run_legacy(sessions, turns, report):
+    chat_history, session_persona = {}, {}
+    for i in range(sessions):
+        session_id = f"anon-{i}"
+        session_persona[session_id] = PERSONA
+        history = chat_history.setdefault(session_id, [])
+        for t in range(turns):
+            history.append({"role": "user", "content": f"question {t} from session {i}"})
+            history.append({"role": "assistant", "content": f"a reasonably sized answer to question {t} " * 3})
+        report(i, len(chat_history))
+
+def run_manager(sessions, turns, report, manager):
+    async def churn():
+        for i in range(sessions):
+            history = (await manager.get_or_create(f"anon-{i}")).history
+            for t in range(turns):
+                history.append(USER, f"question {t} from session {i}")
+                history.append(MODEL, f"a reasonably sized answer to question {t} " * 3)
+            report(i, len(manager))
+
+    asyncio.run(churn())
+
+def measure(name, run, sessions):
+    checkpoints = {sessions * k // 5 - 1 for k in range(1, 6)}
+    tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0]
+
+    def report(i, live):
+        if i in checkpoints:
+            used = tracemalloc.get_traced_memory()[0] - baseline
+            print(f"{name:>8} | after {i + 1:>7,} sessions | live {live:>7,} | {used / 1e6:8.2f} MB")
+
+    run(report)
+    tracemalloc.stop()
+
+async def check_connected(args):
+    """Live connections beyond the cap must survive LRU eviction"""
+    manager = SessionManager(max_sessions=args.max_sessions)
+    live = [f"live-{i}" for i in range(args.connected)]
+    for session_id in live:
+        session = await manager.get_or_create(session_id)
+        session.connections += 1
+        session.persona = f"persona of {session_id}"
+        session.history.append(USER, f"hello from {session_id}")
+    for i in range(args.max_sessions * 2):
+        (await manager.get_or_create(f"anon-{i}")).history.append(USER, "churn")
+    kept = 0
+    for session_id in live:
+        session = await manager.get_or_create(session_id)
+        kept += session.persona == f"persona of {session_id}" and len(session.history) == 1
+    stats = await manager.stats()
+    print(
+        f"connected | {args.connected:,} live over a cap of {args.max_sessions:,}: {kept:,} kept their session "
+        f"({'OK' if kept == args.connected else 'FAIL'}); live {stats['sessions']:,}, "
+        f"{stats['over_capacity']:,} times over the cap, {stats['lru_evictions']:,} idle sessions evicted"
+    )
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=20000)
+    parser.add_argument("--turns", type=int, default=4)
+    parser.add_argument("--max-sessions", type=int, default=1000)
+    parser.add_argument("--connected", type=int, default=1200, help="live connections in the over-the-cap case")
+    args = parser.parse_args()
+
+    measure("legacy", lambda report: run_legacy(args.sessions, args.turns, report), args.sessions)
+    manager = SessionManager(max_sessions=args.max_sessions)
+    measure("manager", lambda report: run_manager(args.sessions, args.turns, report, manager), args.sessions)
+    print(f"manager stats: {asyncio.run(manager.stats())}")
+    asyncio.run(check_connected(args))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+"""Sessions across uvicorn workers: throughput per worker count and whether conversations survive.
+
+Starts the app with `uvicorn --workers N` for each N in `--workers`, against
+the fake Gemini from benchmarks.fake_providers, and runs `--clients`
+concurrent chats of `--requests` messages each through /api/chat-smart, every
+request on a new connection so consecutive messages of one chat land on
+whichever worker accepts them. Then it resets every chat and sends one more
+message. Per run it reports requests/s, latency and how many chats came back
+consistent: full history after the last message (2 per message) and an
+empty one after the reset.
+
+The default compares `SESSION_STORE=memory` (each worker has its own
+sessions) with `sqlite` (shared WAL file, written behind). The driver and
+every worker share the machine, so requests/s only grows with workers on a
+host with CPUs to spare.
+
+    python -m benchmarks.session_workers --workers 1,2,4 --clients 32 --requests 8
+"""
+import argparse
+import asyncio
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List
+
+import httpx
+
+from benchmarks.fake_providers import FakeProviders
+from benchmarks.load_harness import percentile
+
+ROOT = Path(__file__).resolve().parents[1]
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def start_app(workers: int, env: Dict[str, str]) -> (subprocess.Popen, str):
+    port = free_port()
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1", "--port", str(port),
+         "--workers", str(workers), "--log-level", "error"],
+        cwd=ROOT, env={**os.environ, **env}, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        try:
+            httpx.get(f"{base_url}/debug/sessions", timeout=1).raise_for_status()
+            # Give the remaining workers a moment to finish their startup
+            time.sleep(0.5 * workers)
+            return proc, base_url
+        except httpx.HTTPError:
+            time.sleep(0.2)
+    proc.terminate()
+    raise RuntimeError(f"App with {workers} workers did not start")
+
+async def drive(base_url: str, args) -> dict:
+    # No keep-alive: every request is a new connection, accepted by any worker
+    limits = httpx.Limits(max_keepalive_connections=0)
+    latencies: List[float] = []
+    consistent = 0
+
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+        async def chat(i: int, text: str) -> dict:
+            started = time.perf_counter()
+            response = await client.post("/api/chat-smart", params={"session_id": f"bench-{i}"}, json={"prompt": text})
+            latencies.append((time.perf_counter() - started) * 1000)
+            response.raise_for_status()
+            return response.json()
+
+        async def conversation(i: int) -> bool:
+            reply = None
+            for n in range(args.requests):
+                reply = await chat(i, f"tell me something, part {n}")
+            kept = len(reply["chat_history"]) == 2 * args.requests
+            (await client.post(f"/reset/bench-{i}")).raise_for_status()
+            reply = await chat(i, "start over")
+            return kept and len(reply["chat_history"]) == 2
+
+        started = time.perf_counter()
+        results = await asyncio.gather(*(conversation(i) for i in range(args.clients)))
+        elapsed = time.perf_counter() - started
+    consistent = sum(results)
+    return {"requests": len(latencies), "elapsed": elapsed, "latencies": latencies, "consistent": consistent}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", default="1,2,4", help="comma-separated uvicorn worker counts")
+    parser.add_argument("--stores", default="memory,sqlite", help="comma-separated SESSION_STORE backends")
+    parser.add_argument("--clients", type=int, default=32, help="concurrent chats")
+    parser.add_argument("--requests", type=int, default=8, help="messages per chat before the reset")
+    parser.add_argument("--llm-latency", type=float, default=0.05, help="fake Gemini response time")
+    args = parser.parse_args()
+
+    providers = FakeProviders(llm_latency=args.llm_latency, llm_jitter=0.0, reply_words=20).start()
+    print(
+        f"{args.clients} chats x {args.requests + 1} messages, fake Gemini {args.llm_latency * 1000:.0f} ms, "
+        f"{os.cpu_count()} CPUs"
+    )
+    try:
+        for store in args.stores.split(","):
+            for workers in (int(n) for n in args.workers.split(",")):
+                with tempfile.TemporaryDirectory() as tmp:
+                    proc, base_url = start_app(workers, {
+                        "GEMINI_API_KEY": "bench",
+                        "GEMINI_API_ENDPOINT": providers.urls["gemini_endpoint"],
+                        "GEMINI_TRANSPORT": "rest",
+                        "SESSION_STORE": store,
+                        "SESSION_DB_PATH": str(Path(tmp) / "sessions.db"),
+                        "TTS_CACHE_ENABLED": "false",
+                    })
+                    try:
+                        r = asyncio.run(drive(base_url, args))
+                    finally:
+                        proc.terminate()
+                        proc.wait(timeout=30)
+                lat = r["latencies"]
+                print(
+                    f"{store:>6}, {workers} worker{'s' if workers > 1 else ' '}: {r['requests'] / r['elapsed']:6.1f} req/s, "
+                    f"latency p50 {percentile(lat, 50):5.0f} ms p95 {percentile(lat, 95):5.0f} ms; "
+                    f"{r['consistent']}/{args.clients} chats consistent"
+                )
+    finally:
+        providers.stop()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+"""Skill provider rate limiting: a burst of anime lookups against a Jikan stub that enforces 3 req/s.
+
+`--lookups` anime lookups over `--queries` distinct titles arrive within
+`--spread` seconds. The stub answers 429 with Retry-After: 1 once more than
+`--provider-rate` requests arrived in the last second, like Jikan. The skill
+cache keeps results for `--ttl` seconds (0: every lookup goes upstream, but
+the last result per title can still be served while rate limited). Runs:
+
+- fixed sleeps: the original search_anime (random 1-2 s sleep before every
+  call, sleeping out Retry-After inside the lookup), kept as the reference
+- unpaced: the current code with no limit configured for the provider
+- token bucket: the current code with a `--limit` bucket for the provider
+
+and reports lookup latency, upstream requests and 429s, and how lookups
+were answered.
+
+    python -m benchmarks.skill_rate_limit --lookups 60 --spread 10 --limit 3,1
+"""
+import argparse
+import asyncio
+import random
+import time
+from collections import deque
+from functools import partial
+from typing import Dict
+
+from app.core.config import get_config
+from app.services.cache import TTLCache
+from app.services.http_client import HTTPClientPool
+from app.services.metrics import Metrics
+from app.services.rate_limit import RateLimiter
+from app.services.skills_service import SkillsService, _is_cacheable
+from benchmarks.load_harness import percentile
+from benchmarks.stubs import Handler, StubProcess, skill_endpoints, skill_routes
+
+def routes(provider_rate: int) -> Dict[str, Handler]:
+    """Skill stubs where /anime allows `provider_rate` requests in any one second"""
+    base = skill_routes()
+    recent = deque()
+
+    def anime(path: str, query: str):
+        now = time.monotonic()
+        while recent and now - recent[0] > 1.0:
+            recent.popleft()
+        if len(recent) >= provider_rate:
+            return 429, {"status": 429, "message": "Too many requests"}, {"Retry-After": "1"}
+        recent.append(now)
+        return base["/anime"](path, query)
+
+    return {**base, "/anime": anime}
+
+async def legacy_search_anime(skills: SkillsService, query: str, retries: int = 3):
+    """The original fetch: fixed random sleep, then sleep out every 429's Retry-After"""
+    await asyncio.sleep(random.uniform(1, 2))
+    for attempt in range(retries):
+        response = await skills.http.get(skills.endpoints["anime"], params={"q": query, "limit": 5})
+        if response.status_code == 429:
+            if attempt < retries - 1:
+                await asyncio.sleep(int(response.headers.get("Retry-After", 60)))
+                continue
+            return "Sorry, API rate limited. Please try again later."
+        return "Anime results"
+    return "Sorry, API rate limited. Please try again later."
+
+async def run(mode: str, args) -> dict:
+    stub = StubProcess(partial(routes, args.provider_rate), delay=args.delay).start()
+    metrics = Metrics()
+    http = HTTPClientPool(read_timeout=10, metrics=metrics)
+    limiter = RateLimiter(limits={} if mode == "unpaced" else {"anime": args.limit}, metrics=metrics)
+    skills = SkillsService(http=http, cache=TTLCache(4096, cacheable=_is_cacheable), limiter=limiter)
+    skills.endpoints = skill_endpoints(stub.base_url)
+    skills.cache_ttls = {**skills.cache_ttls, "anime": args.ttl}
+    rng = random.Random(args.seed)
+    titles = [f"title {i}" for i in range(args.queries)]
+    latencies, answers = [], {"data": 0, "rate limited": 0, "other": 0}
+
+    async def lookup(i: int):
+        await asyncio.sleep(args.spread * i / args.lookups)
+        query = rng.choice(titles)
+        started = time.perf_counter()
+        if mode == "fixed sleeps":
+            reply = await legacy_search_anime(skills, query)
+        else:
+            reply = await skills.execute_skill({"intent": "anime", "query": query})
+        latencies.append((time.perf_counter() - started) * 1000)
+        kind = "data" if reply.startswith("Anime results") else "rate limited" if "rate limited" in reply else "other"
+        answers[kind] += 1
+
+    try:
+        await asyncio.gather(*(lookup(i) for i in range(args.lookups)))
+    finally:
+        await http.aclose()
+        stub.stop()
+    return {
+        "upstream": stub.requests,
+        "throttled": metrics.upstream_errors.value(provider="127.0.0.1"),
+        "latencies": latencies,
+        "answers": answers,
+        "served_cached": metrics.skill_rate_limited.value(skill="anime", event="served_cached"),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--lookups", type=int, default=60)
+    parser.add_argument("--queries", type=int, default=40, help="distinct titles")
+    parser.add_argument("--spread", type=float, default=10.0, help="seconds over which the lookups arrive")
+    parser.add_argument("--provider-rate", type=int, default=3, help="requests per second the stub allows")
+    parser.add_argument("--limit", default="3,1", help="limiter '<requests per second>,<burst>' for the provider")
+    parser.add_argument("--ttl", type=float, default=0.0, help="anime cache TTL")
+    parser.add_argument("--delay", type=float, default=0.1, help="stub response time")
+    parser.add_argument("--seed", type=int, default=11)
+    args = parser.parse_args()
+    rate, burst = args.limit.split(",")
+    args.limit = (float(rate), int(burst))
+
+    print(
+        f"{args.lookups} anime lookups over {args.spread:.0f} s against a stub allowing {args.provider_rate} req/s; "
+        f"limiter {args.limit[0]:g}/s burst {args.limit[1]}, max wait {get_config().SKILL_RATE_LIMIT_MAX_WAIT:g} s"
+    )
+    for mode in ("fixed sleeps", "unpaced", "token bucket"):
+        r = asyncio.run(run(mode, args))
+        lat, answers = r["latencies"], r["answers"]
+        print(
+            f"{mode:>12}: latency p50 {percentile(lat, 50):6.0f} ms p95 {percentile(lat, 95):6.0f} ms max {max(lat):6.0f} ms, "
+            f"{r['upstream']:4d} upstream ({r['throttled']:.0f} answered 429); "
+            f"{answers['data'] - r['served_cached']:.0f} fresh results, {r['served_cached']:.0f} last cached result, "
+            f"{answers['rate limited']} told rate limited"
+        )
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""Single-flight skill lookups: a burst of identical requests against a cold cache.
+
+Simulates a news spike: `--sessions` sessions ask within a few milliseconds
+of each other for one of a handful of popular lookups ("technology" news,
+weather in Mumbai, ...), against a slow local stub in a child process. Runs
+once with SKILL_SINGLE_FLIGHT off and once on, and reports upstream
+requests, lookups collapsed and lookup latency. A few sessions use an API
+key the stub rejects and arrive first; their errors must never reach the
+sessions with a good key that joined their lookups.
+
+    python -m benchmarks.skill_singleflight --sessions 200 --delay 0.3
+"""
+import argparse
+import asyncio
+import random
+import time
+from typing import Dict, Tuple
+
+from app.services.cache import TTLCache
+from app.services.http_client import HTTPClientPool
+from app.services.rate_limit import RateLimiter
+from app.services.skills_service import SkillsService, _is_cacheable
+from benchmarks.load_harness import percentile
+from benchmarks.stubs import Handler, StubProcess, skill_endpoints, skill_routes
+
+POPULAR = [
+    {"intent": "news", "topic": "technology"},
+    {"intent": "news", "topic": "Technology "},
+    {"intent": "weather", "location": "Mumbai"},
+    {"intent": "weather", "location": "mumbai"},
+    {"intent": "movies", "query": "space"},
+    {"intent": "news", "topic": "sports"},
+]
+BAD_KEY = "revoked"
+
+def routes() -> Dict[str, Handler]:
+    """Stub skill routes that reject BAD_KEY like the real APIs do"""
+    base = skill_routes()
+
+    def checked(handler: Handler) -> Handler:
+        def route(path: str, query: str) -> Tuple[int, dict]:
+            if BAD_KEY in query:
+                return 401, {"status": "error", "message": "Invalid API key"}
+            return handler(path, query)
+        return route
+
+    return {path: checked(handler) for path, handler in base.items()}
+
+async def burst(single_flight: bool, args) -> dict:
+    stub = StubProcess(routes, delay=args.delay).start()
+    http = HTTPClientPool(read_timeout=args.delay + 10)
+    cache = TTLCache(4096, cacheable=_is_cacheable, single_flight=single_flight)
+    # The stub has no rate limit to respect
+    shared = SkillsService(http=http, cache=cache, limiter=RateLimiter(limits={}))
+    shared.endpoints = skill_endpoints(stub.base_url)
+    shared.weather_api_key = shared.news_api_key = shared.tmdb_api_key = "good"
+    bad = shared.with_keys(weather_key=BAD_KEY, news_key=BAD_KEY, tmdb_key=BAD_KEY)
+    rng = random.Random(args.seed)
+
+    latencies, leaked = [], 0
+
+    async def session(i: int):
+        nonlocal leaked
+        revoked = i % args.bad_every == 0
+        intent = rng.choice(POPULAR)
+        # Sessions with the revoked key arrive first, so they lead the flights
+        await asyncio.sleep(0 if revoked else rng.uniform(0.001, args.spread))
+        started = time.perf_counter()
+        reply = await (bad if revoked else shared).execute_skill(intent)
+        latencies.append((time.perf_counter() - started) * 1000)
+        # Data is the same whoever fetched it, but a good key must never see another key's error
+        if not revoked and reply.startswith(("Sorry", "News API error", "Couldn't", "No movies")):
+            leaked += 1
+
+    try:
+        started = time.perf_counter()
+        await asyncio.gather(*(session(i) for i in range(args.sessions)))
+        elapsed = time.perf_counter() - started
+    finally:
+        await http.aclose()
+        stub.stop()
+    stats = cache.stats()
+    return {
+        "upstream": stub.requests,
+        "elapsed_s": elapsed,
+        "latencies": latencies,
+        "coalesced": sum(stats["coalesced"].values()),
+        "refetches": stats["coalesced_refetches"],
+        "leaked_errors": leaked,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=200)
+    parser.add_argument("--spread", type=float, default=0.05, help="seconds over which the burst arrives")
+    parser.add_argument("--delay", type=float, default=0.3, help="stub response time")
+    parser.add_argument("--bad-every", type=int, default=25, help="every Nth session uses a revoked key")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    for single_flight in (False, True):
+        r = asyncio.run(burst(single_flight, args))
+        print(
+            f"single-flight {'on ' if single_flight else 'off'}: {r['upstream']:4d} upstream requests for "
+            f"{args.sessions} lookups, {r['coalesced']} collapsed ({r['refetches']} re-fetched for another key), "
+            f"latency p50 {percentile(r['latencies'], 50):5.0f} ms p95 {percentile(r['latencies'], 95):5.0f} ms, "
+            f"{r['leaked_errors']} errors leaked to good keys"
+        )
+
+if __name__ == "__main__":
+    main()
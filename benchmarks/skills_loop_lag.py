@@ -0,0 +1,109 @@
+"""Event-loop responsiveness while skill lookups are in flight.
+
+Fires N concurrent SkillsService calls at a slow local stub (in a child
+process) and samples the event-loop lag the whole time. The same sampler
+first runs for --baseline seconds on the idle loop: timer jitter of the host.
+Exits non-zero when p95 lag exceeds that baseline p95 by more than
+--max-lag-ms, so it doubles as a regression check: a single blocking
+upstream call shows up as lag on the order of --delay.
+
+    python -m benchmarks.skills_loop_lag --calls 50 --delay 1.0
+"""
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+
+from app.services.http_client import HTTPClientPool
+from app.services.rate_limit import RateLimiter
+from app.services.skills_service import SkillsService
+from benchmarks.stubs import StubProcess, skill_endpoints, skill_routes
+
+async def sample_lag(stop: asyncio.Event, interval: float, samples: list):
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(interval)
+        samples.append((time.perf_counter() - start - interval) * 1000)
+
+def p95(samples: list) -> float:
+    return statistics.quantiles(samples, n=100)[94]
+
+async def run(calls: int, delay: float, per_host: int, baseline: float) -> dict:
+    stub = StubProcess(skill_routes, delay=delay).start()
+    http = HTTPClientPool(max_connections_per_host=per_host, read_timeout=delay + 10)
+    # The stub has no rate limit to respect
+    skills = SkillsService(http=http, limiter=RateLimiter(limits={}))
+    skills.endpoints = skill_endpoints(stub.base_url)
+    skills.weather_api_key = skills.news_api_key = skills.tmdb_api_key = "stub"
+
+    def intent(i: int) -> dict:
+        # Distinct arguments per call so every lookup reaches the stub, not the cache
+        return [
+            {"intent": "weather", "location": f"City {i}"},
+            {"intent": "news", "topic": f"topic {i}"},
+            {"intent": "movies", "query": f"space {i}"},
+            {"intent": "quote", "category": "motivational"},
+        ][i % 4]
+
+    # Warm-up round: pays one-time lazy imports in httpx/anyio before sampling
+    http.warm(skills.endpoints.values())
+    await asyncio.gather(*(skills.execute_skill(intent(-i)) for i in range(1, 5)))
+
+    # Idle loop first: what the host's timers alone contribute
+    stop = asyncio.Event()
+    idle: list = []
+    sampler = asyncio.create_task(sample_lag(stop, 0.005, idle))
+    await asyncio.sleep(baseline)
+    stop.set()
+    await sampler
+
+    stop = asyncio.Event()
+    samples: list = []
+    sampler = asyncio.create_task(sample_lag(stop, 0.005, samples))
+    try:
+        start = time.perf_counter()
+        replies = await asyncio.gather(*(skills.execute_skill(intent(i)) for i in range(calls)))
+        elapsed = time.perf_counter() - start
+    finally:
+        stop.set()
+        await sampler
+        await http.aclose()
+        stub.stop()
+
+    failures = [r for r in replies if r.lower().startswith("sorry")]
+    return {
+        "calls": calls,
+        "elapsed_s": elapsed,
+        "failures": len(failures),
+        "upstream_connections": stub.connections,
+        "upstream_requests": stub.requests,
+        "idle_lag_p95_ms": p95(idle),
+        "lag_p50_ms": statistics.median(samples),
+        "lag_p95_ms": p95(samples),
+        "lag_p99_ms": statistics.quantiles(samples, n=100)[98],
+        "lag_max_ms": max(samples),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--calls", type=int, default=50)
+    parser.add_argument("--delay", type=float, default=1.0, help="stub response delay in seconds")
+    parser.add_argument("--per-host", type=int, default=20, help="max pooled connections per host")
+    parser.add_argument("--max-lag-ms", type=float, default=10.0, help="p95 lag budget above the idle loop's p95")
+    parser.add_argument("--baseline", type=float, default=1.0, help="seconds of idle-loop sampling")
+    args = parser.parse_args()
+
+    result = asyncio.run(run(args.calls, args.delay, args.per_host, args.baseline))
+    for key, value in result.items():
+        print(f"{key:>22}: {value:.2f}" if isinstance(value, float) else f"{key:>22}: {value}")
+
+    budget = result["idle_lag_p95_ms"] + args.max_lag_ms
+    print(f"{'lag_budget_ms':>22}: {budget:.2f}")
+    if result["failures"] or result["lag_p95_ms"] > budget:
+        print("FAIL: event loop lagged or skill calls failed")
+        sys.exit(1)
+    print("OK")
+
+if __name__ == "__main__":
+    main()
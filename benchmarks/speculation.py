@@ -0,0 +1,129 @@
+"""Speculative skill lookups: hit rate, lookup latency saved and upstream requests wasted.
+
+Replays benchmarks/intent_corpus.jsonl as voice turns: each utterance arrives
+word by word as unformatted partial transcripts every `--word-ms`, then the
+unformatted end-of-turn transcript after `--eot-ms` of silence and the
+formatted final `--format-ms` later, spread over `--sessions` concurrent
+sessions. Skill lookups go to a slow local stub with the skill cache storing
+nothing, so every lookup is an upstream request. Runs once answering from
+the final transcript only and once with a Speculator per session, and
+reports final transcript -> skill result latency, speculation outcomes and
+upstream requests.
+
+    python -m benchmarks.speculation --sessions 20 --delay 0.3
+"""
+import argparse
+import asyncio
+import json
+import re
+import time
+from typing import List
+
+from app.services.cache import TTLCache
+from app.services.http_client import HTTPClientPool
+from app.services.intent_service import IntentService
+from app.services.metrics import Metrics
+from app.services.rate_limit import RateLimiter
+from app.services.skills_service import SkillsService
+from app.services.speculation import Speculator
+from benchmarks.intent_bench import CORPUS
+from benchmarks.load_harness import percentile
+from benchmarks.stubs import StubProcess, skill_endpoints, skill_routes
+
+def partial_transcript(text: str) -> str:
+    """What streaming STT shows before formatting: lower case, no punctuation"""
+    return re.sub(r"[^\w\s']", "", text.lower())
+
+async def run(speculate: bool, utterances: List[str], args) -> dict:
+    stub = StubProcess(skill_routes, delay=args.delay).start()
+    http = HTTPClientPool(read_timeout=args.delay + 10)
+    skills = SkillsService(
+        http=http, cache=TTLCache(4096, cacheable=lambda result: False), limiter=RateLimiter(limits={})
+    )
+    skills.endpoints = skill_endpoints(stub.base_url)
+    skills.weather_api_key = skills.news_api_key = skills.tmdb_api_key = "bench"
+    intents = IntentService()
+    metrics = Metrics()
+    latencies: List[float] = []
+    speculators: List[Speculator] = []
+
+    async def session(shard: List[str]):
+        speculator = Speculator(
+            intents, skills, metrics, stable_partials=args.stable_partials, stable_ms=args.stable_ms
+        ) if speculate else None
+        if speculator:
+            speculators.append(speculator)
+        for order, text in enumerate(shard):
+            words = partial_transcript(text).split()
+            for i in range(1, len(words) + 1):
+                if speculator:
+                    speculator.on_partial(" ".join(words[:i]), order)
+                await asyncio.sleep(args.word_ms / 1000)
+            await asyncio.sleep(args.eot_ms / 1000)
+            if speculator:
+                speculator.on_partial(" ".join(words), order, settled=True)
+            await asyncio.sleep(args.format_ms / 1000)
+
+            # The formatted final: what the reply would do from here
+            started = time.perf_counter()
+            if speculator:
+                speculator.end_turn(order)
+            intent_data = intents.detect_intent(text)
+            prefetched = speculator.take(intent_data) if speculator else None
+            if intent_data:
+                await (prefetched or skills.execute_skill(intent_data))
+                latencies.append((time.perf_counter() - started) * 1000)
+        if speculator:
+            await speculator.aclose()
+
+    shards = [utterances[i::args.sessions] for i in range(args.sessions)]
+    try:
+        await asyncio.gather(*(session(shard) for shard in shards))
+    finally:
+        await http.aclose()
+        stub.stop()
+
+    totals = {"started": 0, "committed": 0, "discarded": 0, "unused": 0}
+    for speculator in speculators:
+        stats = speculator.stats()
+        for name in totals:
+            totals[name] += stats[name]
+    return {
+        "upstream": stub.requests,
+        "latencies": latencies,
+        "speculation": totals,
+        "saved_ms": metrics.speculation_saved.mean(),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=20)
+    parser.add_argument("--delay", type=float, default=0.3, help="stub skill API response time")
+    parser.add_argument("--word-ms", type=float, default=300, help="time between partial transcripts")
+    parser.add_argument("--eot-ms", type=float, default=400, help="silence before the end-of-turn transcript")
+    parser.add_argument("--format-ms", type=float, default=200, help="end of turn -> formatted final")
+    parser.add_argument("--stable-partials", type=int, default=2)
+    parser.add_argument("--stable-ms", type=int, default=0, help="pause rule; 0 disables it")
+    args = parser.parse_args()
+
+    utterances = [json.loads(line)["text"] for line in CORPUS.read_text().splitlines() if line.strip()]
+    skill_turns = sum(1 for text in utterances if IntentService().detect_intent(text))
+    print(f"{len(utterances)} utterances ({skill_turns} with a skill intent) over {args.sessions} sessions")
+    for speculate in (False, True):
+        r = asyncio.run(run(speculate, utterances, args))
+        line = (
+            f"speculation {'on ' if speculate else 'off'}: final -> skill result p50 {percentile(r['latencies'], 50):5.0f} ms "
+            f"p95 {percentile(r['latencies'], 95):5.0f} ms, {r['upstream']:4d} upstream requests"
+        )
+        if speculate:
+            s = r["speculation"]
+            settled = s["committed"] + s["discarded"] + s["unused"]
+            line += (
+                f"; {s['started']} lookups started, {s['committed']} committed, {s['discarded']} discarded, "
+                f"{s['unused']} unused (hit rate {s['committed'] / max(settled, 1):.0%}), "
+                f"mean lookup time saved {r['saved_ms'] * 1000 if r['saved_ms'] is not None else float('nan'):.0f} ms"
+            )
+        print(line)
+
+if __name__ == "__main__":
+    main()
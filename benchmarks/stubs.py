@@ -0,0 +1,248 @@
+"""Local stand-ins for upstream providers, served from a thread or child process."""
+import asyncio
+import json
+import multiprocessing
+import random
+import threading
+from typing import Callable, Dict, Optional, Tuple
+from urllib.parse import urlsplit
+
+# (path, query) -> (status, payload) or (status, payload, extra headers)
+Handler = Callable[[str, str], Tuple]
+
+class StubHTTPServer:
+    """Minimal HTTP/1.1 keep-alive server answering JSON after a fixed delay.
+
+    Runs on its own event loop thread so slow responses never touch the loop
+    under test.
+    """
+
+    def __init__(self, routes: Dict[str, Handler], delay: float = 0.0, host: str = "127.0.0.1"):
+        self.routes = routes
+        self.delay = delay
+        self.host = host
+        self.port: Optional[int] = None
+        self.requests = 0
+        self.connections = 0
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._server = None
+        self._ready = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    def _route(self, path: str, query: str) -> Tuple:
+        for prefix, handler in self.routes.items():
+            if path.startswith(prefix):
+                return handler(path, query)
+        return 404, {"error": "not found"}
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.connections += 1
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                while (await reader.readline()) not in (b"\r\n", b""):
+                    pass
+
+                self.requests += 1
+                target = request_line.decode().split(" ")[1]
+                parts = urlsplit(target)
+                if self.delay:
+                    await asyncio.sleep(self.delay)
+
+                status, payload, *extra = self._route(parts.path, parts.query)
+                headers = "".join(f"{name}: {value}\r\n" for name, value in (extra[0] if extra else {}).items())
+                body = json.dumps(payload).encode()
+                writer.write(
+                    f"HTTP/1.1 {status} OK\r\nContent-Type: application/json\r\n{headers}"
+                    f"Content-Length: {len(body)}\r\nConnection: keep-alive\r\n\r\n".encode() + body
+                )
+                await writer.drain()
+        except (ConnectionError, IndexError, asyncio.CancelledError):
+            pass
+        finally:
+            writer.close()
+
+    def _run(self):
+        self._loop = asyncio.new_event_loop()
+        self._server = self._loop.run_until_complete(asyncio.start_server(self._handle, self.host, 0))
+        self.port = self._server.sockets[0].getsockname()[1]
+        self._ready.set()
+        self._loop.run_forever()
+
+    def start(self) -> "StubHTTPServer":
+        self._thread.start()
+        self._ready.wait()
+        return self
+
+    async def _shutdown(self):
+        self._server.close()
+        tasks = [t for t in asyncio.all_tasks() if t is not asyncio.current_task()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._loop.stop()
+
+    def stop(self):
+        if self._loop:
+            asyncio.run_coroutine_threadsafe(self._shutdown(), self._loop)
+        self._thread.join(timeout=2)
+
+def _serve_forever(routes_factory, delay, conn):
+    server = StubHTTPServer(routes_factory(), delay=delay).start()
+    conn.send(server.port)
+    conn.recv()
+    conn.send((server.requests, server.connections))
+    server.stop()
+
+class StubProcess:
+    """Run a StubHTTPServer in a child process so it never competes for the GIL"""
+
+    def __init__(self, routes_factory: Callable[[], Dict[str, Handler]], delay: float = 0.0):
+        self._parent, child = multiprocessing.Pipe()
+        self._proc = multiprocessing.Process(target=_serve_forever, args=(routes_factory, delay, child), daemon=True)
+        self.port: Optional[int] = None
+        self.requests = 0
+        self.connections = 0
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.port}"
+
+    def start(self) -> "StubProcess":
+        self._proc.start()
+        self.port = self._parent.recv()
+        return self
+
+    def stop(self):
+        self._parent.send("stop")
+        self.requests, self.connections = self._parent.recv()
+        self._proc.join(timeout=5)
+
+def skill_routes() -> Dict[str, Handler]:
+    """Canned responses shaped like WeatherAPI, NewsAPI, TMDB, Jikan and ZenQuotes"""
+    return {
+        "/weather": lambda p, q: (200, {
+            "location": {"name": "London", "country": "United Kingdom"},
+            "current": {"temp_c": 14.0, "condition": {"text": "Partly cloudy"}},
+        }),
+        "/news": lambda p, q: (200, {
+            "status": "ok",
+            "articles": [{"title": f"Headline {i}", "url": "", "description": "", "source": {"name": "Stub"}} for i in range(5)],
+        }),
+        "/movies": lambda p, q: (200, {
+            "results": [{"title": "Stub Movie", "release_date": "2020-01-01", "vote_average": 7.5, "id": 1}],
+        }),
+        "/anime": lambda p, q: (200, {
+            "data": [{"title": "Stub Anime", "episodes": 12, "score": 8.1, "synopsis": "", "mal_id": 1}],
+        }),
+        "/quote": lambda p, q: (200, [{"q": "Stub wisdom.", "a": "Stub"}]),
+    }
+
+def skill_endpoints(base_url: str) -> Dict[str, str]:
+    """SKILL_ENDPOINTS mapping that points every skill at a stub server"""
+    return {name: f"{base_url}/{name}" for name in ("weather", "news", "movies", "anime", "quote")}
+
+class StubMurfServer:
+    """Murf stream-input stand-in: answers each text message with audio chunks.
+
+    Every text message is synthesized after `latency` (± `jitter`) seconds into
+    one chunk per `chars_per_chunk` characters; after {"end": true} the last
+    chunk is followed by a {"final": true} marker. Replies echo the message's
+    context id, and contexts sharing a socket are synthesized concurrently.
+    """
+
+    def __init__(self, latency: float = 0.3, chars_per_chunk: int = 40, host: str = "127.0.0.1", jitter: float = 0.0):
+        self.latency = latency
+        self.jitter = jitter
+        self.chars_per_chunk = chars_per_chunk
+        self.host = host
+        self.port: Optional[int] = None
+        self.connections = 0
+        self.texts = 0
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._server = None
+        self._ready = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    @property
+    def url(self) -> str:
+        return f"ws://{self.host}:{self.port}/v1/speech/stream-input"
+
+    async def _synthesize(self, ws, context_id, inbox: asyncio.Queue):
+        import base64
+
+        while True:
+            message = await inbox.get()
+            if "text" in message:
+                self.texts += 1
+                await asyncio.sleep(max(0.0, self.latency + random.uniform(-self.jitter, self.jitter)))
+                pieces = max(1, len(message["text"]) // self.chars_per_chunk)
+                for _ in range(pieces):
+                    audio = base64.b64encode(b"\x00\x00" * 2205).decode()
+                    await ws.send(json.dumps({"audio": audio, "final": False, "context_id": context_id}))
+            if message.get("end"):
+                await ws.send(json.dumps({"final": True, "context_id": context_id}))
+                return
+
+    async def _handle(self, ws):
+        self.connections += 1
+        contexts: Dict[Optional[str], asyncio.Queue] = {}
+        workers = []
+        try:
+            async for raw in ws:
+                message = json.loads(raw)
+                if "voice_config" in message:
+                    continue
+                context_id = message.get("context_id")
+                inbox = contexts.get(context_id)
+                if inbox is None:
+                    inbox = contexts[context_id] = asyncio.Queue()
+                    workers.append(asyncio.create_task(self._synthesize(ws, context_id, inbox)))
+                inbox.put_nowait(message)
+                if message.get("end"):
+                    contexts.pop(context_id, None)
+        except Exception:
+            pass
+        finally:
+            for worker in workers:
+                worker.cancel()
+
+    def _run(self):
+        import websockets
+
+        async def serve():
+            return await websockets.serve(self._handle, self.host, 0)
+
+        self._loop = asyncio.new_event_loop()
+        self._server = self._loop.run_until_complete(serve())
+        self.port = self._server.sockets[0].getsockname()[1]
+        self._ready.set()
+        self._loop.run_forever()
+
+    def start(self) -> "StubMurfServer":
+        self._thread.start()
+        self._ready.wait()
+        return self
+
+    async def _shutdown(self):
+        self._server.close()
+        await self._server.wait_closed()
+        self._loop.stop()
+
+    def stop(self):
+        if self._loop:
+            asyncio.run_coroutine_threadsafe(self._shutdown(), self._loop)
+        self._thread.join(timeout=2)
+
+async def stub_token_stream(text: str, first_token_delay: float, token_delay: float):
+    """Gemini-like chunk stream: a first-token delay, then one word per tick"""
+    await asyncio.sleep(first_token_delay)
+    for word in text.split(" "):
+        yield word + " "
+        await asyncio.sleep(token_delay)
@@ -0,0 +1,179 @@
+"""Batch transcription jobs: throughput per worker count, and what live sessions feel meanwhile.
+
+Uploads `--files` synthetic 48 kHz stereo WAV files (each `--utterances`
+speech bursts separated by pauses) to the app running against the local
+provider fakes, submits one transcription job per file and polls until all
+are finished. Each level sets TRANSCRIBE_WORKERS; a level of 0 runs only
+the live sessions, as a baseline. While the batch runs, `--live-sessions`
+voice sessions from the load harness talk to the same process. Reports:
+
+- jobs/s, seconds of audio transcribed per wall second, answered turns
+- live sessions: end of turn -> first audio p50/p95, and event loop lag
+- time spent decoding and resampling the same files in-process
+
+    python -m benchmarks.transcription_jobs --files 16 --workers 0,1,2,4,8
+"""
+import argparse
+import asyncio
+import io
+import tempfile
+import time
+import wave
+from pathlib import Path
+from typing import List
+
+import httpx
+import numpy as np
+
+from app.services.transcriptions import read_audio, resample, to_pcm16
+from benchmarks.fake_providers import FakeProviders
+from benchmarks.load_harness import AppProcess, drive, percentile, synth_turn
+
+SOURCE_RATE = 48000
+
+def synth_wav(utterances: int, rng: np.random.Generator) -> bytes:
+    """Stereo 48 kHz WAV of voiced bursts and pauses longer than the fake STT's end of turn"""
+    t = np.arange(int(1.5 * SOURCE_RATE)) / SOURCE_RATE
+    parts = []
+    for _ in range(utterances):
+        pitch = rng.uniform(100, 220)
+        voiced = sum(np.sin(2 * np.pi * pitch * k * t) / k for k in range(1, 6)) * (0.55 + 0.45 * np.sin(2 * np.pi * 4 * t))
+        parts += [4000 * voiced + rng.normal(0, 30, t.size), rng.normal(0, 30, int(1.2 * SOURCE_RATE))]
+    mono = np.clip(np.concatenate(parts), -32768, 32767).astype("<i2")
+    out = io.BytesIO()
+    with wave.open(out, "wb") as wav:
+        wav.setnchannels(2)
+        wav.setsampwidth(2)
+        wav.setframerate(SOURCE_RATE)
+        wav.writeframes(np.repeat(mono, 2).tobytes())
+    return out.getvalue()
+
+async def run_batch(port: int, files: List[bytes], timeout: float) -> dict:
+    base = f"http://127.0.0.1:{port}/api"
+    keys = {"assembly_key": "bench", "gemini_key": "bench"}
+    async with httpx.AsyncClient(timeout=30) as client:
+        stored = []
+        for i, data in enumerate(files):
+            r = await client.post(f"{base}/upload-audio", files={"file": (f"batch-{i}.wav", data, "audio/wav")})
+            stored.append(r.json())
+
+        started = time.perf_counter()
+        jobs = []
+        for upload in stored:
+            r = await client.post(f"{base}/transcriptions", json={"filename": upload["filename"], **keys})
+            jobs.append(r.json()["job_id"])
+
+        pending, results = set(jobs), {}
+        deadline = started + timeout
+        while pending and time.perf_counter() < deadline:
+            await asyncio.sleep(0.1)
+            for job_id in list(pending):
+                r = await client.get(f"{base}/transcriptions/{job_id}/result")
+                if r.status_code == 200:
+                    results[job_id] = r.json()
+                    pending.discard(job_id)
+        elapsed = time.perf_counter() - started
+
+    for upload in stored:
+        Path(upload["path"]).unlink(missing_ok=True)
+    finished = list(results.values())
+    return {
+        "elapsed_s": elapsed,
+        "done": sum(1 for j in finished if j["status"] == "done"),
+        "failed": [j["error"] for j in finished if j["status"] == "failed"],
+        "timed_out": len(pending),
+        "audio_s": sum(j["audio_seconds"] or 0 for j in finished),
+        "turns": sum(len(j["turns"]) for j in finished),
+    }
+
+def run_level(workers: int, files: List[bytes], live_audio: List[bytes], args) -> dict:
+    providers = FakeProviders(reply_words=args.reply_words).start()
+    app = AppProcess({
+        "ASSEMBLYAI_API_HOST": providers.urls["assemblyai_host"],
+        "GEMINI_API_ENDPOINT": providers.urls["gemini_endpoint"],
+        "GEMINI_TRANSPORT": "rest",
+        "MURF_WS_URL": providers.urls["murf_url"],
+        "AUTO_ASSISTANT_REPLY": "true",
+        "TRANSCRIBE_WORKERS": str(max(workers, 1)),
+        "TRANSCRIBE_QUEUE_MAX": str(len(files)),
+        "TRANSCRIBE_REALTIME_FACTOR": str(args.realtime_factor),
+    }).start()
+
+    async def both():
+        live = drive(app.port, args.live_sessions, live_audio, 0.2)
+        if not workers:
+            return await live, None
+        return await asyncio.gather(live, run_batch(app.port, files, args.timeout))
+
+    try:
+        records, batch = asyncio.run(both())
+    finally:
+        app_stats = app.stop()
+        provider_stats = providers.stop()
+
+    sent = provider_stats["turns_sent"]
+    to_audio = [
+        (turn["first_audio"] - sent.get(text, turn["client_eot"])) * 1000
+        for record in records for text, turn in record["turns"].items() if turn["first_audio"]
+    ]
+    return {
+        "batch": batch,
+        "to_audio": to_audio,
+        "live_errors": [e for r in records for e in r["errors"]],
+        "lags_ms": app_stats["lags_ms"],
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--files", type=int, default=16)
+    parser.add_argument("--utterances", type=int, default=4, help="speech bursts per file")
+    parser.add_argument("--workers", default="0,1,2,4,8", help="comma-separated TRANSCRIBE_WORKERS levels")
+    parser.add_argument("--realtime-factor", type=float, default=0, help="TRANSCRIBE_REALTIME_FACTOR (0 = unpaced)")
+    parser.add_argument("--live-sessions", type=int, default=2)
+    parser.add_argument("--reply-words", type=int, default=45)
+    parser.add_argument("--timeout", type=float, default=120.0)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(5)
+    files = [synth_wav(args.utterances, rng) for _ in range(args.files)]
+    live_audio = [synth_turn(2.0, 3.6, rng) for _ in range(3)]
+
+    # Decode and resample cost, measured in-process on the same files
+    with tempfile.TemporaryDirectory() as directory:
+        path = Path(directory) / "bench.wav"
+        path.write_bytes(files[0])
+        started = time.perf_counter()
+        samples, rate = read_audio(path, SOURCE_RATE)
+        pcm = to_pcm16(resample(samples, rate, 16000))
+        prepare_ms = (time.perf_counter() - started) * 1000
+    seconds = len(pcm) / 32000
+    print(
+        f"{args.files} files of {seconds:.1f} s (48 kHz stereo WAV, {len(files[0]) / 1e6:.1f} MB each); "
+        f"decode + resample to 16 kHz: {prepare_ms:.1f} ms per file ({seconds / prepare_ms * 1000:.0f}x real time)"
+    )
+
+    for workers in (int(w) for w in args.workers.split(",")):
+        r = run_level(workers, files, live_audio, args)
+        lags = r["lags_ms"]
+        live = (
+            f"live first audio p50 {percentile(r['to_audio'], 50):5.0f} ms p95 {percentile(r['to_audio'], 95):5.0f} ms, "
+            f"loop lag p99 {percentile(lags, 99):5.1f} ms"
+        )
+        batch = r["batch"]
+        if batch is None:
+            print(f"live only    : {live}")
+        else:
+            print(
+                f"workers={workers:<2}   : {batch['done']:3d}/{args.files} jobs in {batch['elapsed_s']:5.1f} s "
+                f"({batch['done'] / batch['elapsed_s']:5.2f} jobs/s, {batch['audio_s'] / batch['elapsed_s']:5.1f} s audio/s), "
+                f"{batch['turns']} turns answered; {live}"
+            )
+            for error in sorted(set(batch["failed"]))[:3]:
+                print(f"  job error: {error}")
+            if batch["timed_out"]:
+                print(f"  {batch['timed_out']} jobs still unfinished after {args.timeout:.0f} s")
+        for error in sorted(set(r["live_errors"]))[:3]:
+            print(f"  live error: {error}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""TTS audio cache: hit rate, Murf requests and bytes saved on a repetitive reply mix.
+
+Speaks a stream of utterances through TTSService.stream_tts against the local
+Murf stub. Most are drawn (Zipf-weighted) from the fixed strings the app
+speaks over and over (skill error messages, fallback quotes), the rest are
+unique. Runs once without and once with the on-disk cache (in a temporary
+directory) and reports time to first audio for hits and misses, then reopens
+the cache to check that entries survive a restart.
+
+    python -m benchmarks.tts_cache --utterances 300 --unique-share 0.3 --max-mb 1
+"""
+import argparse
+import asyncio
+import random
+import statistics
+import tempfile
+import time
+
+from app.services.metrics import Metrics
+from app.services.tts_cache import TTSAudioCache
+from app.services.tts_connections import MurfConnectionPool
+from app.services.tts_service import TTSService
+from benchmarks.stubs import StubMurfServer
+
+REPEATED = [
+    "Sorry, I couldn't get weather for London. Please check the city name.",
+    "Couldn't fetch news right now. Please try again later.",
+    "No movies found for 'space'. Try a different search term.",
+    "Sorry, API rate limited. Please try again later.",
+    '"The only way to do great work is to love what you do." - Steve Jobs',
+    '"Innovation distinguishes between a leader and a follower." - Steve Jobs',
+    '"Success is not final, failure is not fatal: courage to continue counts." - Churchill',
+    "I'm not sure how to help with that.",
+    "Please set NEWS_API_KEY to get technology news.",
+    "Weather info for Paris is not available right now.",
+]
+
+def utterances(count: int, unique_share: float, rng: random.Random):
+    weights = [1 / (rank + 1) for rank in range(len(REPEATED))]
+    for i in range(count):
+        if rng.random() < unique_share:
+            yield f"Weather in City{i}, Country: {rng.randint(-10, 35)}°C, partly cloudy with a light breeze."
+        else:
+            yield rng.choices(REPEATED, weights)[0]
+
+async def speak_all(tts: TTSService, texts):
+    first_audio = []
+    for text in texts:
+        start = time.perf_counter()
+        state = {}
+
+        async def callback(payload):
+            if payload.get("type") == "audio_start":
+                state["cached"] = payload.get("cached", False)
+            elif payload.get("type") == "audio_chunk" and "first" not in state:
+                state["first"] = time.perf_counter() - start
+
+        await tts.stream_tts(text, callback, "stub")
+        first_audio.append((state.get("cached", False), state.get("first", float("nan")) * 1000))
+    return first_audio
+
+async def run(args):
+    rng = random.Random(args.seed)
+    texts = list(utterances(args.utterances, args.unique_share, rng))
+    murf = StubMurfServer(latency=args.tts_latency).start()
+    results = {}
+    try:
+        with tempfile.TemporaryDirectory() as directory:
+            for name, cache in (
+                ("no cache", None),
+                ("cache", TTSAudioCache(directory, max_bytes=int(args.max_mb * 1024 * 1024), metrics=Metrics())),
+            ):
+                pool = MurfConnectionPool(url=murf.url)
+                tts = TTSService(connections=pool, cache=cache)
+                texts_before = murf.texts
+                started = time.perf_counter()
+                first_audio = await speak_all(tts, texts)
+                results[name] = {
+                    "elapsed_s": time.perf_counter() - started,
+                    "murf_texts": murf.texts - texts_before,
+                    "hit_ms": [ms for cached, ms in first_audio if cached],
+                    "miss_ms": [ms for cached, ms in first_audio if not cached],
+                    "stats": cache.stats() if cache else None,
+                }
+                await pool.aclose()
+
+            reopened = TTSAudioCache(directory, max_bytes=int(args.max_mb * 1024 * 1024))
+            await reopened.load()
+            results["reopened_entries"] = reopened.stats()["entries"]
+    finally:
+        murf.stop()
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--utterances", type=int, default=300)
+    parser.add_argument("--unique-share", type=float, default=0.3)
+    parser.add_argument("--max-mb", type=float, default=1.0, help="cache size cap")
+    parser.add_argument("--tts-latency", type=float, default=0.2)
+    parser.add_argument("--seed", type=int, default=3)
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args))
+    for name in ("no cache", "cache"):
+        r = results[name]
+        line = f"{name:>8}: {r['murf_texts']:4d} Murf requests, {r['elapsed_s']:6.1f} s total"
+        if r["miss_ms"]:
+            line += f", first audio on miss p50 {statistics.median(r['miss_ms']):6.1f} ms"
+        if r["hit_ms"]:
+            line += f", on hit p50 {statistics.median(r['hit_ms']):5.1f} ms"
+        print(line)
+    stats = results["cache"]["stats"]
+    print(
+        f"   cache: hit rate {stats['hit_rate']:.1%}, {stats['bytes_saved'] / 1e6:.2f} MB of audio not synthesized, "
+        f"{stats['entries']} entries / {stats['bytes'] / 1e6:.2f} MB on disk (cap {stats['max_bytes'] / 1e6:.2f} MB), "
+        f"{stats['evictions']} evictions"
+    )
+    print(f"   after reopening: {results['reopened_entries']} entries indexed")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""Time-to-first-audio: collect-then-speak vs. sentence-pipelined TTS.
+
+Both modes run against the same stubs: a Gemini-like token stream and a local
+Murf stream-input server. The pipelined mode drives the real
+process_transcript_with_skills.
+
+    python -m benchmarks.tts_pipeline --runs 5 --token-delay 0.03 --tts-latency 0.3
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+import app.main as main_module
+from app.services.llm_service import LLMService
+from app.services.registry import ServiceRegistry
+from benchmarks.stubs import StubMurfServer, stub_token_stream
+
+REPLY = (
+    "Well, that is a great question. The short answer is that it depends on the weather. "
+    "If it rains, you should take an umbrella with you. Otherwise, enjoy the sunshine and "
+    "maybe go for a long walk in the park. Either way, have a wonderful day today!"
+)
+
+class Timeline:
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.first_audio = None
+        self.last_audio = None
+
+    async def callback(self, payload: dict):
+        if payload.get("type") == "audio_chunk":
+            now = time.perf_counter() - self.start
+            self.first_audio = self.first_audio or now
+            self.last_audio = now
+
+async def collect_then_speak(services: ServiceRegistry) -> Timeline:
+    """Pre-pipeline behaviour: whole reply first, then one TTS request"""
+    timeline = Timeline()
+    text = "".join([c async for c in services.llm.stream_response("prompt", api_key="stub")])
+    await services.tts.stream_tts(text, timeline.callback, "stub")
+    return timeline
+
+async def pipelined(services: ServiceRegistry) -> Timeline:
+    timeline = Timeline()
+    keys = {"gemini_key": "stub", "murf_key": "stub"}
+    await main_module.process_transcript_with_skills(services, "bench", "tell me something", timeline.callback, keys)
+    services.sessions.discard("bench")
+    return timeline
+
+async def run(args) -> dict:
+    murf = StubMurfServer(latency=args.tts_latency).start()
+    services = ServiceRegistry()
+    services.tts_connections.url = murf.url
+    # Both modes must reach Murf every time
+    services.tts.cache = None
+
+    async def fake_stream(self, prompt, **kwargs):
+        async for chunk in stub_token_stream(REPLY, args.first_token_delay, args.token_delay):
+            yield chunk
+
+    original_stream = LLMService.stream_response
+    LLMService.stream_response = fake_stream
+
+    results = {}
+    try:
+        for name, mode in (("collect_then_speak", collect_then_speak), ("pipelined", pipelined)):
+            timelines = [await mode(services) for _ in range(args.runs)]
+            results[name] = {
+                "first_audio_ms": statistics.median(t.first_audio for t in timelines) * 1000,
+                "last_audio_ms": statistics.median(t.last_audio for t in timelines) * 1000,
+            }
+    finally:
+        LLMService.stream_response = original_stream
+        results["murf_sockets_opened"] = murf.connections
+        await services.shutdown()
+        murf.stop()
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--first-token-delay", type=float, default=0.4)
+    parser.add_argument("--token-delay", type=float, default=0.03)
+    parser.add_argument("--tts-latency", type=float, default=0.3)
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args))
+    sockets = results.pop("murf_sockets_opened")
+    for name, numbers in results.items():
+        print(f"{name:>20}: first audio {numbers['first_audio_ms']:7.1f} ms | last audio {numbers['last_audio_ms']:7.1f} ms")
+    saved = results["collect_then_speak"]["first_audio_ms"] - results["pipelined"]["first_audio_ms"]
+    print(f"{'improvement':>20}: {saved:7.1f} ms earlier first audio")
+    print(f"{'murf sockets':>20}: {sockets} opened for {2 * args.runs} utterances")
+
+if __name__ == "__main__":
+    main()
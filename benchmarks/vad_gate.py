@@ -0,0 +1,139 @@
+"""Voice activity gate on a synthetic call: share of audio skipped and cost per frame.
+
+Generates 16 kHz PCM16 with low background noise, short speech-like bursts
+(harmonic voiced sound with syllable-rate modulation) and long pauses, runs
+it through VoiceActivityGate in 50 ms frames and reports how much audio would
+not be streamed upstream. It also checks that every burst is followed by at
+least `max_turn_silence` of forwarded audio, so end-of-turn detection upstream
+keeps working, and that no speech frame is dropped.
+
+Then it stress-tests the AudioIngest ring buffer in front of the gate: the
+event loop pushes odd-sized chunks of a sample counter into a buffer a few
+frames long under `drop_oldest`, so the forwarding thread is lapped all the
+time, and every forwarded frame must still hold consecutive samples. Buffer
+stores yield the GIL to stretch each write, so a frame copied while the
+producer was overwriting it reliably shows up as a break.
+
+    python -m benchmarks.vad_gate --minutes 5 --stress-seconds 3
+"""
+import argparse
+import asyncio
+import sys
+import time
+
+import numpy as np
+
+from app.services.audio_ingest import DROP_OLDEST, AudioIngest
+from app.services.vad import VoiceActivityGate
+
+SAMPLE_RATE = 16000
+FRAME_MS = 50
+FRAME_SAMPLES = SAMPLE_RATE * FRAME_MS // 1000
+MAX_TURN_SILENCE_MS = 2400
+
+def synth_call(minutes: float, rng: np.random.Generator):
+    """PCM16 audio plus a per-frame truth mask of where speech was generated"""
+    total = int(minutes * 60 * SAMPLE_RATE)
+    audio = rng.normal(0, 30, total)  # ~ -60 dBFS room noise
+    truth = np.zeros(total // FRAME_SAMPLES, dtype=bool)
+    position = int(rng.uniform(1, 3) * SAMPLE_RATE)
+    while position < total:
+        length = int(rng.uniform(1.5, 6.0) * SAMPLE_RATE)
+        end = min(position + length, total)
+        t = np.arange(end - position) / SAMPLE_RATE
+        pitch = rng.uniform(100, 220)
+        voiced = sum(np.sin(2 * np.pi * pitch * k * t) / k for k in range(1, 6))
+        envelope = 0.55 + 0.45 * np.sin(2 * np.pi * 4 * t)  # ~4 syllables/s
+        audio[position:end] += 4000 * voiced * envelope
+        truth[position // FRAME_SAMPLES:end // FRAME_SAMPLES] = True
+        position = end + int(rng.uniform(3.0, 15.0) * SAMPLE_RATE)
+    return np.clip(audio, -32768, 32767).astype(np.int16), truth
+
+class YieldingBuffer(bytearray):
+    """Ring storage that lets other threads run right after every store.
+
+    Under the GIL a write is only a few bytecodes long; yielding here
+    stretches it so a consumer racing the producer is caught every time.
+    """
+
+    def __setitem__(self, key, value):
+        super().__setitem__(key, value)
+        time.sleep(0)
+
+def stress_ingest(seconds: float, seed: int) -> dict:
+    """Lapped ring buffer: count forwarded frames whose samples are not consecutive"""
+    ingest = AudioIngest(sample_rate=SAMPLE_RATE, frame_ms=FRAME_MS, buffer_ms=4 * FRAME_MS, policy=DROP_OLDEST)
+    ingest._buf = YieldingBuffer(ingest.capacity)
+    torn = [0]
+
+    def sink(frames):
+        for frame in frames:
+            # The counter wraps at 2**16, so consecutive means a step of 1 modulo that
+            steps = np.diff(np.frombuffer(frame, dtype=np.uint16).astype(np.int32)) % 65536
+            torn[0] += bool(np.any(steps != 1))
+            # A slow upstream: the producer laps the consumer on nearly every frame
+            time.sleep(0.0005)
+
+    async def produce():
+        rng = np.random.default_rng(seed)
+        counter = np.arange(65536, dtype=np.uint16)
+        position = 0
+        deadline = time.monotonic() + seconds
+        while time.monotonic() < deadline:
+            size = int(rng.integers(1, 2 * FRAME_SAMPLES))
+            await ingest.push(np.take(counter, np.arange(position, position + size), mode="wrap").tobytes())
+            position = (position + size) % 65536
+            await asyncio.sleep(0)
+
+    ingest.forward(sink)
+    asyncio.run(produce())
+    ingest.close()
+    return {**ingest.stats(), "torn_frames": torn[0]}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--minutes", type=float, default=5.0)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--stress-seconds", type=float, default=3.0, help="ring buffer stress run, 0 to skip")
+    args = parser.parse_args()
+
+    audio, truth = synth_call(args.minutes, np.random.default_rng(args.seed))
+    frames = [audio[i:i + FRAME_SAMPLES].tobytes() for i in range(0, len(truth) * FRAME_SAMPLES, FRAME_SAMPLES)]
+
+    gate = VoiceActivityGate(frame_ms=FRAME_MS)
+    forwarded = np.zeros(len(frames), dtype=bool)
+    by_id = {id(frame): index for index, frame in enumerate(frames)}
+    start = time.perf_counter()
+    for frame in frames:
+        for out in gate.process(frame):
+            forwarded[by_id[id(out)]] = True
+    elapsed = time.perf_counter() - start
+
+    missed_speech = int(np.count_nonzero(truth & ~forwarded))
+    # Forwarded run after each burst must cover the upstream end-of-turn silence
+    short_tails = 0
+    burst_ends = np.flatnonzero(truth[:-1] & ~truth[1:]) + 1
+    tail_frames = MAX_TURN_SILENCE_MS // FRAME_MS
+    for end in burst_ends:
+        if end + tail_frames <= len(frames) and not forwarded[end:end + tail_frames].all():
+            short_tails += 1
+
+    stats = gate.stats()
+    print(f"audio: {len(frames) * FRAME_MS / 1000:.0f} s, speech {np.count_nonzero(truth) / len(truth):.1%} of frames")
+    print(f"skipped: {stats['skipped_share']:.1%} of audio ({stats['skipped_ms'] / 1000:.0f} s), noise floor {stats['noise_floor_db']} dBFS")
+    print(f"speech frames dropped: {missed_speech}, bursts with short end-of-turn tail: {short_tails}")
+    print(f"cost: {elapsed / len(frames) * 1e6:.1f} us per {FRAME_MS} ms frame")
+
+    torn = 0
+    if args.stress_seconds > 0:
+        ingest = stress_ingest(args.stress_seconds, args.seed)
+        torn = ingest["torn_frames"]
+        print(
+            f"ingest stress: {ingest['frames_forwarded']} frames forwarded, {ingest['overruns']} overruns, "
+            f"{ingest['bytes_overwritten'] / ingest['bytes_received']:.0%} of audio lapped, {torn} torn frames"
+        )
+    if missed_speech or short_tails or torn:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -13,6 +13,10 @@ let unlockedPlayback = false;
 const sessionId = `user-${Date.now()}`;
 const JITTER_SECS = 0.12;
 
+// Binary TTS frame header: version u8 | flags u8 | reserved u16 | turn id u32 | sequence u32
+const AUDIO_FRAME_HEADER_BYTES = 12;
+const AUDIO_FLAG_FINAL = 0x01;
+
 // DOM elements
 const recordBtn = document.getElementById("recordBtn");
 const statusEl = document.getElementById("uploadStatus");
@@ -35,6 +39,10 @@ let apiConfig = {
 // Audio playback state
 let audioChunks = [];
 let currentAudioSession = null;
+let currentAudioTurn = null;
+let scheduledSources = [];
+let flushedAudioSession = null;
+let flushedAudioTurn = null;
 
 /* =============================================================================
    Configuration Management
@@ -173,15 +181,16 @@ async function ensurePlaybackCtx() {
   }
 }
 
-async function playAudioChunk(base64Data) {
+function base64ToArrayBuffer(base64Data) {
+  return Uint8Array.from(atob(base64Data), c => c.charCodeAt(0)).buffer;
+}
+
+async function playAudioChunk(audioData, byteOffset = 0) {
   try {
     await ensurePlaybackCtx();
     
-    // Convert base64 to ArrayBuffer
-    const audioData = Uint8Array.from(atob(base64Data), c => c.charCodeAt(0)).buffer;
-    
     // Assume it's PCM16 data from Murf
-    const pcm16 = new Int16Array(audioData);
+    const pcm16 = new Int16Array(audioData, byteOffset, (audioData.byteLength - byteOffset) >> 1);
     const float32 = new Float32Array(pcm16.length);
     
     // Convert to float32
@@ -201,6 +210,10 @@ async function playAudioChunk(base64Data) {
     const startAt = Math.max(playbackTime, playbackCtx.currentTime + 0.01);
     source.start(startAt);
     playbackTime = startAt + audioBuffer.duration;
+    scheduledSources.push(source);
+    source.onended = () => {
+      scheduledSources = scheduledSources.filter(s => s !== source);
+    };
     
     console.log(`▶️ Played audio chunk (${audioBuffer.duration.toFixed(2)}s)`);
     
@@ -209,9 +222,22 @@ async function playAudioChunk(base64Data) {
   }
 }
 
+function flushPlayback(data) {
+  // The user talked over the reply: silence it and ignore its late chunks
+  for (const source of scheduledSources) {
+    try { source.stop(); } catch (e) { /* already stopped */ }
+  }
+  scheduledSources = [];
+  flushedAudioSession = data.context_id ?? currentAudioSession;
+  flushedAudioTurn = data.turn_id ?? currentAudioTurn;
+  resetAudioChunks();
+  console.log("⏹️ Playback flushed");
+}
+
 function resetAudioChunks() {
   audioChunks = [];
   currentAudioSession = null;
+  currentAudioTurn = null;
   playbackTime = 0;
   console.log("🔄 Audio chunks reset");
 }
@@ -343,7 +369,8 @@ async function startRecording() {
       murf_key: apiConfig.murfKey || '',
       weather_key: apiConfig.weatherKey || '',
       news_key: apiConfig.newsKey || '',
-      tmdb_key: apiConfig.tmdbKey || ''
+      tmdb_key: apiConfig.tmdbKey || '',
+      audio: 'binary'
     });
     
     const wsUrl = `${wsBaseUrl}/ws/stream?${params}`;
@@ -435,7 +462,32 @@ function stopRecording() {
    WebSocket Message Handlers
 ============================================================================= */
 
+function handleBinaryAudioFrame(buffer) {
+  if (buffer.byteLength < AUDIO_FRAME_HEADER_BYTES) return;
+  const header = new DataView(buffer, 0, AUDIO_FRAME_HEADER_BYTES);
+  const flags = header.getUint8(1);
+  const turnId = header.getUint32(4);
+  const sequence = header.getUint32(8);
+
+  // Ignore late audio from a turn that is no longer playing
+  if (currentAudioTurn !== null && turnId !== currentAudioTurn) return;
+  if (turnId === flushedAudioTurn) return;
+
+  audioChunks.push({
+    data: buffer,
+    chunkNumber: sequence,
+    isFinal: Boolean(flags & AUDIO_FLAG_FINAL),
+    timestamp: Date.now()
+  });
+  playAudioChunk(buffer, AUDIO_FRAME_HEADER_BYTES);
+}
+
 function handleWebSocketMessage(event) {
+  if (event.data instanceof ArrayBuffer) {
+    handleBinaryAudioFrame(event.data);
+    return;
+  }
+
   try {
     const data = JSON.parse(event.data);
     console.log("WebSocket message:", data.type);
@@ -461,18 +513,19 @@ function handleWebSocketMessage(event) {
         console.log("Audio generation started");
         resetAudioChunks();
         currentAudioSession = data.context_id;
+        currentAudioTurn = data.turn_id ?? null;
         updateStatus("Generating audio...");
         break;
         
       case "audio_chunk":
         console.log(`Audio chunk #${data.chunk_number}`);
-        if (data.audio) {
+        if (data.audio && data.context_id !== flushedAudioSession) {
           audioChunks.push({
             data: data.audio,
             chunkNumber: data.chunk_number,
             timestamp: Date.now()
           });
-          playAudioChunk(data.audio);
+          playAudioChunk(base64ToArrayBuffer(data.audio));
         }
         break;
         
@@ -481,6 +534,11 @@ function handleWebSocketMessage(event) {
         updateStatus("Ready to record");
         break;
         
+      case "playback_flush":
+        flushPlayback(data);
+        updateStatus("Listening...");
+        break;
+        
       case "audio_error":
         console.error("Audio error:", data.message);
         updateStatus(`Audio error: ${data.message}`, true);